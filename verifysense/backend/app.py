@@ -1,24 +1,60 @@
 import os
-from flask import Flask, request, jsonify
+from flask import Flask, Response, request, jsonify, stream_with_context
+from flask.json.provider import JSONProvider
 from flask_cors import CORS
-from dotenv import load_dotenv
-from base64 import b64decode
+from services.config import load_env
+from services.pipeline import verify_claims, iter_verification_events
+from services.http_client import get_pool_stats
+from services.cache import get_cache_stats
+from services.coalescing import coalesced, get_coalescing_stats
+from services.batch import parse_jsonl, verify_items
+from services.local_extraction import get_extraction_stats
+from services.clients import get_client_stats, warm_up
+from services.llm import get_llm_stats
+from services.deferred_explanations import defer_explanation, explain, get_deferred_stats, prefetch, wants_deferred
+from services.rate_limit import get_rate_limit_stats
+from services.resilience import deadline, get_resilience_stats, time_left
+from services.metrics import DEBUG_TIMING_HEADER, current_timings, render_prometheus, start_request_timings, timed, wants_timings
+from services import json_codec
+from services.uploads import MAX_REQUEST_BYTES, UploadTooLarge, check_size, is_image_body, read_stream, read_upload
 
 # Load environment variables
-load_dotenv()
+load_env()
+
+class CodecJSONProvider(JSONProvider):
+    """
+    Route jsonify and request.json through services.json_codec, which uses
+    orjson when available and splices in pre-encoded cached results
+    """
+    def dumps(self, obj, **kwargs):
+        return json_codec.dumps(obj).decode('utf-8')
+
+    def loads(self, s, **kwargs):
+        return json_codec.loads(s)
+
+    def response(self, *args, **kwargs):
+        # Hand the encoded bytes straight to the response
+        obj = self._prepare_response_obj(args, kwargs)
+        return self._app.response_class(json_codec.dumps(obj), mimetype='application/json')
 
 app = Flask(__name__)
+app.json = CodecJSONProvider(app)
+# Bodies with a larger Content-Length are rejected before they are read
+app.config['MAX_CONTENT_LENGTH'] = MAX_REQUEST_BYTES
 CORS(app)
 
 # ------------------------
 # Mock service functions
 # ------------------------
 
-def extract_text_from_image(image_base64):
+@timed('ocr')
+def extract_text_from_image(image_data):
     # In reality, you would decode the image and use OCR here
     # For now, return a sample text
     return "COVID-19 vaccines contain microchips to track people"
 
+@timed('extract_claims')
+@coalesced('extract_claims')
 def extract_claims(content):
     # Mock claim extraction: split content into sentences and pick suspicious ones
     # Here, just return the full content as one claim
@@ -26,6 +62,8 @@ def extract_claims(content):
         return []
     return [content.strip()]
 
+@timed('fact_check')
+@coalesced('fact_check')
 def check_facts(claim):
     # Mock fact checks
     if "microchip" in claim.lower():
@@ -43,6 +81,8 @@ def check_facts(claim):
             "url": "https://www.snopes.com/fact-check/example-true-claim/"
         }]
 
+@timed('evidence')
+@coalesced('evidence')
 def get_evidence(claim):
     # Mock evidence retrieval
     return [
@@ -55,6 +95,7 @@ def get_evidence(claim):
             "link": "https://www.cdc.gov/vaccines"
         }
     ]
+@timed('score')
 def calculate_score(claim, fact_checks, evidence):
     base_score = 50
     # Fact check contribution
@@ -85,6 +126,7 @@ def calculate_score(claim, fact_checks, evidence):
     return {"score": score, "confidence_label": confidence_label}
 
 
+@timed('explanation')
 def generate_explanation(claim, fact_checks, evidence, score):
     steps = [
         "Extracted claims from content",
@@ -101,13 +143,77 @@ def generate_explanation(claim, fact_checks, evidence, score):
 # Routes
 # ------------------------
 
+@app.before_request
+def start_timings():
+    start_request_timings(wants_timings(request.headers.get(DEBUG_TIMING_HEADER)))
+
+@app.after_request
+def add_timing_header(response):
+    # Requests sent with the debug header get the time spent in each stage
+    timings = current_timings()
+    if timings is not None:
+        response.headers['Server-Timing'] = timings.server_timing()
+    return response
+
 @app.route('/api/health', methods=['GET'])
 def health_check():
-    return jsonify({'status': 'healthy', 'message': 'VerifySense API is running'})
+    return jsonify({
+        'status': 'healthy',
+        'message': 'VerifySense API is running',
+        'upstream_pools': get_pool_stats(),
+        'cache': get_cache_stats(),
+        'coalescing': get_coalescing_stats(),
+        'claim_extraction': get_extraction_stats(),
+        'clients': get_client_stats(),
+        'llm': get_llm_stats(),
+        'deferred_explanations': get_deferred_stats(),
+        'rate_limits': get_rate_limit_stats(),
+        'resilience': get_resilience_stats()
+    })
 
-@app.route('/api/verify', methods=['POST'])
-def verify():
-    data = request.json
+@app.route('/metrics', methods=['GET'])
+def metrics():
+    """
+    Prometheus scrape target with stage and upstream latency histograms,
+    error and empty result counters, cache hit ratios and rate limit decisions
+    """
+    return Response(
+        render_prometheus(get_cache_stats(), get_rate_limit_stats()),
+        content_type='text/plain; version=0.0.4; charset=utf-8'
+    )
+
+@app.route('/api/warmup', methods=['GET'])
+def warmup():
+    """
+    Startup probe target that builds the clients named in WARM_UP_CLIENTS,
+    so the first real request does not pay for SDK imports
+    """
+    return jsonify({
+        'status': 'ready',
+        'clients': warm_up()
+    })
+
+def verify_request_data():
+    """
+    Read a verification request. Besides JSON, the image can be sent as a raw
+    image/* body or as the "image" file of a multipart form, which avoids
+    base64 encoding it.
+    """
+    if is_image_body(request.mimetype):
+        # Reject oversized images from their declared length, before reading them
+        check_size(request.content_length)
+        return {'input_type': 'image', 'content': read_stream(request.stream)}
+
+    if request.mimetype == 'multipart/form-data':
+        data = request.form.to_dict()
+        upload = request.files.get('image')
+        if upload is not None:
+            data.update(input_type='image', content=read_upload(upload.stream))
+        return data
+
+    return request.json
+
+def claims_from_request(data):
     input_type = data.get('input_type', 'text')
     content = data.get('content', '')
 
@@ -115,32 +221,162 @@ def verify():
     if input_type == 'image' and content:
         content = extract_text_from_image(content)
 
-    claims = extract_claims(content)
+    return extract_claims(content)
+
+@app.route('/api/verify', methods=['POST'])
+def verify():
+    data = verify_request_data()
+    # Deferred explanations are replaced by handles for /api/explain
+    defer = wants_deferred(data)
+    # Every upstream call made for this request shares one time budget
+    with deadline():
+        claims = claims_from_request(data)
+        if not claims:
+            return jsonify({
+                'status': 'error',
+                'message': 'No claims could be extracted from the provided content'
+            }), 400
+
+        results = verify_claims(
+            claims,
+            check_facts,
+            get_evidence,
+            calculate_score,
+            defer_explanation if defer else generate_explanation
+        )
+
+    if defer:
+        prefetch(results, generate_explanation)
+
+    return jsonify({
+        "status": "success",
+        "results": results
+    })
+
+@app.route('/api/explain/<explanation_id>', methods=['GET'])
+def explain_claim(explanation_id):
+    """
+    Explain a claim from the handle /api/verify returned in place of its
+    explanation. Explanations are generated on first request and cached.
+    """
+    with deadline():
+        explanation = explain(explanation_id, generate_explanation)
+    if explanation is None:
+        return jsonify({
+            'status': 'error',
+            'message': 'Unknown or expired explanation id'
+        }), 404
+
+    return jsonify({
+        'status': 'success',
+        'id': explanation_id,
+        'explanation': explanation
+    })
+
+@app.route('/api/verify/stream', methods=['POST'])
+def verify_stream():
+    """
+    Streaming variant of /api/verify that sends each claim's fact checks,
+    evidence, score and explanation as soon as they are ready.
+
+    Events are newline-delimited JSON objects with an "event" field, or
+    Server-Sent Events when the client accepts text/event-stream.
+    """
+    # Every upstream call made for this request shares one time budget
+    with deadline():
+        claims = claims_from_request(verify_request_data())
+        budget = time_left()
     if not claims:
         return jsonify({
             'status': 'error',
             'message': 'No claims could be extracted from the provided content'
         }), 400
 
-    results = []
-    for claim in claims:
-        fact_checks = check_facts(claim)
-        evidence = get_evidence(claim)
-        score = calculate_score(claim, fact_checks, evidence)
-        explanation = generate_explanation(claim, fact_checks, evidence, score)
-
-        results.append({
-            "claim": claim,
-            "fact_checks": fact_checks,
-            "evidence": evidence,
-            "score": score,
-            "explanation": explanation
-        })
+    use_sse = request.accept_mimetypes.best_match(
+        ['application/x-ndjson', 'text/event-stream']
+    ) == 'text/event-stream'
+
+    def generate():
+        yield stream_event('claims', {'claims': claims}, use_sse)
+        try:
+            # The generator runs after the view returns, so it takes over the
+            # rest of the budget. A deadline of 0 would mean none at all
+            with deadline(max(budget, 0.001) if budget is not None else 0):
+                events = iter_verification_events(
+                    claims,
+                    check_facts,
+                    get_evidence,
+                    calculate_score,
+                    generate_explanation
+                )
+                for index, stage, value in events:
+                    yield stream_event(stage, {'index': index, 'claim': claims[index], stage: value}, use_sse)
+        except Exception as e:
+            print(f"Error streaming verification: {e}")
+            yield stream_event('error', {'status': 'error', 'message': 'Verification failed'}, use_sse)
+            return
+        yield stream_event('done', {'status': 'success'}, use_sse)
 
+    return Response(
+        stream_with_context(generate()),
+        mimetype='text/event-stream' if use_sse else 'application/x-ndjson',
+        headers={
+            'Cache-Control': 'no-cache',
+            # Stop proxies from buffering the stream
+            'X-Accel-Buffering': 'no'
+        }
+    )
+
+@app.route('/api/verify/batch', methods=['POST'])
+def verify_batch():
+    """
+    Verify many posts in one request.
+
+    The body is JSON Lines, one {"id", "content", "input_type"} object per
+    line, or a JSON object with an "items" list. One result line is streamed
+    back per item as soon as it is verified, with the item's id.
+    """
+    if request.is_json:
+        items = [
+            {'id': number, **item} if isinstance(item, dict)
+            else {'id': number, 'error': 'Each item must be a JSON object'}
+            for number, item in enumerate((request.json or {}).get('items', []), 1)
+        ]
+    else:
+        items = parse_jsonl(request.get_data(as_text=True).splitlines())
+
+    def generate():
+        outputs = verify_items(
+            items,
+            extract_claims,
+            check_facts,
+            get_evidence,
+            calculate_score,
+            generate_explanation,
+            extract_text_from_image=extract_text_from_image
+        )
+        for result in outputs:
+            yield json_codec.dumps(result) + b"\n"
+
+    return Response(
+        stream_with_context(generate()),
+        mimetype='application/x-ndjson',
+        headers={'X-Accel-Buffering': 'no'}
+    )
+
+@app.errorhandler(413)
+@app.errorhandler(UploadTooLarge)
+def upload_too_large(error):
     return jsonify({
-        "status": "success",
-        "results": results
-    })
+        'status': 'error',
+        'message': 'The upload is too large'
+    }), 413
+
+def stream_event(name, payload, use_sse):
+    data = json_codec.dumps({'event': name, **payload})
+    if use_sse:
+        return b"event: " + name.encode('utf-8') + b"\ndata: " + data + b"\n\n"
+    return data + b"\n"
 
 @app.route('/api/feedback', methods=['POST'])
 def submit_feedback():
@@ -0,0 +1,182 @@
+from asgiref.wsgi import WsgiToAsgi
+from app import app as flask_app
+from services.claim_extraction import extract_claims_batched_async
+from services.fact_check import check_facts_async
+from services.evidence_retrieval import get_evidence_async
+from services.scoring import calculate_score
+from services.explainability import generate_explanation_async
+from services.ocr import extract_text_from_image_async
+from services.http_client import close_async_client
+from services.pipeline import verify_claims_async
+from services.resilience import deadline
+from services.metrics import DEBUG_TIMING_HEADER, request_timings, wants_timings
+from services.semantic_cache import claim_index
+from services.coalescing import coalesced
+from services.deferred_explanations import defer_explanation_async, explain_async, prefetch_async, wants_deferred
+from services.json_codec import dumps, loads
+from services.uploads import MAX_IMAGE_BYTES, MAX_REQUEST_BYTES, UploadBuffer, UploadTooLarge, check_size, is_image_body
+
+# ASGI entry point: `uvicorn asgi:app`
+#
+# POST /api/verify and GET /api/explain/<id> are served natively on the event
+# loop with the async service layer, so slow Google APIs hold open sockets
+# instead of worker threads. Every other route, and multipart uploads, are
+# handed to the Flask app.
+
+# Concurrent requests for the same content or claim share one upstream call,
+# and requests for different content share batched Gemini extraction calls
+extract_claims_async = coalesced('extract_claims')(extract_claims_batched_async)
+check_facts_async = coalesced('fact_check')(check_facts_async)
+get_evidence_async = coalesced('evidence')(get_evidence_async)
+
+_wsgi_app = WsgiToAsgi(flask_app)
+
+async def app(scope, receive, send):
+    if scope['type'] == 'lifespan':
+        await _lifespan(receive, send)
+    elif scope['type'] == 'http' and scope['method'] == 'POST' and scope['path'] == '/api/verify' \
+            and _content_type(scope) != 'multipart/form-data':
+        await _handle(verify(scope, receive, send), send)
+    elif scope['type'] == 'http' and scope['method'] == 'GET' and scope['path'].startswith('/api/explain/'):
+        await _handle(explain(scope, send), send)
+    else:
+        await _wsgi_app(scope, receive, send)
+
+async def _handle(handler, send):
+    # Handlers send their response in one go at the end, so nothing has been
+    # sent yet when one raises
+    try:
+        await handler
+    except Exception as e:
+        print(f"Error handling request: {e}")
+        await _send_json(send, 500, {'status': 'error', 'message': 'Internal server error'})
+
+async def verify(scope, receive, send):
+    image_body = is_image_body(_content_type(scope))
+    try:
+        body = await _read_body(scope, receive, MAX_IMAGE_BYTES if image_body else MAX_REQUEST_BYTES)
+    except UploadTooLarge:
+        await _send_json(send, 413, {'status': 'error', 'message': 'The upload is too large'})
+        return
+
+    if image_body:
+        data = {'input_type': 'image', 'content': body}
+    else:
+        try:
+            data = loads(body)
+        except ValueError:
+            await _send_json(send, 400, {'status': 'error', 'message': 'Request body must be valid JSON'})
+            return
+        if not isinstance(data, dict):
+            await _send_json(send, 400, {'status': 'error', 'message': 'Request body must be a JSON object'})
+            return
+
+    # Deferred explanations are replaced by handles for /api/explain
+    defer = wants_deferred(data)
+    # Every upstream call made for this request shares one time budget
+    with request_timings(wants_timings(_header(scope, DEBUG_TIMING_HEADER))) as timings, deadline():
+        results = await _verify_data(data, defer)
+    # Requests sent with the debug header get the time spent in each stage
+    headers = [] if timings is None else [(b'server-timing', timings.server_timing().encode('latin-1'))]
+    if results is None:
+        await _send_json(send, 400, {
+            'status': 'error',
+            'message': 'No claims could be extracted from the provided content'
+        }, headers)
+        return
+
+    if defer:
+        prefetch_async(results, generate_explanation_async)
+
+    await _send_json(send, 200, {
+        "status": "success",
+        "results": results
+    }, headers)
+
+async def explain(scope, send):
+    explanation_id = scope['path'][len('/api/explain/'):]
+    with request_timings(wants_timings(_header(scope, DEBUG_TIMING_HEADER))) as timings, deadline():
+        explanation = await explain_async(explanation_id, generate_explanation_async)
+    headers = [] if timings is None else [(b'server-timing', timings.server_timing().encode('latin-1'))]
+    if explanation is None:
+        await _send_json(send, 404, {'status': 'error', 'message': 'Unknown or expired explanation id'}, headers)
+        return
+
+    await _send_json(send, 200, {
+        'status': 'success',
+        'id': explanation_id,
+        'explanation': explanation
+    }, headers)
+
+async def _verify_data(data, defer=False):
+    input_type = data.get('input_type', 'text')
+    content = data.get('content', '')
+
+    # Handle image content
+    if input_type == 'image' and content:
+        content = await extract_text_from_image_async(content)
+
+    claims = await extract_claims_async(content)
+    if not claims:
+        return None
+
+    return await verify_claims_async(
+        claims,
+        check_facts_async,
+        get_evidence_async,
+        calculate_score,
+        defer_explanation_async if defer else generate_explanation_async,
+        claim_index=claim_index
+    )
+
+def _header(scope, name):
+    name = name.lower().encode('latin-1')
+    for header, value in scope['headers']:
+        if header == name:
+            return value.decode('latin-1')
+    return None
+
+def _content_type(scope):
+    return (_header(scope, 'content-type') or '').split(';')[0].strip().lower()
+
+async def _read_body(scope, receive, limit):
+    # Reject oversized bodies from their declared length, before reading them
+    for name, value in scope['headers']:
+        if name == b'content-length' and value.isdigit():
+            check_size(int(value), limit)
+
+    buffer = UploadBuffer(limit)
+    try:
+        more_body = True
+        while more_body:
+            message = await receive()
+            buffer.write(message.get('body', b''))
+            more_body = message.get('more_body', False)
+        return buffer.read()
+    finally:
+        buffer.close()
+
+async def _send_json(send, status, payload, headers=()):
+    body = dumps(payload)
+    await send({
+        'type': 'http.response.start',
+        'status': status,
+        'headers': [
+            (b'content-type', b'application/json'),
+            (b'content-length', str(len(body)).encode('ascii')),
+            # Match the flask-cors defaults used by the rest of the API
+            (b'access-control-allow-origin', b'*'),
+            *headers
+        ]
+    })
+    await send({'type': 'http.response.body', 'body': body})
+
+async def _lifespan(receive, send):
+    while True:
+        message = await receive()
+        if message['type'] == 'lifespan.startup':
+            await send({'type': 'lifespan.startup.complete'})
+        elif message['type'] == 'lifespan.shutdown':
+            await close_async_client()
+            await send({'type': 'lifespan.shutdown.complete'})
+            return
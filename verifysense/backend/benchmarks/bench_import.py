@@ -0,0 +1,44 @@
+import argparse
+import json
+import os
+import statistics
+import subprocess
+import sys
+
+BACKEND_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+def import_times(module):
+    # Self and cumulative import time in microseconds per module, from a fresh interpreter
+    result = subprocess.run(
+        [sys.executable, '-X', 'importtime', '-c', f"import {module}"],
+        cwd=BACKEND_DIR, capture_output=True, text=True, check=True
+    )
+    times = {}
+    for line in result.stderr.splitlines():
+        fields = line.removeprefix('import time:').split('|')
+        if len(fields) == 3 and fields[1].strip().isdigit():
+            times[fields[2].strip()] = (int(fields[0]), int(fields[1]))
+    return times
+
+def main():
+    parser = argparse.ArgumentParser(description='Measure cold start import time of the entry points')
+    parser.add_argument('--runs', type=int, default=5)
+    parser.add_argument('--top', type=int, default=10)
+    parser.add_argument('--json', help='Write the median import time per entry point to this file')
+    args = parser.parse_args()
+
+    medians = {}
+    for module in ('app', 'asgi'):
+        runs = [import_times(module) for _ in range(args.runs)]
+        medians[module] = statistics.median(times[module][1] for times in runs) / 1000
+        print(f"{module}: {medians[module]:.0f} ms (median of {args.runs})")
+        # Slowest modules by their own import time, from the last run
+        for name, (self_us, _) in sorted(runs[-1].items(), key=lambda item: -item[1][0])[:args.top]:
+            print(f"  {self_us / 1000:8.1f} ms  {name}")
+
+    if args.json:
+        with open(args.json, 'w') as output:
+            json.dump({f"{module}_import_ms": round(ms, 1) for module, ms in medians.items()}, output)
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,66 @@
+import argparse
+import base64
+import json
+import os
+import sys
+import time
+
+# Add the parent directory to the path so we can import the services
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from services.json_codec import BACKEND, EncodedList, dumps, loads
+from services.models import ClaimResult, EvidenceItem, FactCheck, Score, json_default
+
+def make_results(claims, snippet_words, cached=False):
+    # Each claim carries 3 fact checks and 10 evidence items, like a full pipeline run
+    snippet = ' '.join(['evidence'] * snippet_words)
+    results = []
+    for i in range(claims):
+        fact_checks = [FactCheck('2024-01-01', 'Someone', f"Claim {i}", 'Publisher', 'example.org', 'False',
+                                 'Rated false', f"https://example.org/{i}/{j}") for j in range(3)]
+        evidence = [EvidenceItem(f"Title {j}", snippet, f"https://news.example.com/{i}/{j}", 'news.example.com',
+                                 'high', 80, '2024-01-01') for j in range(10)]
+        if cached:
+            fact_checks, evidence = EncodedList(fact_checks), EncodedList(evidence)
+        score = Score(30, 'Low', 20, 80, 70, 80)
+        results.append(ClaimResult(f"Claim {i}", fact_checks, evidence, score, {'summary': snippet}))
+    return {'results': results}
+
+def timed(func, iterations):
+    # The first call pays one-off setup costs, so it is left out
+    func()
+    start = time.perf_counter()
+    for _ in range(iterations):
+        func()
+    return (time.perf_counter() - start) / iterations * 1000
+
+def main():
+    parser = argparse.ArgumentParser(description='Benchmark JSON encoding of /api/verify responses')
+    parser.add_argument('--iterations', type=int, default=200)
+    parser.add_argument('--image-mb', type=float, default=4)
+    args = parser.parse_args()
+
+    cases = [
+        ('typical (3 claims)', make_results(3, 30), make_results(3, 30, cached=True)),
+        ('worst case (50 claims)', make_results(50, 300), make_results(50, 300, cached=True))
+    ]
+
+    print(f"codec:              {BACKEND}")
+    for name, payload, cached in cases:
+        stdlib = timed(lambda: json.dumps(payload, default=json_default), args.iterations)
+        codec = timed(lambda: dumps(payload), args.iterations)
+        spliced = timed(lambda: dumps(cached), args.iterations)
+        print(f"{name}:")
+        print(f"  json.dumps:       {stdlib:.3f} ms")
+        print(f"  dumps:            {codec:.3f} ms")
+        print(f"  dumps (cached):   {spliced:.3f} ms")
+        print(f"  response size:    {len(dumps(payload)):,} bytes")
+
+    image = base64.b64encode(os.urandom(int(args.image_mb * 1024 * 1024))).decode('ascii')
+    body = json.dumps({'image': image, 'type': 'image'}).encode('utf-8')
+    print(f"request with {args.image_mb:g} MB image ({len(body):,} bytes):")
+    print(f"  json.loads:       {timed(lambda: json.loads(body), 20):.3f} ms")
+    print(f"  loads:            {timed(lambda: loads(body), 20):.3f} ms")
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,57 @@
+import argparse
+import os
+import sys
+import time
+import numpy as np
+
+# Add the parent directory to the path so we can import the services
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from services.scoring import calculate_score, calculate_scores, encode_records
+
+RATINGS = ['False', 'Pants on Fire', 'Mostly False', 'Misleading', 'Half True', 'Mixture', 'Mostly True', 'True', 'Unproven']
+RELIABILITIES = ['high', 'medium', 'low']
+
+def make_records(count, seed=1):
+    # Up to 4 fact checks and 10 evidence items per claim, like stored results
+    rng = np.random.default_rng(seed)
+    ratings = rng.integers(0, len(RATINGS), count * 4).tolist()
+    reliabilities = rng.integers(0, len(RELIABILITIES), count * 10).tolist()
+    fact_check_counts = rng.integers(0, 5, count).tolist()
+    evidence_counts = rng.integers(0, 11, count).tolist()
+    records = []
+    for i in range(count):
+        fact_checks = [{'rating': RATINGS[r]} for r in ratings[i * 4:i * 4 + fact_check_counts[i]]]
+        evidence = [{'reliability': RELIABILITIES[r]} for r in reliabilities[i * 10:i * 10 + evidence_counts[i]]]
+        records.append((fact_checks, evidence))
+    return records
+
+def main():
+    parser = argparse.ArgumentParser(description='Benchmark scalar against batch scoring')
+    parser.add_argument('--records', type=int, default=1000000)
+    args = parser.parse_args()
+
+    records = make_records(args.records)
+
+    start = time.perf_counter()
+    scalar = [calculate_score('', fact_checks, evidence)['score'] for fact_checks, evidence in records]
+    scalar_seconds = time.perf_counter() - start
+
+    start = time.perf_counter()
+    columns = encode_records(records)
+    encode_seconds = time.perf_counter() - start
+
+    start = time.perf_counter()
+    batch = calculate_scores(**columns)
+    batch_seconds = time.perf_counter() - start
+
+    mismatches = int((np.array(scalar) != batch['score']).sum())
+    print(f"records:            {args.records}")
+    print(f"calculate_score:    {scalar_seconds:.3f} s ({args.records / scalar_seconds:,.0f} records/s)")
+    print(f"encode_records:     {encode_seconds:.3f} s")
+    print(f"calculate_scores:   {batch_seconds:.3f} s ({args.records / batch_seconds:,.0f} records/s)")
+    print(f"speedup:            {scalar_seconds / batch_seconds:.0f}x on encoded columns")
+    print(f"mismatched scores:  {mismatches}")
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,91 @@
+import argparse
+import os
+import sys
+import time
+import numpy as np
+
+# Add the parent directory to the path so we can import the services
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from services.semantic_cache import SemanticIndex, embed
+
+def make_claims(count, vocabulary=20000, seed=1):
+    # Sentences of 6-14 words drawn from a Zipf-distributed vocabulary, so
+    # common words are shared across claims the way they are in real text
+    rng = np.random.default_rng(seed)
+    words = [f"{chr(97 + i % 26)}{chr(97 + i // 26 % 26)}{i // 676}" for i in range(vocabulary)]
+    lengths = rng.integers(6, 15, count)
+    ranks = np.minimum(rng.zipf(1.3, int(lengths.sum())), vocabulary) - 1
+    claims = []
+    offset = 0
+    for length in lengths.tolist():
+        claims.append(' '.join(words[r] for r in ranks[offset:offset + length].tolist()))
+        offset += length
+    return claims
+
+def paraphrase(claim):
+    # Change case and punctuation and drop one word
+    words = claim.split()
+    del words[len(words) // 2]
+    return ' '.join(words).capitalize() + '.'
+
+def main():
+    parser = argparse.ArgumentParser(description='Benchmark the semantic claim index')
+    parser.add_argument('--claims', type=int, default=1000000)
+    parser.add_argument('--queries', type=int, default=500)
+    parser.add_argument('--batch-size', type=int, default=100000)
+    args = parser.parse_args()
+
+    claims = make_claims(args.claims)
+    index = SemanticIndex(max_claims=args.claims)
+
+    start = time.perf_counter()
+    for offset in range(0, len(claims), args.batch_size):
+        batch = claims[offset:offset + args.batch_size]
+        index.add_many(batch, list(range(offset, offset + len(batch))))
+    insert_seconds = time.perf_counter() - start
+
+    # Near-duplicate queries of indexed claims
+    step = max(1, args.claims // args.queries)
+    targets = list(range(0, args.claims, step))[:args.queries]
+    queries = [paraphrase(claims[i]) for i in targets]
+    similarities = (embed(queries) * embed([claims[i] for i in targets])).sum(axis=1)
+
+    # Exact nearest-neighbour similarity of each query, by scanning every stored row
+    query_vectors = embed(queries)
+    nearest = np.full(len(queries), -1.0)
+    for offset in range(0, len(index), 65536):
+        rows = index._vectors[offset:offset + 65536] * index._scales[offset:offset + 65536, np.newaxis]
+        nearest = np.maximum(nearest, (query_vectors @ rows.T).max(axis=1))
+
+    latencies = []
+    cpu_times = []
+    found = 0
+    nearest_found = 0
+    for target, query, best in zip(targets, queries, nearest):
+        start = time.perf_counter()
+        cpu_start = time.thread_time()
+        match = index.search(query)
+        cpu_times.append(time.thread_time() - cpu_start)
+        latencies.append(time.perf_counter() - start)
+        if match is not None and match[1] == target:
+            found += 1
+        # Another claim may be closer to the paraphrase than the one it came from
+        if best < index.threshold:
+            nearest_found += match is None
+        else:
+            nearest_found += match is not None and match[2] >= best - 1e-5
+
+    latencies = np.array(latencies) * 1000
+    cpu_times = np.array(cpu_times) * 1000
+    print(f"claims indexed:     {len(index)}")
+    print(f"insert:             {insert_seconds / args.claims * 1e6:.1f} us/claim")
+    print(f"search p50 / p99:   {np.percentile(latencies, 50):.3f} / {np.percentile(latencies, 99):.3f} ms")
+    print(f"  CPU p50 / p99:    {np.percentile(cpu_times, 50):.3f} / {np.percentile(cpu_times, 99):.3f} ms")
+    print(f"query similarity:   {similarities.mean():.3f} mean")
+    print(f"recall at {index.threshold}:     {found}/{len(targets)} "
+          f"({int((similarities >= index.threshold).sum())} above threshold)")
+    print(f"nearest found:      {nearest_found}/{len(targets)}")
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,245 @@
+import argparse
+import contextlib
+import json
+import math
+import os
+import socket
+import statistics
+import subprocess
+import sys
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from datetime import datetime, timezone
+import requests
+
+BACKEND_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+# Add the backend directory to the path so we can import the fakes
+sys.path.append(BACKEND_DIR)
+
+from fakes.upstreams import UPSTREAM_PATHS, FakeUpstreamServer, LatencyProfile, backend_env
+
+# Posts sent to /api/verify in turn. Each request gets a unique suffix, so no
+# request is answered from another's cached or coalesced results
+POSTS = [
+    "The Great Wall of China is visible from space with the naked eye.",
+    "Drinking eight glasses of water a day is required for good health. Most people are chronically dehydrated.",
+    "COVID-19 vaccines contain microchips to track people. The chips were developed by a software company in 2019.",
+    "Lightning never strikes the same place twice. Tall buildings are hit only once in their lifetime.",
+    "Humans only use 10 percent of their brains. Unlocking the rest would give people new abilities.",
+    "Eating carrots improves your night vision. Pilots were fed carrots during the Second World War for this reason."
+]
+
+# Settings that keep repeated runs comparable: nothing is served from a cache
+# and no upstream call waits for the rate limiter
+DEFAULT_BACKEND_ENV = {
+    'CACHE_ENABLED': 'false',
+    'SEMANTIC_CACHE_ENABLED': 'false',
+    'RATE_LIMIT_ENABLED': 'false',
+    'DEBUG_TIMING_ENABLED': 'true'
+}
+
+def percentile(values, percent):
+    # Nearest-rank percentile of a non-empty list
+    ordered = sorted(values)
+    return ordered[max(math.ceil(percent / 100 * len(ordered)) - 1, 0)]
+
+def parse_server_timing(header):
+    """
+    Read the per-stage durations (ms) from a Server-Timing header
+    """
+    stages = {}
+    for entry in filter(None, (entry.strip() for entry in (header or '').split(','))):
+        name, *params = entry.split(';')
+        for param in params:
+            key, _, value = param.partition('=')
+            if key.strip() == 'dur':
+                stages[name.strip()] = float(value)
+    return stages
+
+def free_port():
+    with socket.socket() as sock:
+        sock.bind(('127.0.0.1', 0))
+        return sock.getsockname()[1]
+
+@contextlib.contextmanager
+def run_backend(env, port, startup_timeout=60):
+    """
+    Serve the ASGI app, which runs the real service layer, in a subprocess
+    """
+    process = subprocess.Popen(
+        [sys.executable, '-m', 'uvicorn', 'asgi:app', '--host', '127.0.0.1', '--port', str(port),
+         '--log-level', 'warning'],
+        cwd=BACKEND_DIR,
+        env={**os.environ, **env}
+    )
+    url = f"http://127.0.0.1:{port}"
+    try:
+        deadline = time.monotonic() + startup_timeout
+        while True:
+            try:
+                if requests.get(f"{url}/api/health", timeout=1).status_code == 200:
+                    break
+            except requests.ConnectionError:
+                pass
+            if process.poll() is not None or time.monotonic() > deadline:
+                raise RuntimeError('The backend did not start')
+            time.sleep(0.2)
+        yield url
+    finally:
+        process.terminate()
+        process.wait(timeout=10)
+
+def drive(url, total, concurrency, warmup=0, image_every=0):
+    """
+    Send requests to /api/verify from a fixed number of concurrent clients
+
+    Args:
+        url (str): The backend's base URL
+        total (int): Number of measured requests
+        concurrency (int): Number of requests in flight at once
+        warmup (int): Requests sent first and left out of the results
+        image_every (int): Send every nth request as a raw image body, 0 for none
+
+    Returns:
+        tuple: (list of (status, seconds, stage durations), wall clock seconds)
+    """
+    local = threading.local()
+    counter = iter(range(warmup + total))
+    counter_lock = threading.Lock()
+
+    def send(number):
+        session = getattr(local, 'session', None)
+        if session is None:
+            session = local.session = requests.Session()
+        text = f"{POSTS[number % len(POSTS)]} Reported in post number {number}."
+        headers = {'X-Debug-Timing': '1'}
+        started = time.perf_counter()
+        if image_every and number % image_every == 0:
+            # The fake Vision API reads UTF-8 image bytes back as their text
+            headers['Content-Type'] = 'image/png'
+            response = session.post(f"{url}/api/verify", data=text.encode('utf-8'), headers=headers)
+        else:
+            response = session.post(f"{url}/api/verify", json={'content': text}, headers=headers)
+        seconds = time.perf_counter() - started
+        return response.status_code, seconds, parse_server_timing(response.headers.get('Server-Timing'))
+
+    def client(results):
+        while True:
+            with counter_lock:
+                number = next(counter, None)
+            if number is None:
+                return
+            result = send(number)
+            if number >= warmup:
+                results.append(result)
+
+    # Warm up first, so connection setup and client builds are not measured
+    for number in range(warmup):
+        send(next(counter))
+
+    results = []
+    started = time.perf_counter()
+    with ThreadPoolExecutor(max_workers=concurrency) as executor:
+        for _ in range(concurrency):
+            executor.submit(client, results)
+    return results, time.perf_counter() - started
+
+def summarize(results, elapsed):
+    """
+    Build the report for one run
+
+    Returns:
+        dict: Throughput, latency percentiles, errors and mean time per stage
+    """
+    latencies = [seconds * 1000 for _, seconds, _ in results]
+    stage_names = sorted({stage for _, _, stages in results for stage in stages})
+    return {
+        'requests': len(results),
+        'errors': sum(1 for status, _, _ in results if status != 200),
+        'throughput_rps': round(len(results) / elapsed, 2),
+        'latency_ms': {
+            'p50': round(percentile(latencies, 50), 1),
+            'p95': round(percentile(latencies, 95), 1),
+            'p99': round(percentile(latencies, 99), 1),
+            'mean': round(statistics.mean(latencies), 1),
+            'max': round(max(latencies), 1)
+        },
+        # Summed over each request's calls to a stage, then averaged over requests
+        'stage_ms': {
+            stage: round(statistics.mean(stages.get(stage, 0) for _, _, stages in results), 1)
+            for stage in stage_names
+        }
+    }
+
+def git_commit():
+    try:
+        return subprocess.run(
+            ['git', 'rev-parse', '--short', 'HEAD'],
+            cwd=BACKEND_DIR, capture_output=True, text=True, check=True
+        ).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+def main():
+    parser = argparse.ArgumentParser(
+        description='Load test /api/verify against local stand-ins for the Google APIs'
+    )
+    parser.add_argument('--requests', type=int, default=200)
+    parser.add_argument('--concurrency', type=int, default=16)
+    parser.add_argument('--warmup', type=int, default=5)
+    parser.add_argument('--image-every', type=int, default=0, help='Send every nth request as an image')
+    for upstream, default in (('fact_check', '80:300'), ('custom_search', '150:600'),
+                              ('gemini', '600:2500'), ('vision', '250:800')):
+        parser.add_argument(f"--{upstream.replace('_', '-')}", type=LatencyProfile.parse,
+                            default=LatencyProfile.parse(default), metavar='MEDIAN_MS[:P99_MS[:ERROR_RATE]]',
+                            help=f"Latency and error rate of the fake {upstream} API (default {default})")
+    parser.add_argument('--env', action='append', default=[], metavar='NAME=VALUE',
+                        help='Extra backend setting, e.g. --env VERIFY_DEADLINE_SECONDS=5')
+    parser.add_argument('--json', help='Write the results to this file')
+    args = parser.parse_args()
+
+    profiles = {upstream: getattr(args, upstream) for upstream in UPSTREAM_PATHS}
+    extra_env = dict(setting.split('=', 1) for setting in args.env)
+
+    with contextlib.ExitStack() as stack:
+        servers = {
+            upstream: stack.enter_context(FakeUpstreamServer(upstream, profile))
+            for upstream, profile in profiles.items()
+        }
+        env = {**DEFAULT_BACKEND_ENV, **backend_env(servers), **extra_env}
+        url = stack.enter_context(run_backend(env, free_port()))
+        results, elapsed = drive(url, args.requests, args.concurrency, args.warmup, args.image_every)
+        upstream_calls = {
+            upstream: {'requests': server.requests, 'failures': server.failures}
+            for upstream, server in servers.items()
+        }
+
+    report = {
+        'commit': git_commit(),
+        'timestamp': datetime.now(timezone.utc).isoformat(timespec='seconds'),
+        'config': {
+            'requests': args.requests,
+            'concurrency': args.concurrency,
+            'image_every': args.image_every,
+            'upstreams': {upstream: profile.to_dict() for upstream, profile in profiles.items()},
+            'env': extra_env
+        },
+        **summarize(results, elapsed),
+        'upstream_calls': upstream_calls
+    }
+
+    print(f"{report['requests']} requests, concurrency {args.concurrency}, {report['errors']} errors")
+    print(f"throughput: {report['throughput_rps']} req/s")
+    latency = report['latency_ms']
+    print(f"latency:    p50 {latency['p50']} ms  p95 {latency['p95']} ms  p99 {latency['p99']} ms")
+    for stage, ms in report['stage_ms'].items():
+        print(f"  {stage:16} {ms:8.1f} ms")
+
+    if args.json:
+        with open(args.json, 'w') as output:
+            json.dump(report, output, indent=2)
+
+if __name__ == '__main__':
+    main()
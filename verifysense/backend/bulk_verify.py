@@ -0,0 +1,60 @@
+import argparse
+import sys
+from services.batch import BATCH_CONCURRENCY, ClaimMemo, load_checkpoint, parse_jsonl, verify_items
+from services.claim_extraction import extract_claims_batched
+from services.fact_check import check_facts
+from services.evidence_retrieval import get_evidence
+from services.scoring import calculate_score
+from services.explainability import generate_explanation
+from services.ocr import extract_text_from_image
+from services.json_codec import dumps
+
+# Offline bulk verification: `python bulk_verify.py posts.jsonl results.jsonl`
+#
+# Each input line is {"id": ..., "content": ..., "input_type": "text" | "image"}
+# and produces one output line with the same id. Output is appended and flushed
+# per item, so rerunning the same command after a crash skips finished items
+# and retries failed ones.
+
+def main():
+    parser = argparse.ArgumentParser(description='Verify a JSONL file of posts')
+    parser.add_argument('input', help='JSONL file of items to verify')
+    parser.add_argument('output', help='JSONL file results are appended to')
+    parser.add_argument('--concurrency', type=int, default=BATCH_CONCURRENCY)
+    args = parser.parse_args()
+
+    done = load_checkpoint(args.output)
+    if done:
+        print(f"Resuming: {len(done)} items already verified", file=sys.stderr)
+
+    memo = ClaimMemo()
+    counts = {'success': 0, 'error': 0}
+    with open(args.input) as source, open(args.output, 'ab') as output:
+        # Items that already have a successful output line are skipped
+        items = (item for item in parse_jsonl(source) if item['id'] not in done)
+        outputs = verify_items(
+            items,
+            # Concurrent items share Gemini extraction calls
+            extract_claims_batched,
+            check_facts,
+            get_evidence,
+            calculate_score,
+            generate_explanation,
+            extract_text_from_image=extract_text_from_image,
+            concurrency=args.concurrency,
+            memo=memo
+        )
+        for result in outputs:
+            output.write(dumps(result) + b'\n')
+            # Flush every line so the output doubles as the checkpoint
+            output.flush()
+            counts[result['status']] += 1
+
+    print(
+        f"Verified {counts['success']} items, {counts['error']} failed; "
+        f"{memo.deduplicated} duplicate claim lookups skipped",
+        file=sys.stderr
+    )
+
+if __name__ == '__main__':
+    main()
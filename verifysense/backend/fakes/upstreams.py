@@ -0,0 +1,262 @@
+import argparse
+import json
+import math
+import random
+import re
+import threading
+import time
+import zlib
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from urllib.parse import parse_qs, urlsplit
+from fakes.vision_server import annotate
+
+# Local stand-ins for every Google API the backend calls, for load tests and
+# offline runs: `python -m fakes.upstreams`, then point the backend at them with
+# the environment variables printed on startup.
+#
+# Each upstream is served on its own port, waits for a latency drawn from its
+# LatencyProfile and fails a share of requests with a 503, so slow or flaky
+# upstreams can be reproduced.
+
+# Path prefix of each upstream's endpoint
+UPSTREAM_PATHS = {
+    'fact_check': '/v1alpha1/claims:search',
+    'custom_search': '/customsearch/v1',
+    'gemini': '/v1beta/models/',
+    'vision': '/v1/images:annotate'
+}
+
+class LatencyProfile:
+    """
+    Log-normal latency distribution given by its median and 99th percentile
+    
+    A profile whose p99 equals its median always waits exactly the median.
+    """
+    # z-score of the 99th percentile of a standard normal distribution
+    P99_Z = 2.3263
+    
+    def __init__(self, median_ms=0, p99_ms=None, error_rate=0):
+        self.median_ms = median_ms
+        self.p99_ms = median_ms if p99_ms is None else max(p99_ms, median_ms)
+        self.error_rate = error_rate
+        self._sigma = math.log(self.p99_ms / median_ms) / self.P99_Z if median_ms > 0 else 0
+    
+    @classmethod
+    def parse(cls, spec):
+        """
+        Parse "median_ms[:p99_ms[:error_rate]]", e.g. "80:400:0.01"
+        """
+        fields = [float(field) for field in spec.split(':')]
+        return cls(*fields)
+    
+    def sample(self):
+        # Seconds to wait before answering a request
+        if self.median_ms <= 0:
+            return 0
+        return self.median_ms * math.exp(random.gauss(0, self._sigma)) / 1000
+    
+    def fails(self):
+        return random.random() < self.error_rate
+    
+    def to_dict(self):
+        return {'median_ms': self.median_ms, 'p99_ms': self.p99_ms, 'error_rate': self.error_rate}
+
+def fact_check_response(query):
+    """
+    Build a Fact Check API claims:search response for a query
+    """
+    checksum = zlib.crc32(query.encode('utf-8'))
+    rating = 'False' if checksum % 2 else 'Mostly true'
+    return {'claims': [{
+        'text': query,
+        'claimant': 'Social media posts',
+        'claimDate': '2024-01-01T00:00:00Z',
+        'claimReview': [{
+            'publisher': {'name': 'PolitiFact', 'site': 'politifact.com'},
+            'url': f"https://www.politifact.com/factchecks/{checksum}/",
+            'title': f"Fact check: {query}",
+            'reviewDate': '2024-01-02T00:00:00Z',
+            'textualRating': rating,
+            'languageCode': 'en'
+        }]
+    }]}
+
+def search_response(query, count):
+    """
+    Build a Custom Search API response with count results for a query
+    """
+    sites = ['reuters.com', 'apnews.com', 'bbc.co.uk', 'example-blog.net', 'who.int']
+    return {'items': [
+        {
+            'title': f"{query} - report {number}",
+            'link': f"https://www.{sites[number % len(sites)]}/article/{number}",
+            'displayLink': sites[number % len(sites)],
+            'snippet': f"Coverage of the claim that {query.lower()}, with sources and context.",
+            'pagemap': {'metatags': [{'article:published_time': '2024-01-01T00:00:00Z'}]}
+        }
+        for number in range(count)
+    ]}
+
+def gemini_text(prompt):
+    """
+    Answer a claim extraction or explanation prompt the way Gemini would
+    """
+    if 'Documents are given one per line' in prompt:
+        documents = [json.loads(line) for line in re.findall(r'^\s*(\{"id".*\})\s*$', prompt, re.MULTILINE)]
+        return json.dumps({document['id']: _sentences(document['text']) for document in documents})
+    if 'Extract the main factual claims' in prompt:
+        text = prompt.split('Text:', 1)[-1]
+        return '\n'.join(f"{number}. {claim}" for number, claim in enumerate(_sentences(text), 1))
+    return json.dumps({
+        'summary': 'The claim was compared with published fact checks and independent reporting.',
+        'steps': [
+            'Search fact-checking sites for the claim',
+            'Compare coverage from several reliable outlets',
+            'Check the original source and date of the claim'
+        ]
+    })
+
+def _sentences(text):
+    return [sentence.strip() for sentence in re.split(r'(?<=[.!?])\s+', text.strip()) if sentence.strip()]
+
+class FakeUpstreamHandler(BaseHTTPRequestHandler):
+    def do_GET(self):
+        self._handle()
+    
+    def do_POST(self):
+        self._handle()
+    
+    def _handle(self):
+        server = self.server
+        url = urlsplit(self.path)
+        if not url.path.startswith(UPSTREAM_PATHS[server.upstream]):
+            self._send(404, {'error': {'code': 404, 'message': f"Unknown path {url.path}"}})
+            return
+        
+        length = int(self.headers.get('Content-Length', 0))
+        body = json.loads(self.rfile.read(length)) if length else {}
+        time.sleep(server.profile.sample())
+        if server.profile.fails():
+            server.record(failed=True)
+            self._send(503, {'error': {'code': 503, 'message': 'The service is currently unavailable.', 'status': 'UNAVAILABLE'}})
+            return
+        
+        server.record()
+        query = {name: values[0] for name, values in parse_qs(url.query).items()}
+        if server.upstream == 'fact_check':
+            payload = fact_check_response(query.get('query', ''))
+        elif server.upstream == 'custom_search':
+            payload = search_response(query.get('q', ''), int(query.get('num', 5)))
+        elif server.upstream == 'vision':
+            payload = {'responses': [annotate(request) for request in body.get('requests', [])]}
+        else:
+            prompt = ''.join(
+                part.get('text', '') for content in body.get('contents', []) for part in content.get('parts', [])
+            )
+            payload = {'candidates': [{
+                'content': {'parts': [{'text': gemini_text(prompt)}], 'role': 'model'},
+                # STOP, as the REST transport asks for integer enums
+                'finishReason': 1,
+                'index': 0
+            }]}
+        self._send(200, payload)
+    
+    def _send(self, status, payload):
+        body = json.dumps(payload).encode('utf-8')
+        self.send_response(status)
+        self.send_header('Content-Type', 'application/json')
+        self.send_header('Content-Length', str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+    
+    def log_message(self, format, *args):
+        # Keep test and load-test output quiet
+        pass
+
+class FakeUpstreamServer(ThreadingHTTPServer):
+    """
+    Fake server for one upstream API that counts the requests it answers
+    
+    Use as a context manager to serve from a background thread on a free port.
+    """
+    daemon_threads = True
+    # Load tests open many connections at once
+    request_queue_size = 256
+    
+    def __init__(self, upstream, profile=None, host='127.0.0.1', port=0):
+        super().__init__((host, port), FakeUpstreamHandler)
+        self.upstream = upstream
+        self.profile = profile or LatencyProfile()
+        self.requests = 0
+        self.failures = 0
+        self._lock = threading.Lock()
+    
+    @property
+    def url(self):
+        host, port = self.server_address[:2]
+        return f"http://{host}:{port}"
+    
+    def record(self, failed=False):
+        with self._lock:
+            self.requests += 1
+            self.failures += failed
+    
+    def __enter__(self):
+        threading.Thread(target=self.serve_forever, name=f"fake-{self.upstream}", daemon=True).start()
+        return self
+    
+    def __exit__(self, *exc_info):
+        self.shutdown()
+        self.server_close()
+
+def backend_env(servers):
+    """
+    Environment variables that point the backend at running fake servers
+    
+    Args:
+        servers (dict): FakeUpstreamServer keyed by upstream name
+        
+    Returns:
+        dict: The variables, including placeholder API keys
+    """
+    env = {
+        'FACT_CHECK_API_KEY': 'fake-key',
+        'CUSTOM_SEARCH_API_KEY': 'fake-key',
+        'SEARCH_ENGINE_ID': 'fake-engine',
+        'GEMINI_API_KEY': 'fake-key'
+    }
+    if 'fact_check' in servers:
+        env['FACT_CHECK_API_URL'] = servers['fact_check'].url + UPSTREAM_PATHS['fact_check']
+    if 'custom_search' in servers:
+        env['CUSTOM_SEARCH_API_URL'] = servers['custom_search'].url + UPSTREAM_PATHS['custom_search']
+    if 'gemini' in servers:
+        env['GEMINI_API_ENDPOINT'] = servers['gemini'].url
+    if 'vision' in servers:
+        env['VISION_API_ENDPOINT'] = servers['vision'].url
+    return env
+
+def main():
+    parser = argparse.ArgumentParser(description='Serve fake Fact Check, Custom Search, Gemini and Vision APIs')
+    parser.add_argument('--host', default='127.0.0.1')
+    parser.add_argument('--port', type=int, default=8081, help='Port of the first upstream, the others follow')
+    for upstream in UPSTREAM_PATHS:
+        parser.add_argument(f"--{upstream.replace('_', '-')}", type=LatencyProfile.parse, default=LatencyProfile(),
+                            metavar='MEDIAN_MS[:P99_MS[:ERROR_RATE]]', help=f"Latency and error rate of {upstream}")
+    args = parser.parse_args()
+    
+    servers = {
+        upstream: FakeUpstreamServer(upstream, getattr(args, upstream), args.host, args.port + offset)
+        for offset, upstream in enumerate(UPSTREAM_PATHS)
+    }
+    for server in servers.values():
+        threading.Thread(target=server.serve_forever, daemon=True).start()
+    for name, value in backend_env(servers).items():
+        print(f"{name}={value}")
+    
+    try:
+        threading.Event().wait()
+    except KeyboardInterrupt:
+        pass
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,102 @@
+import argparse
+import base64
+import json
+import threading
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+# Local stand-in for the Cloud Vision images:annotate REST endpoint, so OCR can
+# be exercised offline: `python -m fakes.vision_server --port 8085`, then set
+# VISION_API_ENDPOINT=http://localhost:8085
+#
+# Images whose bytes are UTF-8 text are "read" as that text, any other image
+# reads as DEFAULT_TEXT, and empty images fail like undecodable ones do.
+
+DEFAULT_TEXT = "COVID-19 vaccines contain microchips to track people"
+
+def annotate(request):
+    """
+    Build the response for one AnnotateImageRequest
+    
+    Args:
+        request (dict): The decoded request
+        
+    Returns:
+        dict: The AnnotateImageResponse
+    """
+    content = base64.b64decode((request.get('image') or {}).get('content', ''))
+    if not content:
+        return {'error': {'code': 3, 'message': 'Bad image data.'}}
+    
+    try:
+        text = content.decode('utf-8')
+    except UnicodeDecodeError:
+        text = DEFAULT_TEXT
+    return {
+        'textAnnotations': [{'locale': 'en', 'description': text}],
+        'fullTextAnnotation': {'text': text}
+    }
+
+class FakeVisionHandler(BaseHTTPRequestHandler):
+    def do_POST(self):
+        if self.path.split('?')[0] != '/v1/images:annotate':
+            self._send(404, {'error': {'code': 404, 'message': f"Unknown path {self.path}"}})
+            return
+        
+        requests = json.loads(self.rfile.read(int(self.headers.get('Content-Length', 0)))).get('requests', [])
+        self.server.record(len(requests))
+        self._send(200, {'responses': [annotate(request) for request in requests]})
+    
+    def _send(self, status, payload):
+        body = json.dumps(payload).encode('utf-8')
+        self.send_response(status)
+        self.send_header('Content-Type', 'application/json')
+        self.send_header('Content-Length', str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+    
+    def log_message(self, format, *args):
+        # Keep test and load-test output quiet
+        pass
+
+class FakeVisionServer(ThreadingHTTPServer):
+    """
+    Fake Vision server that records the size of every batch it receives
+    
+    Use as a context manager to serve from a background thread on a free port.
+    """
+    daemon_threads = True
+    
+    def __init__(self, host='127.0.0.1', port=0):
+        super().__init__((host, port), FakeVisionHandler)
+        self.batch_sizes = []
+        self._lock = threading.Lock()
+    
+    @property
+    def url(self):
+        host, port = self.server_address[:2]
+        return f"http://{host}:{port}"
+    
+    def record(self, size):
+        with self._lock:
+            self.batch_sizes.append(size)
+    
+    def __enter__(self):
+        threading.Thread(target=self.serve_forever, name='fake-vision', daemon=True).start()
+        return self
+    
+    def __exit__(self, *exc_info):
+        self.shutdown()
+        self.server_close()
+
+def main():
+    parser = argparse.ArgumentParser(description='Serve a fake Cloud Vision API')
+    parser.add_argument('--host', default='127.0.0.1')
+    parser.add_argument('--port', type=int, default=8085)
+    args = parser.parse_args()
+    
+    server = FakeVisionServer(args.host, args.port)
+    print(f"Fake Vision API listening on {server.url}")
+    server.serve_forever()
+
+if __name__ == '__main__':
+    main()
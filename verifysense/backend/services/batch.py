@@ -0,0 +1,200 @@
+import os
+import threading
+from collections import OrderedDict
+from concurrent.futures import Future, ThreadPoolExecutor, FIRST_COMPLETED, wait
+from services.cache import normalize_claim
+from services.json_codec import loads
+from services.pipeline import verify_claims
+from services.rate_limit import BATCH, priority
+from services.config import load_env
+
+# Load environment variables
+load_env()
+
+# Number of batch items verified at once (upstream calls are further capped by
+# the pipeline's MAX_UPSTREAM_CALLS)
+BATCH_CONCURRENCY = int(os.getenv('BATCH_CONCURRENCY', '8'))
+
+# Maximum number of per-claim results remembered for deduplication within a batch
+BATCH_MEMO_SIZE = int(os.getenv('BATCH_MEMO_SIZE', '100000'))
+
+class ClaimMemo:
+    """
+    Bounded memo that runs each (stage, normalized claim) once per batch
+    
+    Later items with the same claim wait for the first call, in flight or
+    finished, instead of calling the upstream again.
+    """
+    def __init__(self, max_size=BATCH_MEMO_SIZE):
+        self.max_size = max_size
+        self._futures = OrderedDict()
+        self._lock = threading.Lock()
+        self.calls = 0
+        self.deduplicated = 0
+    
+    def call(self, stage, claim, func, *args):
+        key = (stage, normalize_claim(claim))
+        with self._lock:
+            future = self._futures.get(key)
+            if future is not None:
+                self._futures.move_to_end(key)
+                self.deduplicated += 1
+                owner = False
+            else:
+                future = self._futures[key] = Future()
+                self.calls += 1
+                owner = True
+                while len(self._futures) > self.max_size:
+                    self._futures.popitem(last=False)
+        
+        if owner:
+            try:
+                future.set_result(func(claim, *args))
+            except Exception as e:
+                future.set_exception(e)
+                # Let a later item retry a failed call
+                with self._lock:
+                    if self._futures.get(key) is future:
+                        del self._futures[key]
+        return future.result()
+    
+    def wrap(self, stage, func):
+        return lambda claim, *args: self.call(stage, claim, func, *args)
+
+def verify_items(items, extract_claims, check_facts, get_evidence, calculate_score, generate_explanation,
+                 extract_text_from_image=None, concurrency=BATCH_CONCURRENCY, memo=None):
+    """
+    Verify a stream of batch items with bounded concurrency
+    
+    Claims are deduplicated across the whole batch, and a failing item only
+    produces an error output for that item.
+    
+    Args:
+        items (iterable): Dicts with 'id', 'content' and optional 'input_type',
+            as produced by parse_jsonl
+        extract_claims (callable): Returns the claims in a piece of content
+        check_facts (callable): Returns fact checks for a claim
+        get_evidence (callable): Returns evidence items for a claim
+        calculate_score (callable): Scores a claim from its fact checks and evidence
+        generate_explanation (callable): Explains a scored claim
+        extract_text_from_image (callable): Returns the text in an image item
+        concurrency (int): Maximum number of items in progress
+        memo (ClaimMemo): Per-claim memo, shared across calls to resume a batch
+        
+    Yields:
+        dict: One output per item, in completion order
+    """
+    memo = memo or ClaimMemo()
+    stages = (
+        memo.wrap('fact_check', check_facts),
+        memo.wrap('evidence', get_evidence),
+        calculate_score,
+        # Identical claims have identical fact checks, evidence and score
+        memo.wrap('explanation', generate_explanation)
+    )
+    
+    def verify_item(item):
+        # Bulk work yields to interactive requests at the upstream rate limits
+        with priority(BATCH):
+            return verify_one(item)
+    
+    def verify_one(item):
+        item_id = item.get('id')
+        if 'error' in item:
+            return {'id': item_id, 'status': 'error', 'message': item['error']}
+        try:
+            content = item.get('content', '')
+            if item.get('input_type', 'text') == 'image' and content:
+                if extract_text_from_image is None:
+                    raise ValueError('Image items are not supported')
+                content = extract_text_from_image(content)
+            
+            claims = extract_claims(content)
+            if not claims:
+                return {
+                    'id': item_id,
+                    'status': 'error',
+                    'message': 'No claims could be extracted from the provided content'
+                }
+            
+            return {'id': item_id, 'status': 'success', 'results': verify_claims(claims, *stages)}
+        
+        except Exception as e:
+            print(f"Error verifying batch item {item_id}: {e}")
+            return {'id': item_id, 'status': 'error', 'message': str(e)}
+    
+    with ThreadPoolExecutor(max_workers=concurrency, thread_name_prefix='batch') as executor:
+        pending = set()
+        for item in items:
+            # Read input lazily so large batches are never held in memory
+            if len(pending) >= concurrency * 2:
+                done, pending = wait(pending, return_when=FIRST_COMPLETED)
+                for future in done:
+                    yield future.result()
+            pending.add(executor.submit(verify_item, item))
+        
+        while pending:
+            done, pending = wait(pending, return_when=FIRST_COMPLETED)
+            for future in done:
+                yield future.result()
+
+def parse_jsonl(lines):
+    """
+    Parse batch items from JSON Lines, assigning line numbers as missing IDs
+    
+    Args:
+        lines (iterable): Lines of JSON, one item per line
+        
+    Yields:
+        dict: Each item; unparseable lines yield an item with an 'error'
+    """
+    for number, line in enumerate(lines, 1):
+        line = line.strip()
+        if not line:
+            continue
+        try:
+            item = loads(line)
+            if not isinstance(item, dict):
+                raise ValueError('Each line must be a JSON object')
+        except ValueError as e:
+            yield {'id': number, 'error': f"Invalid JSON on line {number}: {e}"}
+            continue
+        item.setdefault('id', number)
+        yield item
+
+def load_checkpoint(output_path):
+    """
+    Collect the IDs already written to an output file so a batch can resume
+    
+    A trailing partial line left by a crash is truncated away. Unreadable
+    complete lines are logged and skipped, keeping the outputs after them.
+    Only successful outputs count, so items that failed are retried and
+    their new output is appended after the error.
+    
+    Args:
+        output_path (str): The JSONL output file
+        
+    Returns:
+        set: IDs of items that already have a successful output
+    """
+    done = set()
+    if not os.path.exists(output_path):
+        return done
+    
+    with open(output_path, 'rb+') as output:
+        valid_length = 0
+        for number, line in enumerate(output, 1):
+            # Only the last line can lack its newline
+            if not line.endswith(b'\n'):
+                output.truncate(valid_length)
+                break
+            valid_length += len(line)
+            if not line.strip():
+                continue
+            try:
+                result = loads(line)
+                if result.get('status') == 'success':
+                    done.add(result['id'])
+            except (ValueError, KeyError, AttributeError) as e:
+                print(f"Skipping unreadable line {number} of {output_path}: {e}")
+    return done
@@ -0,0 +1,428 @@
+import asyncio
+import functools
+import hashlib
+import json
+import os
+import re
+import sqlite3
+import threading
+import time
+import unicodedata
+from collections import OrderedDict
+from concurrent.futures import ThreadPoolExecutor
+from services.json_codec import EncodedList, dumps, loads
+from services.config import load_env
+from services.rate_limit import BATCH, priority
+from services.resilience import UPSTREAM_UNAVAILABLE
+
+# Load environment variables
+load_env()
+
+# Set CACHE_ENABLED=false to always call the upstream APIs
+CACHE_ENABLED = os.getenv('CACHE_ENABLED', 'true').lower() == 'true'
+
+# Maximum number of entries kept in the in-process tier
+CACHE_MAX_ENTRIES = int(os.getenv('CACHE_MAX_ENTRIES', '10000'))
+
+# Shared tier: 'none', 'sqlite' or 'firestore'
+CACHE_BACKEND = os.getenv('CACHE_BACKEND', 'none').lower()
+CACHE_SQLITE_PATH = os.getenv('CACHE_SQLITE_PATH', 'verifysense_cache.db')
+CACHE_FIRESTORE_COLLECTION = os.getenv('CACHE_FIRESTORE_COLLECTION', 'result_cache')
+
+# Time-to-live (seconds) per source - fact checks change slowly, search results faster
+CACHE_TTLS = {
+    'fact_check': int(os.getenv('FACT_CHECK_CACHE_TTL', str(6 * 60 * 60))),
+    'custom_search': int(os.getenv('CUSTOM_SEARCH_CACHE_TTL', str(60 * 60))),
+    # Text read from an image never changes
+    'ocr': int(os.getenv('OCR_CACHE_TTL', str(7 * 24 * 60 * 60))),
+    # Gemini responses, keyed by model and prompt
+    'llm': int(os.getenv('LLM_CACHE_TTL', str(24 * 60 * 60))),
+    # Deferred explanations, and what is needed to generate them
+    'explanation': int(os.getenv('EXPLANATION_CACHE_TTL', str(60 * 60))),
+    'explanation_inputs': int(os.getenv('EXPLANATION_HANDLE_TTL', str(60 * 60)))
+}
+DEFAULT_CACHE_TTL = int(os.getenv('DEFAULT_CACHE_TTL', '600'))
+
+# How long (seconds) past its TTL an entry may still be served while it refreshes
+CACHE_STALE_TTL = int(os.getenv('CACHE_STALE_TTL', str(24 * 60 * 60)))
+
+# Empty results are usually errors or missing keys, so keep them only briefly
+EMPTY_RESULT_TTL = int(os.getenv('EMPTY_RESULT_TTL', '60'))
+
+# Anything that is not a letter, digit or whitespace
+_PUNCTUATION = re.compile(r'[^\w\s]|_')
+
+def normalize_claim(text):
+    """
+    Normalize claim text for use as a cache key
+    
+    Casefolds the text, drops punctuation and collapses whitespace so that
+    trivially different submissions of the same claim share one entry.
+    
+    Args:
+        text (str): The claim text
+        
+    Returns:
+        str: The normalized claim
+    """
+    text = unicodedata.normalize('NFKC', text).casefold()
+    return ' '.join(_PUNCTUATION.sub(' ', text).split())
+
+class TTLCache:
+    """
+    In-process LRU cache whose entries carry a fresh and a stale deadline
+    """
+    def __init__(self, max_size=CACHE_MAX_ENTRIES):
+        self.max_size = max_size
+        self._entries = OrderedDict()
+        self._lock = threading.Lock()
+    
+    def get(self, key):
+        """
+        Returns:
+            tuple: (value, fresh_until, stale_until), or None if missing or expired
+        """
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None:
+                return None
+            if entry[2] <= time.time():
+                del self._entries[key]
+                return None
+            self._entries.move_to_end(key)
+            return entry
+    
+    def set(self, key, value, fresh_until, stale_until):
+        with self._lock:
+            self._entries[key] = (value, fresh_until, stale_until)
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_size:
+                self._entries.popitem(last=False)
+    
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+
+def _encode(value):
+    # Shared tiers store JSON text, reusing the encoding of cached result lists
+    return (value.json() if isinstance(value, EncodedList) else dumps(value)).decode('utf-8')
+
+def _decode(text):
+    # Keep the stored JSON so the result is not encoded again for responses
+    value = loads(text)
+    if isinstance(value, list):
+        return EncodedList(value, text.encode('utf-8'))
+    return value
+
+class SQLiteCache:
+    """
+    On-disk cache shared by every worker process on the host
+    """
+    def __init__(self, path=CACHE_SQLITE_PATH):
+        self._lock = threading.Lock()
+        self._conn = sqlite3.connect(path, check_same_thread=False)
+        self._conn.execute('PRAGMA journal_mode=WAL')
+        self._conn.execute(
+            'CREATE TABLE IF NOT EXISTS result_cache ('
+            'key TEXT PRIMARY KEY, value TEXT NOT NULL, '
+            'fresh_until REAL NOT NULL, stale_until REAL NOT NULL)'
+        )
+        self._conn.commit()
+    
+    def get(self, key):
+        with self._lock:
+            row = self._conn.execute(
+                'SELECT value, fresh_until, stale_until FROM result_cache WHERE key = ?',
+                (key,)
+            ).fetchone()
+        if row is None or row[2] <= time.time():
+            return None
+        return _decode(row[0]), row[1], row[2]
+    
+    def set(self, key, value, fresh_until, stale_until):
+        with self._lock:
+            self._conn.execute(
+                'INSERT OR REPLACE INTO result_cache (key, value, fresh_until, stale_until) VALUES (?, ?, ?, ?)',
+                (key, _encode(value), fresh_until, stale_until)
+            )
+            self._conn.commit()
+
+class FirestoreCache:
+    """
+    Firestore-backed cache shared by every instance of the service
+    """
+    def __init__(self, collection=CACHE_FIRESTORE_COLLECTION):
+        from google.cloud import firestore
+        client = firestore.Client(project=os.getenv('FIRESTORE_PROJECT_ID'))
+        self._collection = client.collection(collection)
+    
+    def _doc(self, key):
+        # Document IDs have length and character limits, so hash the key
+        return self._collection.document(hashlib.sha256(key.encode('utf-8')).hexdigest())
+    
+    def get(self, key):
+        snapshot = self._doc(key).get()
+        if not snapshot.exists:
+            return None
+        data = snapshot.to_dict()
+        if data['stale_until'] <= time.time():
+            return None
+        return _decode(data['value']), data['fresh_until'], data['stale_until']
+    
+    def set(self, key, value, fresh_until, stale_until):
+        self._doc(key).set({
+            'value': _encode(value),
+            'fresh_until': fresh_until,
+            'stale_until': stale_until
+        })
+
+class TieredCache:
+    """
+    Two-tier cache (in-process, then optional shared store) that serves stale
+    entries while refreshing them in the background
+    """
+    def __init__(self, local, shared=None):
+        self.local = local
+        self.shared = shared
+        self._refreshing = set()
+        self._refresh_lock = threading.Lock()
+        self._refresh_executor = ThreadPoolExecutor(max_workers=2, thread_name_prefix='cache-refresh')
+        # Refresh tasks on the event loop, kept so they are not garbage collected
+        self._refresh_tasks = set()
+        self._stats = {}
+        self._stats_lock = threading.Lock()
+    
+    def lookup(self, source, key):
+        """
+        Look a key up in each tier in turn
+        
+        Returns:
+            tuple: (value, is_stale), or None on a miss
+        """
+        entry = self.local.get(key)
+        if entry is None and self.shared is not None:
+            try:
+                entry = self.shared.get(key)
+            except Exception as e:
+                print(f"Error reading shared cache: {e}")
+                entry = None
+            if entry is not None:
+                self.local.set(key, *entry)
+        
+        if entry is None:
+            self._count(source, 'misses')
+            return None
+        
+        is_stale = entry[1] <= time.time()
+        self._count(source, 'stale_hits' if is_stale else 'hits')
+        return entry[0], is_stale
+    
+    def store(self, source, key, value):
+        """
+        Store a freshly fetched value in each tier
+        
+        Returns:
+            The value as cached, with lists wrapped in EncodedList
+        """
+        if isinstance(value, list):
+            value = EncodedList(value)
+        if value:
+            fresh_until = time.time() + CACHE_TTLS.get(source, DEFAULT_CACHE_TTL)
+            stale_until = fresh_until + CACHE_STALE_TTL
+        else:
+            # Never serve an empty result past its short TTL
+            fresh_until = stale_until = time.time() + EMPTY_RESULT_TTL
+        self.local.set(key, value, fresh_until, stale_until)
+        if self.shared is not None:
+            try:
+                self.shared.set(key, value, fresh_until, stale_until)
+            except Exception as e:
+                print(f"Error writing shared cache: {e}")
+        return value
+    
+    def get_or_fetch(self, source, key, fetch):
+        """
+        Return a cached value, fetching and storing it on a miss
+        
+        Args:
+            source (str): The upstream the value comes from, used to pick its TTL
+            key (str): The cache key
+            fetch (callable): Produces a fresh value
+            
+        Returns:
+            The cached or freshly fetched value
+        """
+        cached = self.lookup(source, key)
+        if cached is not None:
+            value, is_stale = cached
+            if is_stale and self._start_refresh(key):
+                self._refresh_executor.submit(self._refresh, source, key, fetch)
+            return value
+        
+        return self.store(source, key, fetch())
+    
+    async def get_or_fetch_async(self, source, key, fetch):
+        """
+        Async counterpart of get_or_fetch where fetch is a coroutine function
+        """
+        cached = self.lookup(source, key)
+        if cached is not None:
+            value, is_stale = cached
+            if is_stale and self._start_refresh(key):
+                task = asyncio.ensure_future(self._refresh_async(source, key, fetch))
+                self._refresh_tasks.add(task)
+                task.add_done_callback(self._refresh_tasks.discard)
+            return value
+        
+        return self.store(source, key, await fetch())
+    
+    def stats(self):
+        with self._stats_lock:
+            return {source: dict(counts) for source, counts in self._stats.items()}
+    
+    def _start_refresh(self, key):
+        # Only one background refresh per key at a time
+        with self._refresh_lock:
+            if key in self._refreshing:
+                return False
+            self._refreshing.add(key)
+            return True
+    
+    def _refresh(self, source, key, fetch):
+        try:
+            # Background refreshes yield to requests that are waiting on an upstream
+            with priority(BATCH):
+                self._store_refreshed(source, key, fetch())
+        except Exception as e:
+            print(f"Error refreshing cache entry: {e}")
+        finally:
+            with self._refresh_lock:
+                self._refreshing.discard(key)
+    
+    async def _refresh_async(self, source, key, fetch):
+        try:
+            with priority(BATCH):
+                self._store_refreshed(source, key, await fetch())
+        except Exception as e:
+            print(f"Error refreshing cache entry: {e}")
+        finally:
+            with self._refresh_lock:
+                self._refreshing.discard(key)
+    
+    def _store_refreshed(self, source, key, value):
+        # Only non-empty entries are served stale, and the services return an
+        # empty result when their upstream fails. Keep the stale entry rather
+        # than replace it with an outage's empty result
+        if not value:
+            print(f"Keeping stale {source} entry, the refresh returned nothing")
+            return
+        self.store(source, key, value)
+    
+    def _count(self, source, counter):
+        with self._stats_lock:
+            counts = self._stats.setdefault(source, {'hits': 0, 'stale_hits': 0, 'misses': 0})
+            counts[counter] += 1
+
+def _build_shared_tier():
+    try:
+        if CACHE_BACKEND == 'sqlite':
+            return SQLiteCache()
+        if CACHE_BACKEND == 'firestore':
+            return FirestoreCache()
+    except Exception as e:
+        print(f"Error initializing {CACHE_BACKEND} cache, using in-process cache only: {e}")
+    return None
+
+# Result cache shared by the fact check, evidence and OCR services
+result_cache = TieredCache(TTLCache(), _build_shared_tier())
+
+def cached(source):
+    """
+    Cache a service function's results by its normalized claim argument
+    
+    Works for both plain and coroutine functions. Any arguments after the
+    claim are made part of the key. When the upstream is out of quota, its
+    circuit is open or the deadline has passed, and nothing is cached, an
+    empty list is returned and not cached.
+    
+    The decorated function gets cache_source and cache_key(claim) attributes,
+    so callers can find its cached results without calling it.
+    
+    Args:
+        source (str): The upstream the results come from, used to pick the TTL
+        
+    Returns:
+        callable: The decorator
+    """
+    def make_key(claim, args, kwargs):
+        key = f"{source}:{normalize_claim(claim)}"
+        if args or kwargs:
+            key += ':' + json.dumps([args, kwargs], sort_keys=True)
+        return key
+    
+    def decorator(func):
+        if asyncio.iscoroutinefunction(func):
+            @functools.wraps(func)
+            async def async_wrapper(claim, *args, **kwargs):
+                try:
+                    if not CACHE_ENABLED:
+                        return await func(claim, *args, **kwargs)
+                    return await result_cache.get_or_fetch_async(
+                        source,
+                        make_key(claim, args, kwargs),
+                        lambda: func(claim, *args, **kwargs)
+                    )
+                except UPSTREAM_UNAVAILABLE as e:
+                    return _degraded(source, e)
+            async_wrapper.cache_source = source
+            async_wrapper.cache_key = lambda claim: make_key(claim, (), {})
+            return async_wrapper
+        
+        @functools.wraps(func)
+        def wrapper(claim, *args, **kwargs):
+            try:
+                if not CACHE_ENABLED:
+                    return func(claim, *args, **kwargs)
+                return result_cache.get_or_fetch(
+                    source,
+                    make_key(claim, args, kwargs),
+                    lambda: func(claim, *args, **kwargs)
+                )
+            except UPSTREAM_UNAVAILABLE as e:
+                return _degraded(source, e)
+        wrapper.cache_source = source
+        wrapper.cache_key = lambda claim: make_key(claim, (), {})
+        return wrapper
+    
+    return decorator
+
+def cached_result(source, key):
+    """
+    Read a fresh cached result without fetching it
+    
+    Args:
+        source (str): The upstream the result comes from
+        key (str): The cache key
+        
+    Returns:
+        The cached value, or None when it is missing, stale or caching is off
+    """
+    if not CACHE_ENABLED:
+        return None
+    entry = result_cache.lookup(source, key)
+    if entry is None or entry[1]:
+        return None
+    return entry[0]
+
+def _degraded(source, error):
+    print(f"Skipping {source} lookup: {error}")
+    return []
+
+def get_cache_stats():
+    """
+    Report cache hits, stale hits and misses per source
+    
+    Returns:
+        dict: Counters keyed by source
+    """
+    return result_cache.stats()
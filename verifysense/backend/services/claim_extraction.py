@@ -1,13 +1,22 @@
 import os
-import google.generativeai as genai
-from dotenv import load_dotenv
+import json
+import re
+from services.config import load_env
+from services.llm import generate, generate_async
+from services.metrics import record_error, timed
+from services.micro_batch import MicroBatcher
+from services.local_extraction import extract_claims_local, fast_path
+from services.resilience import UPSTREAM_UNAVAILABLE
 
 # Load environment variables
-load_dotenv()
+load_env()
 
-# Configure Gemini API
-genai.configure(api_key=os.getenv('GEMINI_API_KEY'))
+# Batched extraction sends up to CLAIM_BATCH_MAX_SIZE documents per Gemini call,
+# waiting at most CLAIM_BATCH_WINDOW_MS for a batch to fill
+CLAIM_BATCH_MAX_SIZE = int(os.getenv('CLAIM_BATCH_MAX_SIZE', '16'))
+CLAIM_BATCH_WINDOW_MS = int(os.getenv('CLAIM_BATCH_WINDOW_MS', '20'))
 
+@timed('extract_claims')
 def extract_claims(content):
     """
     Extract claims from the provided content using Gemini API
@@ -18,12 +27,172 @@ def extract_claims(content):
     Returns:
         list: A list of extracted claims
     """
+    # Simple inputs are handled locally without a Gemini round trip
+    claims = fast_path(content)
+    if claims is not None:
+        return claims
+    
+    return _extract_claims_llm(content)
+
+def _extract_claims_llm(content):
+    """
+    Extract claims from the provided content with a single Gemini call
+    
+    Args:
+        content (str): The text content to extract claims from
+        
+    Returns:
+        list: A list of extracted claims
+    """
+    try:
+        # Generate response
+        return _parse_claims(generate('claim_extraction', _build_prompt(content)))
+    
+    except UPSTREAM_UNAVAILABLE as e:
+        print(f"Extracting claims locally: {e}")
+        return _local_fallback(content)
+    
+    except Exception as e:
+        print(f"Error extracting claims: {e}")
+        record_error('extract_claims')
+        # Return the original content as a single claim if extraction fails
+        return [content] if content else []
+
+@timed('extract_claims')
+async def extract_claims_async(content):
+    """
+    Extract claims from the provided content using Gemini API without blocking a thread
+    
+    Args:
+        content (str): The text content to extract claims from
+        
+    Returns:
+        list: A list of extracted claims
+    """
+    # Simple inputs are handled locally without a Gemini round trip
+    claims = fast_path(content)
+    if claims is not None:
+        return claims
+    
     try:
-        # Initialize Gemini model
-        model = genai.GenerativeModel('gemini-1.5-pro')
+        # Generate response
+        return _parse_claims(await generate_async('claim_extraction', _build_prompt(content)))
+    
+    except UPSTREAM_UNAVAILABLE as e:
+        print(f"Extracting claims locally: {e}")
+        return _local_fallback(content)
+    
+    except Exception as e:
+        print(f"Error extracting claims: {e}")
+        record_error('extract_claims')
+        # Return the original content as a single claim if extraction fails
+        return [content] if content else []
+
+def extract_claims_batch(contents):
+    """
+    Extract claims from several documents with a single Gemini call
+    
+    Documents whose claims cannot be read from the batch response are
+    extracted with one Gemini call each.
+    
+    Args:
+        contents (list): The text contents to extract claims from
+        
+    Returns:
+        list: A list of extracted claims for each document, in order
+    """
+    # Send each distinct document once
+    documents = list(dict.fromkeys(content for content in contents if content.strip()))
+    claims_by_content = {}
+    
+    if len(documents) > 1:
+        try:
+            response_text = generate('claim_extraction_batch', _build_batch_prompt(documents))
+            claims_by_content = _parse_batch_claims(response_text, documents)
+        except UPSTREAM_UNAVAILABLE as e:
+            print(f"Extracting claims locally: {e}")
+            claims_by_content = {content: _local_fallback(content) for content in documents}
+        except Exception as e:
+            print(f"Error extracting claims in batch: {e}")
+            record_error('extract_claims')
+    
+    for content in documents:
+        if content not in claims_by_content:
+            claims_by_content[content] = _extract_claims_llm(content)
+    
+    return [claims_by_content.get(content, []) for content in contents]
+
+_batcher = MicroBatcher(extract_claims_batch, CLAIM_BATCH_MAX_SIZE, CLAIM_BATCH_WINDOW_MS / 1000)
+
+@timed('extract_claims')
+def extract_claims_batched(content):
+    """
+    Extract claims like extract_claims, sharing a Gemini call with other
+    documents submitted at about the same time
+    
+    Args:
+        content (str): The text content to extract claims from
+        
+    Returns:
+        list: A list of extracted claims
+    """
+    if not content.strip():
+        return []
+    
+    claims = fast_path(content)
+    if claims is not None:
+        return claims
+    
+    return _batcher.submit(content)
+
+@timed('extract_claims')
+async def extract_claims_batched_async(content):
+    """
+    Async counterpart of extract_claims_batched that waits for the batch
+    without blocking the event loop
+    """
+    if not content.strip():
+        return []
+    
+    claims = fast_path(content)
+    if claims is not None:
+        return claims
+    
+    return await _batcher.submit_async(content)
+
+def get_batching_stats():
+    """
+    Report how many batched Gemini calls were made for how many documents
+    
+    Returns:
+        dict: Batch and document counts
+    """
+    return _batcher.stats()
+
+def _local_fallback(content):
+    """
+    Extract claims without Gemini, whatever the local extractor's confidence
+    
+    Args:
+        content (str): The text content to extract claims from
         
-        # Prompt for claim extraction
-        prompt = f"""
+    Returns:
+        list: The local claims, or the whole content as one claim
+    """
+    claims, _ = extract_claims_local(content)
+    return claims or ([content.strip()] if content.strip() else [])
+
+def _build_prompt(content):
+    """
+    Build the claim extraction prompt for the given content
+    
+    Args:
+        content (str): The text content to extract claims from
+        
+    Returns:
+        str: The prompt to send to Gemini
+    """
+    return f"""
         Extract the main factual claims from the following text. 
         A factual claim is a statement that can be verified as true or false.
         Focus only on objective, verifiable assertions, not opinions or subjective statements.
@@ -31,29 +200,82 @@ def extract_claims(content):
         
         Text: {content}
         """
+
+def _build_batch_prompt(documents):
+    """
+    Build a claim extraction prompt covering several documents
+    
+    Args:
+        documents (list): The text contents, identified by their position
         
-        # Generate response
-        response = model.generate_content(prompt)
-        
-        # Process response to extract claims
-        claims_text = response.text.strip()
-        
-        # Parse numbered list into separate claims
-        claims = []
-        for line in claims_text.split('\n'):
-            # Remove numbering and whitespace
-            if line.strip() and any(c.isdigit() for c in line[:2]):
-                claim = line.split('.', 1)[-1].strip()
-                if claim:
-                    claims.append(claim)
-        
-        # If parsing failed, just return the whole text as one claim
-        if not claims and claims_text:
-            claims = [claims_text]
-            
-        return claims
+    Returns:
+        str: The prompt to send to Gemini
+    """
+    numbered = "\n".join(
+        json.dumps({'id': str(number), 'text': text}) for number, text in enumerate(documents, 1)
+    )
+    return f"""
+        Extract the main factual claims from each of the following documents.
+        A factual claim is a statement that can be verified as true or false.
+        Focus only on objective, verifiable assertions, not opinions or subjective statements.
+        Each claim should be concise and focused on a single fact.
+        Documents are given one per line as JSON objects with an "id" and a "text".
+        Respond with only a JSON object mapping every document id to its list of claims,
+        for example {{"1": ["claim", "claim"], "2": []}}.
+        
+        Documents:
+        {numbered}
+        """
+
+def _parse_batch_claims(response_text, documents):
+    """
+    Demultiplex a batch response into the claims for each document
     
-    except Exception as e:
-        print(f"Error extracting claims: {e}")
-        # Return the original content as a single claim if extraction fails
-        return [content] if content else []
\ No newline at end of file
+    Args:
+        response_text (str): The raw model output
+        documents (list): The documents the prompt was built from
+        
+    Returns:
+        dict: Claims keyed by document content, for the documents the response
+        covers correctly
+    """
+    # Models often wrap JSON in a markdown code fence
+    match = re.search(r'\{.*\}', response_text, re.DOTALL)
+    claims_by_id = json.loads(match.group(0)) if match else {}
+    if not isinstance(claims_by_id, dict):
+        return {}
+    
+    claims_by_content = {}
+    for number, content in enumerate(documents, 1):
+        claims = claims_by_id.get(str(number))
+        if isinstance(claims, list) and all(isinstance(claim, str) for claim in claims):
+            claims_by_content[content] = [claim.strip() for claim in claims if claim.strip()]
+    return claims_by_content
+
+def _parse_claims(response_text):
+    """
+    Parse the numbered list returned by Gemini into separate claims
+    
+    Args:
+        response_text (str): The raw model output
+        
+    Returns:
+        list: A list of extracted claims
+    """
+    # Process response to extract claims
+    claims_text = response_text.strip()
+    
+    # Parse numbered list into separate claims
+    claims = []
+    for line in claims_text.split('\n'):
+        # Remove numbering and whitespace
+        if line.strip() and any(c.isdigit() for c in line[:2]):
+            claim = line.split('.', 1)[-1].strip()
+            if claim:
+                claims.append(claim)
+    
+    # If parsing failed, just return the whole text as one claim
+    if not claims and claims_text:
+        claims = [claims_text]
+    
+    return claims
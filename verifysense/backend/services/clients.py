@@ -0,0 +1,129 @@
+import asyncio
+import os
+import threading
+import time
+from services.config import load_env
+
+# Load environment variables
+load_env()
+
+# Clients to build ahead of the first request: a comma-separated list of
+# names, 'all', or empty for none
+WARM_UP_CLIENTS = os.getenv('WARM_UP_CLIENTS', '')
+
+# Send Gemini requests to another endpoint over REST, such as fakes/upstreams.py
+GEMINI_API_ENDPOINT = os.getenv('GEMINI_API_ENDPOINT')
+
+# How to build each client, and the clients built so far with their build time
+_factories = {}
+_clients = {}
+_build_seconds = {}
+
+# Reentrant, since building a model first builds the SDK it comes from
+_lock = threading.RLock()
+
+def register(name, factory):
+    """
+    Register how to build a client
+    
+    Nothing is imported or built until the client is first requested, so a
+    process only pays for the SDKs its requests actually use.
+    
+    Args:
+        name (str): The client name
+        factory (callable): Builds the client; SDK imports belong inside it
+    """
+    _factories[name] = factory
+
+def get_client(name):
+    """
+    Get a client, building it on first use
+    
+    Args:
+        name (str): The registered client name
+        
+    Returns:
+        The one instance of the client for this process
+    """
+    client = _clients.get(name)
+    if client is None:
+        with _lock:
+            client = _clients.get(name)
+            if client is None:
+                start = time.perf_counter()
+                client = _factories[name]()
+                _build_seconds[name] = time.perf_counter() - start
+                _clients[name] = client
+    return client
+
+def warm_up(names=None):
+    """
+    Build clients ahead of the first request, for example from a startup probe
+    
+    Args:
+        names (list): The clients to build, WARM_UP_CLIENTS by default
+        
+    Returns:
+        dict: Build time in milliseconds, or the error, per client
+    """
+    if names is None:
+        if WARM_UP_CLIENTS == 'all':
+            names = list(_factories)
+        else:
+            names = [name.strip() for name in WARM_UP_CLIENTS.split(',') if name.strip()]
+    
+    results = {}
+    for name in names:
+        try:
+            get_client(name)
+            results[name] = round(_build_seconds.get(name, 0) * 1000, 1)
+        except Exception as e:
+            print(f"Error warming up {name} client: {e}")
+            results[name] = f"error: {e}"
+    return results
+
+def get_client_stats():
+    """
+    Report which clients are registered and which have been built
+    
+    Returns:
+        dict: The registered names and the build time in milliseconds of each built client
+    """
+    with _lock:
+        return {
+            'registered': sorted(_factories),
+            'built': {name: round(seconds * 1000, 1) for name, seconds in _build_seconds.items()}
+        }
+
+def _configure_gemini():
+    # Importing the Gemini SDK takes over a second, so it waits for first use
+    import google.generativeai as genai
+    if GEMINI_API_ENDPOINT:
+        genai.configure(
+            api_key=os.getenv('GEMINI_API_KEY'),
+            transport='rest',
+            client_options={'api_endpoint': GEMINI_API_ENDPOINT}
+        )
+    else:
+        genai.configure(api_key=os.getenv('GEMINI_API_KEY'))
+    return genai
+
+register('gemini', _configure_gemini)
+
+async def generate_content_async(model, prompt):
+    """
+    Generate content with a Gemini model without blocking the event loop
+    
+    The SDK only has async calls over gRPC, so with GEMINI_API_ENDPOINT (REST)
+    the blocking call runs on a worker thread instead.
+    
+    Args:
+        model (GenerativeModel): The model to call
+        prompt (str): The prompt
+        
+    Returns:
+        GenerateContentResponse: The model's response
+    """
+    if GEMINI_API_ENDPOINT:
+        return await asyncio.to_thread(model.generate_content, prompt)
+    return await model.generate_content_async(prompt)
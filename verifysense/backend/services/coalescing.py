@@ -0,0 +1,137 @@
+import asyncio
+import functools
+import threading
+from services.cache import normalize_claim
+
+class _Call:
+    """
+    An upstream call in flight that other callers can wait on
+    """
+    def __init__(self):
+        self.done = threading.Event()
+        self.result = None
+        self.error = None
+
+class SingleFlight:
+    """
+    Collapse concurrent calls with the same key into one upstream call
+    
+    The first caller for a key runs the call; callers arriving while it is in
+    flight wait for it and receive the same result (or exception).
+    """
+    def __init__(self):
+        self._calls = {}
+        self._async_calls = {}
+        self._lock = threading.Lock()
+        self.calls = 0
+        self.deduplicated = 0
+    
+    def do(self, key, func, *args, **kwargs):
+        """
+        Run func once per key among concurrent callers
+        
+        Args:
+            key (str): Identifies equivalent calls
+            func (callable): The call to make
+            
+        Returns:
+            The result of the shared call
+        """
+        with self._lock:
+            call = self._calls.get(key)
+            if call is not None:
+                self.deduplicated += 1
+                leader = False
+            else:
+                call = self._calls[key] = _Call()
+                self.calls += 1
+                leader = True
+        
+        if not leader:
+            call.done.wait()
+        else:
+            try:
+                call.result = func(*args, **kwargs)
+            except Exception as e:
+                call.error = e
+            finally:
+                with self._lock:
+                    del self._calls[key]
+                call.done.set()
+        
+        if call.error is not None:
+            raise call.error
+        return call.result
+    
+    async def do_async(self, key, func, *args, **kwargs):
+        """
+        Await the coroutine function once per key among concurrent callers on an event loop
+        
+        Args:
+            key (str): Identifies equivalent calls
+            func (callable): The coroutine function to call
+            
+        Returns:
+            The result of the shared call
+        """
+        # Futures belong to one event loop, so keys are scoped per loop
+        loop_key = (asyncio.get_running_loop(), key)
+        future = self._async_calls.get(loop_key)
+        if future is not None:
+            with self._lock:
+                self.deduplicated += 1
+            return await asyncio.shield(future)
+        
+        future = self._async_calls[loop_key] = asyncio.ensure_future(func(*args, **kwargs))
+        with self._lock:
+            self.calls += 1
+        try:
+            return await asyncio.shield(future)
+        finally:
+            if self._async_calls.get(loop_key) is future:
+                del self._async_calls[loop_key]
+    
+    def stats(self):
+        with self._lock:
+            return {'calls': self.calls, 'deduplicated': self.deduplicated}
+
+# One group per upstream call site, so stats are reported separately
+_groups = {}
+
+def coalesced(name):
+    """
+    Share one in-flight call among concurrent callers with the same normalized
+    first argument (content or claim)
+    
+    Works for both plain and coroutine functions.
+    
+    Args:
+        name (str): The name the group's counters are reported under
+        
+    Returns:
+        callable: The decorator
+    """
+    group = _groups.setdefault(name, SingleFlight())
+    
+    def decorator(func):
+        if asyncio.iscoroutinefunction(func):
+            @functools.wraps(func)
+            async def async_wrapper(text, *args, **kwargs):
+                return await group.do_async(normalize_claim(text), func, text, *args, **kwargs)
+            return async_wrapper
+        
+        @functools.wraps(func)
+        def wrapper(text, *args, **kwargs):
+            return group.do(normalize_claim(text), func, text, *args, **kwargs)
+        return wrapper
+    
+    return decorator
+
+def get_coalescing_stats():
+    """
+    Report how many upstream calls were made and how many were deduplicated
+    
+    Returns:
+        dict: Counters keyed by group name
+    """
+    return {name: group.stats() for name, group in _groups.items()}
@@ -0,0 +1,18 @@
+import threading
+from dotenv import load_dotenv
+
+_loaded = False
+_lock = threading.Lock()
+
+def load_env():
+    """
+    Load variables from .env into the environment, once per process
+    
+    Every module that reads settings at import time calls this first, so the
+    file is found and parsed only by whichever module is imported first.
+    """
+    global _loaded
+    with _lock:
+        if not _loaded:
+            load_dotenv()
+            _loaded = True
@@ -0,0 +1,221 @@
+import asyncio
+import hashlib
+import os
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from services import cache
+from services.coalescing import SingleFlight
+from services.explainability import FallbackExplanation
+from services.config import load_env
+from services.json_codec import dumps
+from services.metrics import request_timings
+from services.rate_limit import BATCH, priority
+from services.resilience import deadline
+
+# Load environment variables
+load_env()
+
+# Set DEFER_EXPLANATIONS=true to answer /api/verify with explanation handles
+# by default. Requests can choose with a "defer_explanations" field. Handles
+# are only given out with a shared cache tier (CACHE_BACKEND), so that any
+# worker can answer them
+DEFER_EXPLANATIONS = os.getenv('DEFER_EXPLANATIONS', 'false').lower() == 'true'
+
+# Generate the first claim's explanation in the background, since the
+# results page shows it straight away. Results are not reordered by score,
+# so the first claim is the only one the page ranks above the others
+EXPLANATION_PREFETCH = os.getenv('EXPLANATION_PREFETCH', 'true').lower() == 'true'
+EXPLANATION_PREFETCH_WORKERS = int(os.getenv('EXPLANATION_PREFETCH_WORKERS', '2'))
+
+_prefetch_executor = ThreadPoolExecutor(
+    max_workers=EXPLANATION_PREFETCH_WORKERS,
+    thread_name_prefix='explanation-prefetch'
+)
+
+# Prefetch tasks on the event loop, kept so they are not garbage collected
+_prefetch_tasks = set()
+
+# A prefetch and a request for the same handle share one explanation call
+_in_flight = SingleFlight()
+
+_stats = {'deferred': 0, 'explained': 0, 'prefetched': 0, 'not_found': 0}
+_stats_lock = threading.Lock()
+
+def wants_deferred(data):
+    """
+    Check whether a verification request asked for explanation handles
+    
+    Without a shared cache tier the handle inputs would only be kept by
+    this worker, so explanations are then always generated inline.
+    
+    Args:
+        data (dict): The request data, from JSON or a form
+    """
+    if cache.result_cache.shared is None:
+        return False
+    flag = data.get('defer_explanations')
+    if flag is None:
+        return DEFER_EXPLANATIONS
+    if isinstance(flag, str):
+        return flag.lower() in ('1', 'true', 'yes')
+    return bool(flag)
+
+def defer_explanation(claim, fact_checks, evidence, score):
+    """
+    Stand-in for generate_explanation that stores what the explanation needs
+    and returns a handle to it
+    
+    The handle id is a hash of the inputs, so identical results share one
+    explanation.
+    
+    Args:
+        claim (str): The claim being evaluated
+        fact_checks (list): List of fact check results
+        evidence (list): List of evidence items
+        score (dict): Score information including numerical score and confidence label
+        
+    Returns:
+        dict: The handle, with the id and the URL to fetch the explanation from
+    """
+    inputs = {'claim': claim, 'fact_checks': fact_checks, 'evidence': evidence, 'score': score}
+    explanation_id = hashlib.sha256(dumps(inputs)).hexdigest()[:32]
+    # Stored whether or not caching is enabled, as the handle cannot be used without it
+    cache.result_cache.store('explanation_inputs', f'explanation_inputs:{explanation_id}', inputs)
+    _count('deferred')
+    return {'id': explanation_id, 'status': 'deferred', 'url': f'/api/explain/{explanation_id}'}
+
+async def defer_explanation_async(claim, fact_checks, evidence, score):
+    """
+    Coroutine form of defer_explanation for the async pipeline
+    """
+    return defer_explanation(claim, fact_checks, evidence, score)
+
+def explain(explanation_id, generate_explanation):
+    """
+    Generate the explanation behind a handle, or read it from the cache
+    
+    Args:
+        explanation_id (str): The id from a deferred explanation handle
+        generate_explanation (callable): Explains a scored claim
+        
+    Returns:
+        dict: Explanation with summary and steps, or None for an unknown or expired id
+    """
+    inputs = _load_inputs(explanation_id)
+    if inputs is None:
+        return None
+    
+    def run():
+        key = f'explanation:{explanation_id}'
+        explanation = cache.cached_result('explanation', key)
+        if explanation is None:
+            explanation = generate_explanation(**inputs)
+            _store(key, explanation)
+        return explanation
+    
+    _count('explained')
+    return _in_flight.do(explanation_id, run)
+
+async def explain_async(explanation_id, generate_explanation):
+    """
+    Async counterpart of explain where generate_explanation is a coroutine function
+    """
+    inputs = _load_inputs(explanation_id)
+    if inputs is None:
+        return None
+    
+    async def run():
+        key = f'explanation:{explanation_id}'
+        explanation = cache.cached_result('explanation', key)
+        if explanation is None:
+            explanation = await generate_explanation(**inputs)
+            _store(key, explanation)
+        return explanation
+    
+    _count('explained')
+    return await _in_flight.do_async(explanation_id, run)
+
+def prefetch(results, generate_explanation):
+    """
+    Start generating the first claim's explanation on a background thread
+    
+    Args:
+        results (list): The ClaimResults returned for the request
+        generate_explanation (callable): Explains a scored claim
+    """
+    explanation_id = _first_handle(results)
+    if explanation_id is not None:
+        _prefetch_executor.submit(_prefetch, explanation_id, generate_explanation)
+
+def prefetch_async(results, generate_explanation):
+    """
+    Start generating the first claim's explanation as a task on the running event loop
+    
+    Args:
+        results (list): The ClaimResults returned for the request
+        generate_explanation (callable): Coroutine function explaining a scored claim
+    """
+    explanation_id = _first_handle(results)
+    if explanation_id is not None:
+        task = asyncio.ensure_future(_prefetch_async(explanation_id, generate_explanation))
+        _prefetch_tasks.add(task)
+        task.add_done_callback(_prefetch_tasks.discard)
+
+def get_deferred_stats():
+    """
+    Report how many handles were issued, explained, prefetched and not found
+    
+    Returns:
+        dict: The counters
+    """
+    with _stats_lock:
+        stats = dict(_stats)
+    stats['deduplicated'] = _in_flight.stats()['deduplicated']
+    return stats
+
+def _first_handle(results):
+    # ResultsPage opens on results[0], the first claim extracted, rather than
+    # the best or worst scored one
+    if not EXPLANATION_PREFETCH or not results:
+        return None
+    explanation = results[0].explanation
+    if isinstance(explanation, dict) and explanation.get('status') == 'deferred':
+        return explanation['id']
+    return None
+
+def _prefetch(explanation_id, generate_explanation):
+    try:
+        # Prefetches yield to requests that are waiting on an upstream, with a
+        # time budget of their own
+        with priority(BATCH), deadline():
+            explain(explanation_id, generate_explanation)
+        _count('prefetched')
+    except Exception as e:
+        print(f"Error prefetching explanation: {e}")
+
+async def _prefetch_async(explanation_id, generate_explanation):
+    try:
+        # The task starts in a copy of the request's context, so replace its
+        # deadline and keep its calls out of the request's timings
+        with request_timings(False), priority(BATCH), deadline():
+            await explain_async(explanation_id, generate_explanation)
+        _count('prefetched')
+    except Exception as e:
+        print(f"Error prefetching explanation: {e}")
+
+def _load_inputs(explanation_id):
+    entry = cache.result_cache.lookup('explanation_inputs', f'explanation_inputs:{explanation_id}')
+    if entry is None:
+        _count('not_found')
+        return None
+    return entry[0]
+
+def _store(key, explanation):
+    # The generic fallback is not cached, so the next request for the handle
+    # tries Gemini again
+    if cache.CACHE_ENABLED and not isinstance(explanation, FallbackExplanation):
+        cache.result_cache.store('explanation', key, explanation)
+
+def _count(counter):
+    with _stats_lock:
+        _stats[counter] += 1
@@ -0,0 +1,160 @@
+import os
+import threading
+import time
+from collections import namedtuple
+from urllib.parse import urlparse
+from services.config import load_env
+
+# Load environment variables
+load_env()
+
+_BACKEND_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+# Rated domains, one "domain,tier" or "domain,score" per line. A relative path
+# is relative to the backend directory, wherever the process starts from
+DOMAIN_RELIABILITY_FILE = os.path.join(
+    _BACKEND_DIR,
+    os.getenv('DOMAIN_RELIABILITY_FILE', os.path.join('data', 'domain_reliability.csv'))
+)
+
+# How often (seconds) the file is checked for changes
+DOMAIN_RELIABILITY_RELOAD_SECONDS = float(os.getenv('DOMAIN_RELIABILITY_RELOAD_SECONDS', '30'))
+
+# Score for each tier, and the lowest score that still counts as each tier
+TIER_SCORES = {'high': 80, 'medium': 50, 'low': 30}
+TIER_THRESHOLDS = (('high', 70), ('medium', 45), ('low', 0))
+
+Reliability = namedtuple('Reliability', ['tier', 'score'])
+
+# Domains that are not in the file
+UNRATED = Reliability('medium', TIER_SCORES['medium'])
+
+def parse_ratings(lines):
+    """
+    Parse rated domains from the reliability file format
+    
+    Args:
+        lines (iterable): Lines of "domain,tier" or "domain,score"
+        
+    Returns:
+        dict: Reliability keyed by domain
+    """
+    ratings = {}
+    for line in lines:
+        line = line.split('#', 1)[0].strip()
+        if not line:
+            continue
+        try:
+            domain, grade = (part.strip() for part in line.split(','))
+            grade = grade.lower()
+            if grade in TIER_SCORES:
+                reliability = Reliability(grade, TIER_SCORES[grade])
+            else:
+                score = max(0, min(100, int(grade)))
+                tier = next(tier for tier, threshold in TIER_THRESHOLDS if score >= threshold)
+                reliability = Reliability(tier, score)
+        except ValueError:
+            print(f"Warning: skipping invalid domain reliability entry: {line}")
+            continue
+        ratings[_normalize_host(domain)] = reliability
+    return ratings
+
+def _normalize_host(host):
+    host = host.strip().lower().rstrip('.')
+    if host.startswith('www.'):
+        host = host[4:]
+    return host
+
+class ReliabilityIndex:
+    """
+    Subdomain-aware lookup of domain reliability
+    
+    Rated domains are kept in a hashed suffix set, so a lookup tries each
+    suffix of the host from the most specific one down, costing one dict
+    lookup per label. The file is reloaded when it changes on disk.
+    """
+    def __init__(self, path=DOMAIN_RELIABILITY_FILE, reload_seconds=DOMAIN_RELIABILITY_RELOAD_SECONDS):
+        self.path = path
+        self.reload_seconds = reload_seconds
+        self._ratings = {}
+        self._mtime = None
+        self._next_check = 0
+        self._lock = threading.Lock()
+        self.reload()
+    
+    def __len__(self):
+        return len(self._ratings)
+    
+    def reload(self):
+        """
+        Load the file if it changed since the last load
+        
+        Returns:
+            bool: True if the ratings were (re)loaded
+        """
+        try:
+            mtime = os.stat(self.path).st_mtime_ns
+        except OSError as e:
+            if self._mtime is None:
+                print(f"Warning: cannot read domain reliability file, rating every domain {UNRATED.tier}: {e}")
+            else:
+                print(f"Warning: cannot read domain reliability file, keeping the last ratings: {e}")
+            return False
+        if mtime == self._mtime:
+            return False
+        
+        with open(self.path, encoding='utf-8') as ratings_file:
+            ratings = parse_ratings(ratings_file)
+        # Swap in the new table in one assignment so lookups never see a partial load
+        self._ratings = ratings
+        self._mtime = mtime
+        return True
+    
+    def _maybe_reload(self):
+        now = time.monotonic()
+        if now < self._next_check:
+            return
+        with self._lock:
+            if now < self._next_check:
+                return
+            self._next_check = now + self.reload_seconds
+            self.reload()
+    
+    def lookup(self, domain):
+        """
+        Find the reliability of a domain or any of its parent domains
+        
+        Args:
+            domain (str): The host name, e.g. "edition.cnn.com"
+            
+        Returns:
+            Reliability: The most specific rating, or UNRATED
+        """
+        self._maybe_reload()
+        ratings = self._ratings
+        labels = _normalize_host(domain).split('.')
+        for start in range(len(labels)):
+            reliability = ratings.get('.'.join(labels[start:]))
+            if reliability is not None:
+                return reliability
+        return UNRATED
+
+def extract_domain(url):
+    """
+    Extract the host name from a URL
+    
+    Args:
+        url (str): The URL to extract the domain from
+        
+    Returns:
+        str: The lowercased host without "www." or a port
+    """
+    try:
+        # URLs without a scheme are parsed as a path, so give them an empty one
+        parsed = urlparse(url if '//' in url else f"//{url}")
+        return _normalize_host(parsed.hostname or '')
+    except ValueError:
+        return ''
+
+# Index shared by all requests handled by this process
+reliability_index = ReliabilityIndex()
@@ -1,37 +1,20 @@
 import os
-import requests
-from dotenv import load_dotenv
+from services.config import load_env
+from services.http_client import http_get, http_get_async
+from services.cache import cached
+from services.metrics import record_error, timed
+from services.resilience import UPSTREAM_UNAVAILABLE
+from services.models import EvidenceItem
 
 # Load environment variables
-load_dotenv()
+load_env()
 
-# Google Custom Search API endpoint
-SEARCH_API_URL = "https://www.googleapis.com/customsearch/v1"
-
-# List of trusted news sources for better evidence quality
-TRUSTED_DOMAINS = [
-    'reuters.com',
-    'apnews.com',
-    'bbc.com',
-    'bbc.co.uk',
-    'npr.org',
-    'nytimes.com',
-    'washingtonpost.com',
-    'wsj.com',
-    'economist.com',
-    'theguardian.com',
-    'cnn.com',
-    'nbcnews.com',
-    'cbsnews.com',
-    'abcnews.go.com',
-    'politifact.com',
-    'factcheck.org',
-    'snopes.com',
-    'usatoday.com',
-    'time.com',
-    'theatlantic.com'
-]
+# Google Custom Search API endpoint, overridable to point at a stand-in
+# such as fakes/upstreams.py
+SEARCH_API_URL = os.getenv('CUSTOM_SEARCH_API_URL', "https://www.googleapis.com/customsearch/v1")
 
+@timed('evidence')
+@cached('custom_search')
 def get_evidence(claim, max_results=5):
     """
     Retrieve evidence for a claim using Google's Custom Search JSON API
@@ -44,75 +27,105 @@ def get_evidence(claim, max_results=5):
         list: A list of evidence items
     """
     try:
-        # Get API key and search engine ID from environment variables
-        api_key = os.getenv('CUSTOM_SEARCH_API_KEY')
-        search_engine_id = os.getenv('SEARCH_ENGINE_ID')
+        params = _build_params(claim, max_results)
+        if params is None:
+            return []
+        
+        # Make the API request on the pooled session for this upstream
+        response = http_get('custom_search', SEARCH_API_URL, params=params)
         
-        if not api_key or not search_engine_id:
-            print("Warning: CUSTOM_SEARCH_API_KEY or SEARCH_ENGINE_ID not found in environment variables")
+        # Check if the request was successful
+        if response.status_code == 200:
+            return parse_evidence(response.json())
+        else:
+            print(f"Error: Custom Search API returned status code {response.status_code}")
+            print(f"Response: {response.text}")
+            record_error('evidence')
             return []
+    
+    except UPSTREAM_UNAVAILABLE:
+        # Let the cache serve a stale result or an uncached empty one
+        raise
+    
+    except Exception as e:
+        print(f"Error retrieving evidence: {e}")
+        record_error('evidence')
+        return []
+
+@timed('evidence')
+@cached('custom_search')
+async def get_evidence_async(claim, max_results=5):
+    """
+    Retrieve evidence for a claim using Google's Custom Search JSON API without blocking a thread
+    
+    Args:
+        claim (str): The claim to search for evidence
+        max_results (int): Maximum number of results to return
         
-        # Prepare parameters for the API request
-        params = {
-            'key': api_key,
-            'cx': search_engine_id,
-            'q': claim,
-            'num': max_results
-        }
+    Returns:
+        list: A list of evidence items
+    """
+    try:
+        params = _build_params(claim, max_results)
+        if params is None:
+            return []
         
-        # Make the API request
-        response = requests.get(SEARCH_API_URL, params=params)
+        # Make the API request on the shared async client
+        response = await http_get_async('custom_search', SEARCH_API_URL, params=params)
         
         # Check if the request was successful
         if response.status_code == 200:
-            data = response.json()
-            
-            # Extract relevant information from the response
-            evidence = []
-            if 'items' in data:
-                for item in data['items']:
-                    # Determine source reliability based on domain
-                    domain = extract_domain(item.get('link', ''))
-                    reliability = 'high' if domain in TRUSTED_DOMAINS else 'medium'
-                    
-                    evidence_item = {
-                        'title': item.get('title', ''),
-                        'snippet': item.get('snippet', ''),
-                        'link': item.get('link', ''),
-                        'source': domain,
-                        'reliability': reliability,
-                        'date': item.get('pagemap', {}).get('metatags', [{}])[0].get('article:published_time', '')
-                    }
-                    evidence.append(evidence_item)
-            
-            return evidence
+            return parse_evidence(response.json())
         else:
             print(f"Error: Custom Search API returned status code {response.status_code}")
             print(f"Response: {response.text}")
+            record_error('evidence')
             return []
     
+    except UPSTREAM_UNAVAILABLE:
+        # Let the cache serve a stale result or an uncached empty one
+        raise
+    
     except Exception as e:
         print(f"Error retrieving evidence: {e}")
+        record_error('evidence')
         return []
 
-def extract_domain(url):
+def _build_params(claim, max_results):
     """
-    Extract domain name from a URL
+    Build the Custom Search API query parameters for a claim
     
     Args:
-        url (str): The URL to extract domain from
+        claim (str): The claim to search for evidence
+        max_results (int): Maximum number of results to return
         
     Returns:
-        str: The extracted domain name
+        dict: The query parameters, or None if credentials are missing
     """
-    try:
-        # Remove protocol (http://, https://) and get the domain
-        domain = url.split('//')[1].split('/')[0]
+    # Get API key and search engine ID from environment variables
+    api_key = os.getenv('CUSTOM_SEARCH_API_KEY')
+    search_engine_id = os.getenv('SEARCH_ENGINE_ID')
+    
+    if not api_key or not search_engine_id:
+        print("Warning: CUSTOM_SEARCH_API_KEY or SEARCH_ENGINE_ID not found in environment variables")
+        return None
+    
+    return {
+        'key': api_key,
+        'cx': search_engine_id,
+        'q': claim,
+        'num': max_results
+    }
+
+def parse_evidence(data):
+    """
+    Convert a Custom Search API response into evidence items
+    
+    Args:
+        data (dict): The decoded JSON response
         
-        # Remove 'www.' if present
-        if domain.startswith('www.'):
-            domain = domain[4:]
-            
-        return domain
-    except:
-        return url
\ No newline at end of file
+    Returns:
+        list: A list of EvidenceItem results
+    """
+    # Build each item in one pass over its search result
+    return [EvidenceItem.from_api(item) for item in data.get('items', [])]
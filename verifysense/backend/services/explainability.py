@@ -1,13 +1,20 @@
-import os
-import google.generativeai as genai
-from dotenv import load_dotenv
+from services.config import load_env
+from services.llm import generate, generate_async
+from services.metrics import record_error, timed
+from services.resilience import EXPLANATION_MIN_BUDGET_SECONDS, has_budget
 
 # Load environment variables
-load_dotenv()
+load_env()
 
-# Configure Gemini API
-genai.configure(api_key=os.getenv('GEMINI_API_KEY'))
+class FallbackExplanation(dict):
+    """
+    The generic explanation given when Gemini could not be used
+    
+    It serializes like any other explanation. The type lets callers that
+    keep explanations tell it apart, so it is never cached.
+    """
 
+@timed('explanation')
 def generate_explanation(claim, fact_checks, evidence, score):
     """
     Generate a human-readable explanation of the verification process using Gemini API
@@ -21,33 +28,88 @@ def generate_explanation(claim, fact_checks, evidence, score):
     Returns:
         dict: Explanation with summary and steps
     """
+    # Not enough of the request's time budget is left for a Gemini round trip
+    if not has_budget(EXPLANATION_MIN_BUDGET_SECONDS):
+        return _default_explanation(score)
+    
     try:
-        # Initialize Gemini model
-        model = genai.GenerativeModel('gemini-1.5-pro')
+        # Identical claims, results and scores reuse an earlier explanation
+        response_text = generate('explanation', _build_prompt(claim, fact_checks, evidence, score))
         
-        # Prepare fact check information
-        fact_check_info = ""
-        if fact_checks:
-            fact_check_info = "\nFact Check Results:\n"
-            for i, check in enumerate(fact_checks, 1):
-                fact_check_info += f"- {check.get('publisher', {}).get('name', 'Fact Checker')}: {check.get('rating', 'No rating')}\n"
-        else:
-            fact_check_info = "\nNo direct fact checks were found for this claim.\n"
+        return _parse_explanation(response_text)
+    
+    except Exception as e:
+        print(f"Error generating explanation: {e}")
+        record_error('explanation')
+        # Return a default explanation if generation fails
+        return _default_explanation(score)
+
+@timed('explanation')
+async def generate_explanation_async(claim, fact_checks, evidence, score):
+    """
+    Generate a human-readable explanation using Gemini API without blocking a thread
+    
+    Args:
+        claim (str): The claim being evaluated
+        fact_checks (list): List of fact check results from Google Fact Check API
+        evidence (list): List of evidence items from web search
+        score (dict): Score information including numerical score and confidence label
         
-        # Prepare evidence information
-        evidence_info = ""
-        if evidence:
-            evidence_info = "\nEvidence Sources:\n"
-            for i, item in enumerate(evidence, 1):
-                evidence_info += f"- {item.get('title', 'Source')}: {item.get('snippet', 'No snippet')}\n"
-        else:
-            evidence_info = "\nNo supporting evidence was found for this claim.\n"
+    Returns:
+        dict: Explanation with summary and steps
+    """
+    # Not enough of the request's time budget is left for a Gemini round trip
+    if not has_budget(EXPLANATION_MIN_BUDGET_SECONDS):
+        return _default_explanation(score)
+    
+    try:
+        # Identical claims, results and scores reuse an earlier explanation
+        response_text = await generate_async('explanation', _build_prompt(claim, fact_checks, evidence, score))
         
-        # Prepare score information
-        score_info = f"\nConfidence: {score.get('confidence_label', 'Unknown')} ({score.get('score', 0)}/100)\n"
+        return _parse_explanation(response_text)
+    
+    except Exception as e:
+        print(f"Error generating explanation: {e}")
+        record_error('explanation')
+        # Return a default explanation if generation fails
+        return _default_explanation(score)
+
+def _build_prompt(claim, fact_checks, evidence, score):
+    """
+    Build the explanation prompt for a scored claim
+    
+    Args:
+        claim (str): The claim being evaluated
+        fact_checks (list): List of fact check results from Google Fact Check API
+        evidence (list): List of evidence items from web search
+        score (dict): Score information including numerical score and confidence label
         
-        # Prompt for explanation generation
-        prompt = f"""
+    Returns:
+        str: The prompt to send to Gemini
+    """
+    # Prepare fact check information
+    fact_check_info = ""
+    if fact_checks:
+        fact_check_info = "\nFact Check Results:\n"
+        for i, check in enumerate(fact_checks, 1):
+            fact_check_info += f"- {check.get('publisher', {}).get('name', 'Fact Checker')}: {check.get('rating', 'No rating')}\n"
+    else:
+        fact_check_info = "\nNo direct fact checks were found for this claim.\n"
+    
+    # Prepare evidence information
+    evidence_info = ""
+    if evidence:
+        evidence_info = "\nEvidence Sources:\n"
+        for i, item in enumerate(evidence, 1):
+            evidence_info += f"- {item.get('title', 'Source')}: {item.get('snippet', 'No snippet')}\n"
+    else:
+        evidence_info = "\nNo supporting evidence was found for this claim.\n"
+    
+    # Prepare score information
+    score_info = f"\nConfidence: {score.get('confidence_label', 'Unknown')} ({score.get('score', 0)}/100)\n"
+    
+    # Prompt for explanation generation
+    return f"""
         As a fact-checking educator, explain how the following claim was verified in a clear, educational way.
         
         Claim: "{claim}"
@@ -64,55 +126,69 @@ def generate_explanation(claim, fact_checks, evidence, score):
         - summary: A concise paragraph explaining the verification result
         - steps: An array of 3-4 verification steps anyone could follow
         """
+
+def _parse_explanation(response_text):
+    """
+    Parse the Gemini output into an explanation, handling non-JSON responses
+    
+    Args:
+        response_text (str): The raw model output
         
-        # Generate response
-        response = model.generate_content(prompt)
-        
-        # Process response to extract explanation
-        explanation_text = response.text.strip()
+    Returns:
+        dict: Explanation with summary and steps
+    """
+    # Process response to extract explanation
+    explanation_text = response_text.strip()
+    
+    # Parse the response - handle both JSON and non-JSON responses
+    try:
+        import json
+        explanation = json.loads(explanation_text)
+    except:
+        # If JSON parsing fails, create a structured response manually
+        lines = explanation_text.split('\n')
+        summary = lines[0] if lines else "We analyzed this claim using fact-checking services and evidence from reliable sources."
         
-        # Parse the response - handle both JSON and non-JSON responses
-        try:
-            import json
-            explanation = json.loads(explanation_text)
-        except:
-            # If JSON parsing fails, create a structured response manually
-            lines = explanation_text.split('\n')
-            summary = lines[0] if lines else "We analyzed this claim using fact-checking services and evidence from reliable sources."
-            
-            # Extract steps - look for numbered lines
-            steps = []
-            for line in lines:
-                line = line.strip()
-                if line and (line[0].isdigit() and line[1:3] in ['. ', ') ']):
-                    step = line[3:] if line[1:3] == '. ' else line[2:]
-                    steps.append(step)
-            
-            # If no steps were found, create generic ones
-            if not steps:
-                steps = [
-                    "Check official fact-checking websites for this claim",
-                    "Look for reporting from multiple reliable news sources",
-                    "Verify the original context and source of the claim",
-                    "Consider the evidence quality and consistency across sources"
-                ]
-            
-            explanation = {
-                'summary': summary,
-                'steps': steps
-            }
+        # Extract steps - look for numbered lines
+        steps = []
+        for line in lines:
+            line = line.strip()
+            if line and (line[0].isdigit() and line[1:3] in ['. ', ') ']):
+                step = line[3:] if line[1:3] == '. ' else line[2:]
+                steps.append(step)
         
-        return explanation
-    
-    except Exception as e:
-        print(f"Error generating explanation: {e}")
-        # Return a default explanation if generation fails
-        return {
-            'summary': f"We analyzed this claim and found it to be {score.get('confidence_label', 'uncertain')} based on available evidence.",
-            'steps': [
+        # If no steps were found, create generic ones
+        if not steps:
+            steps = [
                 "Check official fact-checking websites for this claim",
                 "Look for reporting from multiple reliable news sources",
                 "Verify the original context and source of the claim",
                 "Consider the evidence quality and consistency across sources"
             ]
-        }
\ No newline at end of file
+        
+        explanation = {
+            'summary': summary,
+            'steps': steps
+        }
+    
+    return explanation
+
+def _default_explanation(score):
+    """
+    Build the fallback explanation used when Gemini is unavailable
+    
+    Args:
+        score (dict): Score information including numerical score and confidence label
+        
+    Returns:
+        FallbackExplanation: Explanation with summary and steps
+    """
+    return FallbackExplanation({
+        'summary': f"We analyzed this claim and found it to be {score.get('confidence_label', 'uncertain')} based on available evidence.",
+        'steps': [
+            "Check official fact-checking websites for this claim",
+            "Look for reporting from multiple reliable news sources",
+            "Verify the original context and source of the claim",
+            "Consider the evidence quality and consistency across sources"
+        ]
+    })
@@ -1,13 +1,20 @@
 import os
-import requests
-from dotenv import load_dotenv
+from services.config import load_env
+from services.http_client import http_get, http_get_async
+from services.cache import cached
+from services.metrics import record_error, timed
+from services.resilience import UPSTREAM_UNAVAILABLE
+from services.models import FactCheck
 
 # Load environment variables
-load_dotenv()
+load_env()
 
-# Google Fact Check Tools API endpoint
-FACT_CHECK_API_URL = "https://factchecktools.googleapis.com/v1alpha1/claims:search"
+# Google Fact Check Tools API endpoint, overridable to point at a stand-in
+# such as fakes/upstreams.py
+FACT_CHECK_API_URL = os.getenv('FACT_CHECK_API_URL', "https://factchecktools.googleapis.com/v1alpha1/claims:search")
 
+@timed('fact_check')
+@cached('fact_check')
 def check_facts(claim):
     """
     Check a claim against Google's Fact Check Tools API
@@ -19,51 +26,101 @@ def check_facts(claim):
         list: A list of fact check results
     """
     try:
-        # Get API key from environment variables
-        api_key = os.getenv('FACT_CHECK_API_KEY')
+        params = _build_params(claim)
+        if params is None:
+            return []
+        
+        # Make the API request on the pooled session for this upstream
+        response = http_get('fact_check', FACT_CHECK_API_URL, params=params)
         
-        if not api_key:
-            print("Warning: FACT_CHECK_API_KEY not found in environment variables")
+        # Check if the request was successful
+        if response.status_code == 200:
+            return parse_fact_checks(response.json())
+        else:
+            print(f"Error: Fact Check API returned status code {response.status_code}")
+            print(f"Response: {response.text}")
+            record_error('fact_check')
             return []
+    
+    except UPSTREAM_UNAVAILABLE:
+        # Let the cache serve a stale result or an uncached empty one
+        raise
+    
+    except Exception as e:
+        print(f"Error checking facts: {e}")
+        record_error('fact_check')
+        return []
+
+@timed('fact_check')
+@cached('fact_check')
+async def check_facts_async(claim):
+    """
+    Check a claim against Google's Fact Check Tools API without blocking a thread
+    
+    Args:
+        claim (str): The claim to check
         
-        # Prepare parameters for the API request
-        params = {
-            'key': api_key,
-            'query': claim,
-            'languageCode': 'en-US'
-        }
+    Returns:
+        list: A list of fact check results
+    """
+    try:
+        params = _build_params(claim)
+        if params is None:
+            return []
         
-        # Make the API request
-        response = requests.get(FACT_CHECK_API_URL, params=params)
+        # Make the API request on the shared async client
+        response = await http_get_async('fact_check', FACT_CHECK_API_URL, params=params)
         
         # Check if the request was successful
         if response.status_code == 200:
-            data = response.json()
-            
-            # Extract relevant information from the response
-            fact_checks = []
-            if 'claims' in data:
-                for item in data['claims']:
-                    fact_check = {
-                        'claim_date': item.get('claimDate', ''),
-                        'claim_source': item.get('claimant', ''),
-                        'claim_reviewed': item.get('text', ''),
-                        'publisher': {
-                            'name': item.get('claimReview', [{}])[0].get('publisher', {}).get('name', ''),
-                            'site': item.get('claimReview', [{}])[0].get('publisher', {}).get('site', '')
-                        },
-                        'rating': item.get('claimReview', [{}])[0].get('textualRating', ''),
-                        'rating_explanation': item.get('claimReview', [{}])[0].get('title', ''),
-                        'url': item.get('claimReview', [{}])[0].get('url', '')
-                    }
-                    fact_checks.append(fact_check)
-            
-            return fact_checks
+            return parse_fact_checks(response.json())
         else:
             print(f"Error: Fact Check API returned status code {response.status_code}")
             print(f"Response: {response.text}")
+            record_error('fact_check')
             return []
     
+    except UPSTREAM_UNAVAILABLE:
+        # Let the cache serve a stale result or an uncached empty one
+        raise
+    
     except Exception as e:
         print(f"Error checking facts: {e}")
-        return []
\ No newline at end of file
+        record_error('fact_check')
+        return []
+
+def _build_params(claim):
+    """
+    Build the Fact Check API query parameters for a claim
+    
+    Args:
+        claim (str): The claim to check
+        
+    Returns:
+        dict: The query parameters, or None if the API key is missing
+    """
+    # Get API key from environment variables
+    api_key = os.getenv('FACT_CHECK_API_KEY')
+    
+    if not api_key:
+        print("Warning: FACT_CHECK_API_KEY not found in environment variables")
+        return None
+    
+    return {
+        'key': api_key,
+        'query': claim,
+        'languageCode': 'en-US'
+    }
+
+def parse_fact_checks(data):
+    """
+    Convert a Fact Check API response into fact check results
+    
+    Args:
+        data (dict): The decoded JSON response
+        
+    Returns:
+        list: A list of FactCheck results
+    """
+    # Build each result in one pass over its claim entry
+    return [FactCheck.from_api(item) for item in data.get('claims', [])]
@@ -0,0 +1,227 @@
+import asyncio
+import os
+import random
+import threading
+import weakref
+import requests
+from requests.adapters import HTTPAdapter
+from urllib3.util.retry import Retry
+from services.config import load_env
+from services.rate_limit import rate_limiter
+from services.resilience import call_guarded, call_guarded_async, time_left
+
+# Load environment variables
+load_env()
+
+def _upstream_settings(prefix, pool_size):
+    return {
+        'pool_size': int(os.getenv(f'{prefix}_POOL_SIZE', str(pool_size))),
+        'connect_timeout': float(os.getenv(f'{prefix}_CONNECT_TIMEOUT', '3.05')),
+        'read_timeout': float(os.getenv(f'{prefix}_READ_TIMEOUT', '10'))
+    }
+
+# Connection pool and timeout settings per upstream API
+UPSTREAMS = {
+    'fact_check': _upstream_settings('FACT_CHECK', 10),
+    'custom_search': _upstream_settings('CUSTOM_SEARCH', 10)
+}
+
+# Settings for upstreams without their own entry
+DEFAULT_UPSTREAM = _upstream_settings('HTTP', 4)
+
+# Retry policy for throttled (429) and failed (5xx) upstream requests
+HTTP_RETRIES = int(os.getenv('HTTP_RETRIES', '2'))
+HTTP_BACKOFF_FACTOR = float(os.getenv('HTTP_BACKOFF_FACTOR', '0.5'))
+HTTP_BACKOFF_JITTER = float(os.getenv('HTTP_BACKOFF_JITTER', '0.25'))
+RETRY_STATUSES = (429, 500, 502, 503, 504)
+
+# One keep-alive session per upstream, shared by all threads
+_sessions = {}
+_sessions_lock = threading.Lock()
+
+# Connection limits for the shared async client
+ASYNC_MAX_CONNECTIONS = int(os.getenv('ASYNC_MAX_CONNECTIONS', '100'))
+ASYNC_MAX_KEEPALIVE = int(os.getenv('ASYNC_MAX_KEEPALIVE', '20'))
+
+# Timeout (seconds) applied to every async upstream request
+ASYNC_TIMEOUT = float(os.getenv('ASYNC_TIMEOUT', '10'))
+
+# One client per event loop - httpx clients cannot be shared across loops
+_async_clients = weakref.WeakKeyDictionary()
+
+def get_async_client():
+    """
+    Get the shared async HTTP client for the running event loop
+    
+    Returns:
+        httpx.AsyncClient: A pooled client reused by all async services
+    """
+    loop = asyncio.get_running_loop()
+    client = _async_clients.get(loop)
+    if client is None or client.is_closed:
+        # httpx is only needed by the async services, so WSGI workers never import it
+        import httpx
+        client = httpx.AsyncClient(
+            timeout=ASYNC_TIMEOUT,
+            limits=httpx.Limits(
+                max_connections=ASYNC_MAX_CONNECTIONS,
+                max_keepalive_connections=ASYNC_MAX_KEEPALIVE
+            )
+        )
+        _async_clients[loop] = client
+    return client
+
+async def close_async_client():
+    """
+    Close the shared async HTTP client for the running event loop
+    """
+    client = _async_clients.pop(asyncio.get_running_loop(), None)
+    if client is not None:
+        await client.aclose()
+
+class JitteredRetry(Retry):
+    """
+    Retry policy that adds random jitter to the exponential backoff so that
+    workers throttled at the same moment do not retry in lockstep
+    """
+    def get_backoff_time(self):
+        return super().get_backoff_time() + random.uniform(0, HTTP_BACKOFF_JITTER)
+
+def get_session(upstream):
+    """
+    Get the pooled keep-alive session for an upstream API
+    
+    Args:
+        upstream (str): The upstream name, e.g. 'fact_check' or 'custom_search'
+        
+    Returns:
+        requests.Session: A session whose connection pool is sized for the upstream
+    """
+    session = _sessions.get(upstream)
+    if session is None:
+        with _sessions_lock:
+            session = _sessions.get(upstream)
+            if session is None:
+                settings = UPSTREAMS.get(upstream, DEFAULT_UPSTREAM)
+                retry = JitteredRetry(
+                    total=HTTP_RETRIES,
+                    backoff_factor=HTTP_BACKOFF_FACTOR,
+                    status_forcelist=RETRY_STATUSES,
+                    allowed_methods=['GET'],
+                    respect_retry_after_header=True,
+                    raise_on_status=False
+                )
+                adapter = HTTPAdapter(
+                    pool_connections=1,
+                    pool_maxsize=settings['pool_size'],
+                    max_retries=retry
+                )
+                session = requests.Session()
+                session.mount('https://', adapter)
+                session.mount('http://', adapter)
+                _sessions[upstream] = session
+    return session
+
+def http_get(upstream, url, params=None):
+    """
+    Make a GET request to an upstream API on its pooled session
+    
+    Args:
+        upstream (str): The upstream name, e.g. 'fact_check' or 'custom_search'
+        url (str): The request URL
+        params (dict): Query parameters
+        
+    Returns:
+        requests.Response: The response after any retries
+        
+    Raises:
+        QuotaExceeded: If the upstream's rate limit leaves no room for the request
+        CircuitOpen: If the upstream has been failing and is not being called
+        DeadlineExceeded: If the request's deadline passes first
+    """
+    settings = UPSTREAMS.get(upstream, DEFAULT_UPSTREAM)
+    read_timeout = settings['read_timeout']
+    remaining = time_left()
+    if remaining:
+        # Free the connection once the caller has stopped waiting
+        read_timeout = min(read_timeout, remaining)
+    return call_guarded(
+        upstream,
+        _get,
+        upstream,
+        url,
+        params,
+        (settings['connect_timeout'], read_timeout),
+        is_failure=_is_server_error
+    )
+
+async def http_get_async(upstream, url, params=None):
+    """
+    Make a GET request to an upstream API on the shared async client
+    
+    Args:
+        upstream (str): The upstream name, e.g. 'fact_check' or 'custom_search'
+        url (str): The request URL
+        params (dict): Query parameters
+        
+    Returns:
+        httpx.Response: The response
+        
+    Raises:
+        QuotaExceeded: If the upstream's rate limit leaves no room for the request
+        CircuitOpen: If the upstream has been failing and is not being called
+        DeadlineExceeded: If the request's deadline passes first
+    """
+    return await call_guarded_async(upstream, _get_async, upstream, url, params, is_failure=_is_server_error)
+
+def _get(upstream, url, params, timeout):
+    response = get_session(upstream).get(url, params=params, timeout=timeout)
+    _check_throttled(upstream, response)
+    return response
+
+async def _get_async(upstream, url, params):
+    response = await get_async_client().get(url, params=params)
+    _check_throttled(upstream, response)
+    return response
+
+def _is_server_error(response):
+    # Counts against the upstream's circuit breaker once retries are used up
+    return response.status_code >= 500
+
+def _check_throttled(upstream, response):
+    # Still throttled after retries: pause the upstream for every caller
+    if response.status_code == 429:
+        retry_after = response.headers.get('Retry-After', '')
+        rate_limiter.backoff(upstream, float(retry_after) if retry_after.isdigit() else None)
+
+def get_pool_stats():
+    """
+    Report connection reuse for each upstream session
+    
+    Returns:
+        dict: Per-upstream request, new connection, pool hit and reconnect counts
+    """
+    stats = {}
+    for upstream, session in list(_sessions.items()):
+        requests_made = 0
+        new_connections = 0
+        pool_count = 0
+        for adapter in set(session.adapters.values()):
+            pools = adapter.poolmanager.pools
+            for key in pools.keys():
+                pool = pools.get(key)
+                if pool is None:
+                    continue
+                pool_count += 1
+                requests_made += pool.num_requests
+                new_connections += pool.num_connections
+        
+        stats[upstream] = {
+            'requests': requests_made,
+            'new_connections': new_connections,
+            # Requests served on a kept-alive connection
+            'pool_hits': max(0, requests_made - new_connections),
+            # Connections opened after the first one to each host
+            'reconnects': max(0, new_connections - pool_count)
+        }
+    return stats
@@ -0,0 +1,73 @@
+import hashlib
+import io
+import math
+import os
+from collections import namedtuple
+from services.config import load_env
+
+try:
+    from PIL import Image, ImageOps
+except ImportError:
+    Image = None
+
+# Load environment variables
+load_env()
+
+# Longest side, in pixels, images are downscaled to before OCR. Screenshot
+# text stays legible to Cloud Vision well below camera resolutions
+OCR_MAX_DIMENSION = int(os.getenv('OCR_MAX_DIMENSION', '1600'))
+OCR_JPEG_QUALITY = int(os.getenv('OCR_JPEG_QUALITY', '90'))
+
+# Formats Cloud Vision accepts as they are; anything else is re-encoded
+VISION_FORMATS = {'JPEG', 'PNG', 'GIF', 'BMP', 'WEBP'}
+
+# content: the bytes to send to Cloud Vision
+# content_hash: SHA-256 of the normalized pixels, or of the raw bytes without Pillow
+PreparedImage = namedtuple('PreparedImage', ['content', 'content_hash'])
+
+def prepare_image(data):
+    """
+    Downscale and re-encode an image for OCR and hash it for the OCR cache
+    
+    The hash covers the exact normalized pixels. Similar-looking images, such
+    as two screenshots of the same app, can hold different text, so only
+    identical images share cached text.
+    
+    Without Pillow, or for data Pillow cannot decode, the image is sent as it
+    is and hashed by its bytes.
+    
+    Args:
+        data (bytes): The uploaded image
+        
+    Returns:
+        PreparedImage: The image to send and its hash
+    """
+    if Image is None:
+        return PreparedImage(data, hashlib.sha256(data).hexdigest())
+    
+    try:
+        with Image.open(io.BytesIO(data)) as original:
+            image_format = original.format
+            # Decided from the original size, as the draft below may already
+            # shrink a JPEG to exactly OCR_MAX_DIMENSION
+            resized = max(original.size) > OCR_MAX_DIMENSION
+            # Let the JPEG decoder downscale while decoding, which is much
+            # cheaper than resizing the full image afterwards
+            scale = min(OCR_MAX_DIMENSION / max(original.size), 1)
+            original.draft('RGB', (math.ceil(original.width * scale), math.ceil(original.height * scale)))
+            image = ImageOps.exif_transpose(original).convert('RGB')
+    except Exception as e:
+        print(f"Error decoding image, sending it unprocessed: {e}")
+        return PreparedImage(data, hashlib.sha256(data).hexdigest())
+    
+    if resized:
+        image.thumbnail((OCR_MAX_DIMENSION, OCR_MAX_DIMENSION), Image.LANCZOS)
+    
+    content = data
+    if resized or image_format not in VISION_FORMATS:
+        buffer = io.BytesIO()
+        image.save(buffer, 'JPEG', quality=OCR_JPEG_QUALITY)
+        content = buffer.getvalue()
+    
+    content_hash = hashlib.sha256(f"{image.size}".encode('ascii') + image.tobytes()).hexdigest()
+    return PreparedImage(content, content_hash)
@@ -0,0 +1,125 @@
+import json
+import os
+import re
+import secrets
+from collections.abc import Sequence
+from services.models import json_default
+from services.config import load_env
+
+# Load environment variables
+load_env()
+
+# 'auto' uses orjson when it is installed, 'json' forces the standard library
+JSON_CODEC = os.getenv('JSON_CODEC', 'auto').lower()
+
+try:
+    import orjson
+except ImportError:
+    orjson = None
+
+BACKEND = 'orjson' if orjson is not None and JSON_CODEC != 'json' else 'json'
+
+# Placeholder written in place of a pre-encoded fragment and swapped for it
+# afterwards. The random part keeps it from ever matching user content.
+_FRAGMENT_TOKEN = f"\x00{secrets.token_hex(8)}:"
+_FRAGMENT_PATTERN = re.compile(
+    rb'"' + re.escape(json.dumps(_FRAGMENT_TOKEN)[1:-1].encode('ascii')) + rb'(\d+)"'
+)
+
+class EncodedList(Sequence):
+    """
+    Read-only list of results that remembers its own JSON encoding
+    
+    Cached results are wrapped in this so each cache entry is encoded once,
+    however many responses it ends up in. Entries read back from a shared
+    cache tier reuse the JSON they were stored as.
+    """
+    __slots__ = ('items', '_json')
+    
+    def __init__(self, items, encoded=None):
+        self.items = items
+        self._json = encoded
+    
+    def __len__(self):
+        return len(self.items)
+    
+    def __getitem__(self, index):
+        return self.items[index]
+    
+    def __eq__(self, other):
+        if isinstance(other, EncodedList):
+            other = other.items
+        return list(self.items) == other
+    
+    __hash__ = None
+    
+    def __repr__(self):
+        return f"EncodedList({self.items!r})"
+    
+    def json(self):
+        """
+        Returns:
+            bytes: The JSON encoding of the items
+        """
+        if self._json is None:
+            self._json = dumps(self.items)
+        return self._json
+
+if BACKEND == 'orjson':
+    _OPTIONS = orjson.OPT_NON_STR_KEYS | orjson.OPT_SERIALIZE_NUMPY
+    
+    def _encode(obj, default):
+        return orjson.dumps(obj, default=default, option=_OPTIONS)
+    
+    def loads(data):
+        """
+        Parse JSON from bytes or str
+        
+        Args:
+            data (bytes): The JSON document
+            
+        Returns:
+            The decoded value
+        """
+        return orjson.loads(data)
+else:
+    def _encode(obj, default):
+        return json.dumps(obj, default=default, separators=(',', ':')).encode('utf-8')
+    
+    def loads(data):
+        """
+        Parse JSON from bytes or str
+        
+        Args:
+            data (bytes): The JSON document
+            
+        Returns:
+            The decoded value
+        """
+        return json.loads(data)
+
+def dumps(obj):
+    """
+    Encode a value, including result models, as compact JSON
+    
+    Pre-encoded EncodedList values are spliced in as they are rather than
+    encoded again.
+    
+    Args:
+        obj: The value to encode
+        
+    Returns:
+        bytes: The UTF-8 JSON encoding
+    """
+    fragments = []
+    
+    def default(value):
+        if isinstance(value, EncodedList):
+            fragments.append(value.json())
+            return f"{_FRAGMENT_TOKEN}{len(fragments) - 1}"
+        return json_default(value)
+    
+    encoded = _encode(obj, default)
+    if fragments:
+        encoded = _FRAGMENT_PATTERN.sub(lambda match: fragments[int(match.group(1))], encoded)
+    return encoded
@@ -0,0 +1,212 @@
+import hashlib
+import os
+import threading
+import time
+from services import cache
+from services.clients import generate_content_async, get_client, register
+from services.config import load_env
+from services.rate_limit import rate_limiter
+from services.resilience import call_guarded, call_guarded_async
+
+# Load environment variables
+load_env()
+
+# Set LLM_CACHE_ENABLED=false to always call Gemini. Responses are also not
+# cached when CACHE_ENABLED=false
+LLM_CACHE_ENABLED = os.getenv('LLM_CACHE_ENABLED', 'true').lower() == 'true'
+
+def _task_settings(prefix, model, max_output_tokens):
+    return {
+        'model': os.getenv(f'{prefix}_MODEL', model),
+        'max_output_tokens': int(os.getenv(f'{prefix}_MAX_OUTPUT_TOKENS', str(max_output_tokens)))
+    }
+
+# Model and output token cap of each task. Extraction only lists short claims,
+# so it runs on a faster, cheaper model than the explanations
+LLM_TASKS = {
+    'claim_extraction': _task_settings('CLAIM_EXTRACTION', 'gemini-1.5-flash', 512),
+    'claim_extraction_batch': _task_settings(
+        'CLAIM_EXTRACTION_BATCH',
+        os.getenv('CLAIM_EXTRACTION_MODEL', 'gemini-1.5-flash'),
+        2048
+    ),
+    'explanation': _task_settings('EXPLANATION', 'gemini-1.5-pro', 768)
+}
+
+# Calls, cache hits, tokens and latency per task
+_stats = {}
+_stats_lock = threading.Lock()
+
+def _build_model(task):
+    settings = LLM_TASKS[task]
+    return get_client('gemini').GenerativeModel(
+        settings['model'],
+        generation_config={'max_output_tokens': settings['max_output_tokens']}
+    )
+
+# The models hold no per-request state, so each task shares one instance
+for _task in LLM_TASKS:
+    register(f'{_task}_model', lambda task=_task: _build_model(task))
+
+def _get_model(task):
+    return get_client(f'{task}_model')
+
+def cache_key(task, prompt):
+    """
+    Build the response cache key for a prompt sent to a task's model
+    
+    Args:
+        task (str): The task name
+        prompt (str): The prompt
+        
+    Returns:
+        str: The key, a hash of the model name and prompt
+    """
+    digest = hashlib.sha256(f"{LLM_TASKS[task]['model']}\n{prompt}".encode('utf-8')).hexdigest()
+    return f'llm:{digest}'
+
+def generate(task, prompt):
+    """
+    Generate text for a task, answering repeated prompts from the cache
+    
+    Errors are counted against the task and raised to the caller, which
+    picks its own fallback.
+    
+    Args:
+        task (str): The task name, a key of LLM_TASKS
+        prompt (str): The prompt
+        
+    Returns:
+        str: The model's response text
+    """
+    fetched = []
+    
+    def fetch():
+        fetched.append(True)
+        return _call(task, prompt)
+    
+    _count(task, 'requests')
+    if not _cache_enabled():
+        return fetch()
+    text = cache.result_cache.get_or_fetch('llm', cache_key(task, prompt), fetch)
+    if not fetched:
+        _count(task, 'cache_hits')
+    return text
+
+async def generate_async(task, prompt):
+    """
+    Async counterpart of generate that does not block the event loop
+    """
+    fetched = []
+    
+    async def fetch():
+        fetched.append(True)
+        return await _call_async(task, prompt)
+    
+    _count(task, 'requests')
+    if not _cache_enabled():
+        return await fetch()
+    text = await cache.result_cache.get_or_fetch_async('llm', cache_key(task, prompt), fetch)
+    if not fetched:
+        _count(task, 'cache_hits')
+    return text
+
+def get_llm_stats():
+    """
+    Report each task's model, calls, cache hits, errors, tokens and latency
+    
+    Returns:
+        dict: Counters keyed by task
+    """
+    with _stats_lock:
+        stats = {task: dict(counts) for task, counts in _stats.items()}
+    for task, counts in stats.items():
+        seconds = counts.pop('seconds')
+        counts['model'] = LLM_TASKS[task]['model']
+        counts['mean_latency_ms'] = round(seconds / counts['calls'] * 1000, 1) if counts['calls'] else 0
+        counts['max_latency_ms'] = round(counts.pop('max_seconds') * 1000, 1)
+    return stats
+
+def _cache_enabled():
+    return cache.CACHE_ENABLED and LLM_CACHE_ENABLED
+
+def _call(task, prompt):
+    start = time.perf_counter()
+    try:
+        # Fail fast while Gemini is down
+        response = call_guarded('gemini', _get_model(task).generate_content, prompt)
+        text = response.text
+    except Exception as e:
+        _record_error(task, e, time.perf_counter() - start)
+        raise
+    _record_call(task, prompt, response, text, time.perf_counter() - start)
+    return text
+
+async def _call_async(task, prompt):
+    start = time.perf_counter()
+    try:
+        response = await call_guarded_async('gemini', generate_content_async, _get_model(task), prompt)
+        text = response.text
+    except Exception as e:
+        _record_error(task, e, time.perf_counter() - start)
+        raise
+    _record_call(task, prompt, response, text, time.perf_counter() - start)
+    return text
+
+def _token_counts(response, prompt, text):
+    """
+    Read the prompt and output token counts from a response
+    
+    Newer SDKs report both in usage_metadata, older ones only the output
+    tokens per candidate. Anything not reported is estimated at four
+    characters per token.
+    
+    Returns:
+        tuple: (prompt tokens, output tokens)
+    """
+    prompt_tokens = len(prompt) // 4
+    output_tokens = len(text) // 4
+    usage = getattr(response, 'usage_metadata', None)
+    if isinstance(getattr(usage, 'prompt_token_count', None), int):
+        prompt_tokens = usage.prompt_token_count
+    if isinstance(getattr(usage, 'candidates_token_count', None), int):
+        output_tokens = usage.candidates_token_count
+    else:
+        try:
+            count = response.candidates[0].token_count
+        except (AttributeError, IndexError, TypeError):
+            count = None
+        if isinstance(count, int) and count:
+            output_tokens = count
+    return prompt_tokens, output_tokens
+
+def _task_stats(task):
+    # Callers hold _stats_lock
+    return _stats.setdefault(task, {
+        'requests': 0, 'cache_hits': 0, 'calls': 0, 'errors': 0,
+        'prompt_tokens': 0, 'output_tokens': 0, 'seconds': 0.0, 'max_seconds': 0.0
+    })
+
+def _count(task, counter):
+    with _stats_lock:
+        _task_stats(task)[counter] += 1
+
+def _add_latency(counts, seconds):
+    counts['calls'] += 1
+    counts['seconds'] += seconds
+    counts['max_seconds'] = max(counts['max_seconds'], seconds)
+
+def _record_call(task, prompt, response, text, seconds):
+    prompt_tokens, output_tokens = _token_counts(response, prompt, text)
+    with _stats_lock:
+        counts = _task_stats(task)
+        _add_latency(counts, seconds)
+        counts['prompt_tokens'] += prompt_tokens
+        counts['output_tokens'] += output_tokens
+
+def _record_error(task, error, seconds):
+    with _stats_lock:
+        counts = _task_stats(task)
+        _add_latency(counts, seconds)
+        counts['errors'] += 1
+    rate_limiter.check_error('gemini', error)
@@ -0,0 +1,170 @@
+import os
+import re
+import threading
+from services.config import load_env
+
+# Load environment variables
+load_env()
+
+# auto: use local claims above the confidence threshold, otherwise Gemini
+# llm: always use Gemini
+# local: never use Gemini
+CLAIM_EXTRACTION_MODE = os.getenv('CLAIM_EXTRACTION_MODE', 'auto').lower()
+CLAIM_LOCAL_CONFIDENCE = float(os.getenv('CLAIM_LOCAL_CONFIDENCE', '0.8'))
+
+# Inputs with more sentences than this are left to Gemini in auto mode
+MAX_LOCAL_SENTENCES = 3
+
+# Sentences longer than this usually hold several claims Gemini would split up
+MAX_CLAIM_WORDS = 30
+
+# Sentence boundaries: terminal punctuation, optional closing quotes or brackets,
+# then whitespace before something that can start a sentence
+_SENTENCE_END = re.compile(r'(?<=[.!?])["\')\]]*\s+(?=["\'(\[]?[A-Z0-9])')
+
+# Words that end with a period without ending the sentence
+_ABBREVIATIONS = {'mr', 'mrs', 'ms', 'dr', 'prof', 'st', 'vs', 'etc', 'inc', 'ltd', 'jr', 'sr', 'no', 'u.s', 'e.g', 'i.e'}
+
+# List markers a post may put in front of each claim
+_LIST_MARKER = re.compile(r'^\s*(?:[-*•]|\d+[.)])\s+')
+
+# Statements of opinion, taste or obligation rather than fact
+_OPINION = re.compile(
+    r"\b(?:i think|i believe|i feel|i guess|in my opinion|imo|should|must|ought to|"
+    r"love|hate|best|worst|beautiful|ugly|amazing|awesome|terrible|horrible|disgusting|stupid)\b",
+    re.IGNORECASE
+)
+
+# Verbs and phrases that typically carry a checkable assertion
+_ASSERTION = re.compile(
+    r"\b(?:is|are|was|were|has|have|had|contains?|contained|causes?|caused|cures?|cured|"
+    r"kills?|killed|increases?|increased|decreases?|decreased|reduces?|reduced|prevents?|prevented|"
+    r"leads? to|led to|found|shows?|showed|shown|reports?|reported|announced|said|says|"
+    r"won|lost|approved|banned|invented|discovered|costs?|earns?|earned|rose|fell|"
+    r"died|born|located|made|built|signed|voted|passed)\b",
+    re.IGNORECASE
+)
+
+# Hedged statements are harder to pin down, so Gemini gets to rephrase them
+_HEDGE = re.compile(r"\b(?:may|might|could|possibly|reportedly|allegedly|some say|rumou?red)\b", re.IGNORECASE)
+
+_NUMBER = re.compile(r'\d')
+_PROPER_NOUN = re.compile(r'(?<=\s)[A-Z][a-zA-Z]+')
+
+_stats = {'local': 0, 'llm': 0}
+_stats_lock = threading.Lock()
+
+def split_sentences(text):
+    """
+    Split text into sentences without breaking on common abbreviations
+    
+    Args:
+        text (str): The text to split
+        
+    Returns:
+        list: The non-empty sentences
+    """
+    sentences = []
+    for line in text.splitlines():
+        line = _LIST_MARKER.sub('', line).strip()
+        if not line:
+            continue
+        for piece in _SENTENCE_END.split(line):
+            words = sentences[-1].split() if sentences else []
+            if words and words[-1].rstrip('.').lower() in _ABBREVIATIONS and sentences[-1].endswith('.'):
+                sentences[-1] = f"{sentences[-1]} {piece}"
+            else:
+                sentences.append(piece)
+    return [sentence.strip() for sentence in sentences if sentence.strip()]
+
+def score_sentence(sentence):
+    """
+    Estimate how likely a sentence is a single checkable factual claim
+    
+    Args:
+        sentence (str): The sentence to score
+        
+    Returns:
+        float: 0 for sentences that are not claims, otherwise a score up to 1
+    """
+    words = sentence.split()
+    if len(words) < 3 or sentence.endswith('?'):
+        return 0.0
+    if _OPINION.search(sentence) or not _ASSERTION.search(sentence):
+        return 0.0
+    
+    score = 0.85
+    # Numbers and named entities make a claim concrete enough to check
+    if _NUMBER.search(sentence):
+        score += 0.05
+    if _PROPER_NOUN.search(sentence):
+        score += 0.05
+    if _HEDGE.search(sentence):
+        score *= 0.8
+    if len(words) > MAX_CLAIM_WORDS:
+        score *= 0.7
+    elif ';' in sentence or ' and ' in sentence:
+        score *= 0.9
+    return min(score, 1.0)
+
+def extract_claims_local(content):
+    """
+    Extract claims with sentence splitting and rule-based filtering
+    
+    Args:
+        content (str): The text content to extract claims from
+        
+    Returns:
+        tuple: (claims, confidence) where confidence estimates how well the
+        claims match what Gemini would extract
+    """
+    sentences = split_sentences(content)
+    if not sentences:
+        return [], 0.0
+    
+    scored = [(sentence, score_sentence(sentence)) for sentence in sentences]
+    claims = [sentence for sentence, score in scored if score > 0]
+    if not claims:
+        return [], 0.0
+    
+    confidence = sum(score for _, score in scored if score > 0) / len(claims)
+    # Every dropped sentence is a chance that a claim was missed
+    confidence *= 0.9 ** (len(sentences) - len(claims))
+    if len(sentences) > MAX_LOCAL_SENTENCES:
+        confidence *= 0.5
+    return claims, confidence
+
+def fast_path(content):
+    """
+    Return locally extracted claims when the configured mode allows skipping
+    Gemini for this content
+    
+    Args:
+        content (str): The text content to extract claims from
+        
+    Returns:
+        list: The local claims, or None if Gemini should be used
+    """
+    if CLAIM_EXTRACTION_MODE == 'llm':
+        claims = None
+    else:
+        claims, confidence = extract_claims_local(content)
+        if CLAIM_EXTRACTION_MODE == 'local':
+            # Like a failed Gemini call, fall back to the whole content as one claim
+            claims = claims or ([content.strip()] if content.strip() else [])
+        elif confidence < CLAIM_LOCAL_CONFIDENCE:
+            claims = None
+    
+    with _stats_lock:
+        _stats['llm' if claims is None else 'local'] += 1
+    return claims
+
+def get_extraction_stats():
+    """
+    Report how often the local extractor answered instead of Gemini
+    
+    Returns:
+        dict: The mode, threshold and per-path counts
+    """
+    with _stats_lock:
+        return {'mode': CLAIM_EXTRACTION_MODE, 'threshold': CLAIM_LOCAL_CONFIDENCE, **_stats}
@@ -0,0 +1,289 @@
+import asyncio
+import bisect
+import contextlib
+import contextvars
+import functools
+import os
+import threading
+import time
+from services.config import load_env
+
+# Load environment variables
+load_env()
+
+# Requests carrying this header get a Server-Timing header with the time spent
+# in each stage. Set DEBUG_TIMING_ENABLED=false to ignore it
+DEBUG_TIMING_HEADER = os.getenv('DEBUG_TIMING_HEADER', 'X-Debug-Timing')
+DEBUG_TIMING_ENABLED = os.getenv('DEBUG_TIMING_ENABLED', 'true').lower() == 'true'
+
+# Upper bounds (seconds) of the latency histogram buckets
+LATENCY_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10)
+
+# Timings of the request being handled in the current context, if it asked for them
+_request_timings = contextvars.ContextVar('request_timings', default=None)
+
+class Histogram:
+    """
+    Prometheus-style latency histogram with one series per label value
+    """
+    def __init__(self, buckets=LATENCY_BUCKETS):
+        self.buckets = buckets
+        self._series = {}
+        self._lock = threading.Lock()
+    
+    def observe(self, label, seconds):
+        with self._lock:
+            series = self._series.get(label)
+            if series is None:
+                series = self._series[label] = {'counts': [0] * (len(self.buckets) + 1), 'sum': 0.0}
+            series['counts'][bisect.bisect_left(self.buckets, seconds)] += 1
+            series['sum'] += seconds
+    
+    def snapshot(self):
+        """
+        Returns:
+            dict: (cumulative bucket counts, sum, count) keyed by label
+        """
+        with self._lock:
+            series = {label: (list(values['counts']), values['sum']) for label, values in self._series.items()}
+        snapshot = {}
+        for label, (counts, total) in series.items():
+            cumulative = []
+            running = 0
+            for count in counts:
+                running += count
+                cumulative.append(running)
+            snapshot[label] = (cumulative, total, running)
+        return snapshot
+
+class Counter:
+    """
+    Counter with one value per label tuple
+    """
+    def __init__(self):
+        self._values = {}
+        self._lock = threading.Lock()
+    
+    def inc(self, *labels):
+        with self._lock:
+            self._values[labels] = self._values.get(labels, 0) + 1
+    
+    def snapshot(self):
+        with self._lock:
+            return dict(self._values)
+
+class RequestTimings:
+    """
+    Time spent in each stage while handling one request
+    """
+    def __init__(self):
+        self.started = time.perf_counter()
+        self._stages = {}
+        self._lock = threading.Lock()
+    
+    def add(self, stage, seconds):
+        with self._lock:
+            count, total, longest = self._stages.get(stage, (0, 0.0, 0.0))
+            self._stages[stage] = (count + 1, total + seconds, max(longest, seconds))
+    
+    def server_timing(self):
+        """
+        Format the timings as a Server-Timing header value
+        
+        Stages run concurrently for each claim, so a stage's duration is the
+        sum over its calls and the description gives the count and slowest call.
+        """
+        with self._lock:
+            stages = dict(self._stages)
+        entries = [
+            f'{stage};dur={total * 1000:.1f};desc="{count} calls / slowest {longest * 1000:.1f}ms"'
+            for stage, (count, total, longest) in stages.items()
+        ]
+        entries.append(f'total;dur={(time.perf_counter() - self.started) * 1000:.1f}')
+        return ', '.join(entries)
+
+# Time spent in each service function and in each claim's pass through the pipeline
+stage_latency = Histogram()
+
+# Time spent in each call made to an upstream API, including retries
+upstream_latency = Histogram()
+
+# Service functions that failed and returned their fallback, or found nothing
+stage_errors = Counter()
+stage_empty_results = Counter()
+
+# Upstream calls that raised or returned a server error
+upstream_failures = Counter()
+
+def observe(stage, seconds):
+    """
+    Record the time spent in a stage, for the metrics and the current request
+    """
+    stage_latency.observe(stage, seconds)
+    timings = _request_timings.get()
+    if timings is not None:
+        timings.add(stage, seconds)
+
+def record_error(stage):
+    """
+    Count a service failure that was handled by returning a fallback result
+    """
+    stage_errors.inc(stage)
+
+def record_upstream(upstream, seconds, failed=False):
+    upstream_latency.observe(upstream, seconds)
+    if failed:
+        upstream_failures.inc(upstream)
+
+def timed(stage):
+    """
+    Time a service function and count its empty results
+    
+    Works for both plain and coroutine functions.
+    
+    Args:
+        stage (str): The stage name used in the metrics and Server-Timing header
+        
+    Returns:
+        callable: The decorator
+    """
+    def finish(started, result):
+        observe(stage, time.perf_counter() - started)
+        if not result:
+            stage_empty_results.inc(stage)
+        return result
+    
+    def decorator(func):
+        if asyncio.iscoroutinefunction(func):
+            @functools.wraps(func)
+            async def async_wrapper(*args, **kwargs):
+                started = time.perf_counter()
+                try:
+                    result = await func(*args, **kwargs)
+                except Exception:
+                    record_error(stage)
+                    observe(stage, time.perf_counter() - started)
+                    raise
+                return finish(started, result)
+            return async_wrapper
+        
+        @functools.wraps(func)
+        def wrapper(*args, **kwargs):
+            started = time.perf_counter()
+            try:
+                result = func(*args, **kwargs)
+            except Exception:
+                record_error(stage)
+                observe(stage, time.perf_counter() - started)
+                raise
+            return finish(started, result)
+        return wrapper
+    
+    return decorator
+
+def wants_timings(header_value):
+    """
+    Check whether a request asked for its timing breakdown
+    
+    Args:
+        header_value (str): The request's DEBUG_TIMING_HEADER value, or None
+    """
+    return DEBUG_TIMING_ENABLED and bool(header_value)
+
+def start_request_timings(enabled):
+    """
+    Start collecting the current request's timings, or stop collecting
+    the previous request's on a reused thread
+    
+    Returns:
+        RequestTimings: The timings being collected, or None
+    """
+    timings = RequestTimings() if enabled else None
+    _request_timings.set(timings)
+    return timings
+
+@contextlib.contextmanager
+def request_timings(enabled=True):
+    """
+    Collect the timings of the enclosed calls, and anything they start
+    through the pipeline
+    
+    Yields:
+        RequestTimings: The timings being collected, or None when not enabled
+    """
+    timings = RequestTimings() if enabled else None
+    token = _request_timings.set(timings)
+    try:
+        yield timings
+    finally:
+        _request_timings.reset(token)
+
+def current_timings():
+    return _request_timings.get()
+
+def render_prometheus(cache_stats=None, rate_limit_stats=None):
+    """
+    Render the metrics in the Prometheus text exposition format
+    
+    Args:
+        cache_stats (dict): Cache hits, stale hits and misses per source
+        rate_limit_stats (dict): Rate limiter decisions per upstream
+        
+    Returns:
+        str: The /metrics response body
+    """
+    lines = []
+    _render_histogram(lines, 'verifysense_stage_duration_seconds',
+                      'Time spent in each verification stage', 'stage', stage_latency)
+    _render_histogram(lines, 'verifysense_upstream_duration_seconds',
+                      'Time spent in each upstream API call', 'upstream', upstream_latency)
+    _render_counter(lines, 'verifysense_stage_errors_total',
+                    'Service failures answered with a fallback result', ('stage',), stage_errors.snapshot())
+    _render_counter(lines, 'verifysense_stage_empty_results_total',
+                    'Service calls that returned no results', ('stage',), stage_empty_results.snapshot())
+    _render_counter(lines, 'verifysense_upstream_failures_total',
+                    'Upstream API calls that raised or returned a server error', ('upstream',),
+                    upstream_failures.snapshot())
+    
+    if cache_stats is not None:
+        _render_counter(lines, 'verifysense_cache_lookups_total', 'Result cache lookups', ('source', 'result'), {
+            (source, result): count
+            for source, counts in cache_stats.items()
+            for result, count in counts.items()
+        })
+        lines.append('# HELP verifysense_cache_hit_ratio Share of cache lookups answered from the cache')
+        lines.append('# TYPE verifysense_cache_hit_ratio gauge')
+        for source, counts in sorted(cache_stats.items()):
+            lookups = sum(counts.values())
+            if lookups:
+                hits = counts.get('hits', 0) + counts.get('stale_hits', 0)
+                lines.append(f'verifysense_cache_hit_ratio{{source="{source}"}} {hits / lookups:.6g}')
+    
+    if rate_limit_stats is not None:
+        _render_counter(lines, 'verifysense_rate_limit_decisions_total', 'Rate limiter decisions',
+                        ('upstream', 'outcome'), {
+            (upstream, outcome): count
+            for upstream, counts in rate_limit_stats.items()
+            for outcome, count in counts.items()
+        })
+    
+    return '\n'.join(lines) + '\n'
+
+def _labels(names, values):
+    return ','.join(f'{name}="{value}"' for name, value in zip(names, values))
+
+def _render_histogram(lines, name, help_text, label, histogram):
+    lines.append(f'# HELP {name} {help_text}')
+    lines.append(f'# TYPE {name} histogram')
+    for value, (cumulative, total, count) in sorted(histogram.snapshot().items()):
+        bounds = [f'{bound:g}' for bound in histogram.buckets] + ['+Inf']
+        for bound, bucket_count in zip(bounds, cumulative):
+            lines.append(f'{name}_bucket{{{label}="{value}",le="{bound}"}} {bucket_count}')
+        lines.append(f'{name}_sum{{{label}="{value}"}} {total:.6f}')
+        lines.append(f'{name}_count{{{label}="{value}"}} {count}')
+
+def _render_counter(lines, name, help_text, label_names, values):
+    lines.append(f'# HELP {name} {help_text}')
+    lines.append(f'# TYPE {name} counter')
+    for labels, count in sorted(values.items()):
+        lines.append(f'{name}{{{_labels(label_names, labels)}}} {count}')
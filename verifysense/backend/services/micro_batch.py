@@ -0,0 +1,109 @@
+import asyncio
+import os
+import queue
+import threading
+import time
+from concurrent.futures import Future, ThreadPoolExecutor
+from services.config import load_env
+from services.rate_limit import current_priority, priority
+
+# Load environment variables
+load_env()
+
+# Number of batches that can be waiting on their upstream call at once
+MICRO_BATCH_WORKERS = int(os.getenv('MICRO_BATCH_WORKERS', '4'))
+
+class MicroBatcher:
+    """
+    Collect concurrent single-item calls into batched upstream calls
+    
+    A batch is sent when it reaches max_size items or when the first item in
+    it has waited max_wait seconds, whichever comes first. The handler takes
+    a list of items and returns a list of results in the same order. A
+    result that is an exception is raised for its own item only. A batch is
+    sent at the most urgent priority of the callers in it.
+    """
+    def __init__(self, handler, max_size, max_wait, workers=MICRO_BATCH_WORKERS):
+        self.handler = handler
+        self.max_size = max_size
+        self.max_wait = max_wait
+        self._queue = queue.Queue()
+        self._executor = ThreadPoolExecutor(max_workers=workers, thread_name_prefix='micro-batch')
+        self._collector = None
+        self._lock = threading.Lock()
+        self.batches = 0
+        self.items = 0
+    
+    def submit(self, item):
+        """
+        Queue an item for the next batch and wait for its result
+        
+        Args:
+            item: The item to pass to the handler
+            
+        Returns:
+            The handler's result for this item
+        """
+        return self._enqueue(item).result()
+    
+    async def submit_async(self, item):
+        """
+        Queue an item for the next batch and wait for its result without
+        blocking the event loop
+        
+        Args:
+            item: The item to pass to the handler
+            
+        Returns:
+            The handler's result for this item
+        """
+        return await asyncio.wrap_future(self._enqueue(item))
+    
+    def _enqueue(self, item):
+        future = Future()
+        self._queue.put((item, future, current_priority()))
+        self._ensure_collector()
+        return future
+    
+    def _ensure_collector(self):
+        with self._lock:
+            if self._collector is None:
+                self._collector = threading.Thread(target=self._collect, name='micro-batch-collector', daemon=True)
+                self._collector.start()
+    
+    def _collect(self):
+        while True:
+            batch = [self._queue.get()]
+            deadline = time.monotonic() + self.max_wait
+            while len(batch) < self.max_size:
+                remaining = deadline - time.monotonic()
+                if remaining <= 0:
+                    break
+                try:
+                    batch.append(self._queue.get(timeout=remaining))
+                except queue.Empty:
+                    break
+            self._executor.submit(self._dispatch, batch)
+    
+    def _dispatch(self, batch):
+        with self._lock:
+            self.batches += 1
+            self.items += len(batch)
+        try:
+            with priority(min(level for _, _, level in batch)):
+                results = self.handler([item for item, _, _ in batch])
+            if len(results) != len(batch):
+                raise ValueError(f"Batch handler returned {len(results)} results for {len(batch)} items")
+        except Exception as e:
+            for _, future, _ in batch:
+                future.set_exception(e)
+            return
+        for (_, future, _), result in zip(batch, results):
+            if isinstance(result, Exception):
+                future.set_exception(result)
+            else:
+                future.set_result(result)
+    
+    def stats(self):
+        with self._lock:
+            return {'batches': self.batches, 'items': self.items}
@@ -0,0 +1,187 @@
+from collections.abc import Sequence
+from services.domain_reliability import extract_domain, reliability_index
+
+class Model:
+    """
+    Base for the slotted result models
+    
+    Models are read like the dicts they replace (model['rating'],
+    model.get('publisher', {})), so code written against plain-dict results
+    keeps working, and to_dict() produces the API response shape.
+    
+    Subclasses list the keys of that shape in _keys. Each key is read with
+    getattr, so keys that group several slots are properties.
+    """
+    __slots__ = ()
+    _keys = ()
+    
+    def to_dict(self):
+        """
+        Build the API response shape
+        
+        Returns:
+            dict: The model's keys and values
+        """
+        return {key: getattr(self, key) for key in self._keys}
+    
+    def __getitem__(self, key):
+        if key not in self._keys:
+            raise KeyError(key)
+        return getattr(self, key)
+    
+    def get(self, key, default=None):
+        try:
+            return self[key]
+        except KeyError:
+            return default
+    
+    def __eq__(self, other):
+        if isinstance(other, Model):
+            other = other.to_dict()
+        return self.to_dict() == other
+    
+    __hash__ = None
+    
+    def __repr__(self):
+        return f"{type(self).__name__}({self.to_dict()!r})"
+
+class FactCheck(Model):
+    """
+    A published fact check of a claim
+    """
+    __slots__ = ('claim_date', 'claim_source', 'claim_reviewed', 'publisher_name', 'publisher_site',
+                 'rating', 'rating_explanation', 'url')
+    _keys = ('claim_date', 'claim_source', 'claim_reviewed', 'publisher', 'rating', 'rating_explanation', 'url')
+    
+    def __init__(self, claim_date='', claim_source='', claim_reviewed='', publisher_name='', publisher_site='',
+                 rating='', rating_explanation='', url=''):
+        self.claim_date = claim_date
+        self.claim_source = claim_source
+        self.claim_reviewed = claim_reviewed
+        self.publisher_name = publisher_name
+        self.publisher_site = publisher_site
+        self.rating = rating
+        self.rating_explanation = rating_explanation
+        self.url = url
+    
+    @classmethod
+    def from_api(cls, item):
+        """
+        Build a fact check from one entry of a Fact Check API "claims" list
+        
+        Args:
+            item (dict): The decoded claim entry
+            
+        Returns:
+            FactCheck: The fact check from the claim's first review
+        """
+        review = (item.get('claimReview') or [{}])[0]
+        publisher = review.get('publisher') or {}
+        return cls(
+            item.get('claimDate', ''),
+            item.get('claimant', ''),
+            item.get('text', ''),
+            publisher.get('name', ''),
+            publisher.get('site', ''),
+            review.get('textualRating', ''),
+            review.get('title', ''),
+            review.get('url', '')
+        )
+    
+    @property
+    def publisher(self):
+        return {'name': self.publisher_name, 'site': self.publisher_site}
+
+class EvidenceItem(Model):
+    """
+    A search result offered as evidence for or against a claim
+    """
+    __slots__ = ('title', 'snippet', 'link', 'source', 'reliability', 'reliability_score', 'date')
+    _keys = __slots__
+    
+    def __init__(self, title='', snippet='', link='', source='', reliability='medium', reliability_score=None, date=''):
+        self.title = title
+        self.snippet = snippet
+        self.link = link
+        self.source = source
+        self.reliability = reliability
+        self.reliability_score = reliability_score
+        self.date = date
+    
+    @classmethod
+    def from_api(cls, item):
+        """
+        Build an evidence item from one Custom Search API result
+        
+        Args:
+            item (dict): The decoded search result
+            
+        Returns:
+            EvidenceItem: The result, rated by its domain's reliability
+        """
+        link = item.get('link', '')
+        domain = extract_domain(link)
+        reliability = reliability_index.lookup(domain)
+        metatags = (item.get('pagemap') or {}).get('metatags') or [{}]
+        return cls(
+            item.get('title', ''),
+            item.get('snippet', ''),
+            link,
+            domain,
+            reliability.tier,
+            reliability.score,
+            metatags[0].get('article:published_time', '')
+        )
+
+
+class Score(Model):
+    """
+    A claim's credibility score and the components it was computed from
+    """
+    __slots__ = ('score', 'confidence_label', 'claim_match_score', 'source_reliability_avg',
+                 'cross_source_consistency', 'temporal_relevance')
+    _keys = ('score', 'confidence_label', 'components')
+    
+    def __init__(self, score, confidence_label, claim_match_score, source_reliability_avg,
+                 cross_source_consistency, temporal_relevance):
+        self.score = score
+        self.confidence_label = confidence_label
+        self.claim_match_score = claim_match_score
+        self.source_reliability_avg = source_reliability_avg
+        self.cross_source_consistency = cross_source_consistency
+        self.temporal_relevance = temporal_relevance
+    
+    @property
+    def components(self):
+        return {
+            'claim_match_score': self.claim_match_score,
+            'source_reliability_avg': self.source_reliability_avg,
+            'cross_source_consistency': self.cross_source_consistency,
+            'temporal_relevance': self.temporal_relevance
+        }
+
+class ClaimResult(Model):
+    """
+    Everything the pipeline produced for one claim
+    """
+    __slots__ = ('claim', 'fact_checks', 'evidence', 'score', 'explanation')
+    # Nested models and cached result lists are left for the JSON encoder in
+    # to_dict(), so already-encoded results are not converted again
+    _keys = __slots__
+    
+    def __init__(self, claim, fact_checks, evidence, score, explanation):
+        self.claim = claim
+        self.fact_checks = fact_checks
+        self.evidence = evidence
+        self.score = score
+        self.explanation = explanation
+
+def json_default(value):
+    """
+    default= hook for json.dumps that serializes models
+    """
+    if isinstance(value, Model):
+        return value.to_dict()
+    if isinstance(value, Sequence):
+        return list(value)
+    raise TypeError(f"Object of type {type(value).__name__} is not JSON serializable")
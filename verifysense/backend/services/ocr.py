@@ -1,48 +1,204 @@
+import asyncio
 import os
-import base64
-from google.cloud import vision
-from dotenv import load_dotenv
+import binascii
+from services.cache import CACHE_ENABLED, result_cache
+from services.clients import get_client, register
+from services.config import load_env
+from services.image_preprocessing import prepare_image
+from services.metrics import record_error, timed
+from services.micro_batch import MicroBatcher
+from services.rate_limit import rate_limiter
 
 # Load environment variables
-load_dotenv()
+load_env()
 
+# Concurrent OCR calls are grouped into batch annotate requests. Cloud Vision
+# takes at most 16 images per request
+VISION_BATCH_MAX_SIZE = min(int(os.getenv('VISION_BATCH_MAX_SIZE', '16')), 16)
+VISION_BATCH_WINDOW_MS = float(os.getenv('VISION_BATCH_WINDOW_MS', '20'))
+
+# Send requests to another Vision endpoint over REST without credentials,
+# such as fakes/vision_server.py
+VISION_API_ENDPOINT = os.getenv('VISION_API_ENDPOINT')
+
+def _build_client():
+    # The Vision SDK is only imported once an image needs reading
+    from google.cloud import vision
+    if VISION_API_ENDPOINT:
+        from google.auth.credentials import AnonymousCredentials
+        return vision.ImageAnnotatorClient(
+            transport='rest',
+            credentials=AnonymousCredentials(),
+            client_options={'api_endpoint': VISION_API_ENDPOINT}
+        )
+    return vision.ImageAnnotatorClient()
+
+# The client is thread-safe, so one is shared by all batches
+register('vision', _build_client)
+
+def detect_text_batch(contents):
+    """
+    Read the text of several images with one batch annotate request
+    
+    Args:
+        contents (list): The prepared image bytes
+        
+    Returns:
+        list: The text of each image, or the exception for an image Cloud
+        Vision could not read
+    """
+    from google.cloud import vision
+    
+    # Vision quotas count images, not requests
+    rate_limiter.acquire('vision', len(contents))
+    try:
+        response = get_client('vision').batch_annotate_images(requests=[
+            vision.AnnotateImageRequest(
+                image=vision.Image(content=content),
+                features=[vision.Feature(type_=vision.Feature.Type.TEXT_DETECTION)]
+            )
+            for content in contents
+        ])
+    except Exception as e:
+        rate_limiter.check_error('vision', e)
+        raise
+    
+    results = []
+    for image_response in response.responses:
+        try:
+            results.append(_first_text(image_response))
+        except Exception as e:
+            results.append(e)
+    return results
+
+_batcher = MicroBatcher(detect_text_batch, VISION_BATCH_MAX_SIZE, VISION_BATCH_WINDOW_MS / 1000)
+
+@timed('ocr')
 def extract_text_from_image(image_data):
     """
     Extract text from an image using Google Cloud Vision API
     
     Args:
-        image_data (str): Base64 encoded image data
+        image_data (bytes): Raw image bytes, or base64 encoded image data as a str
         
     Returns:
         str: Extracted text from the image
     """
     try:
         # Check if GOOGLE_APPLICATION_CREDENTIALS is set
-        if not os.getenv('GOOGLE_APPLICATION_CREDENTIALS'):
+        if not VISION_API_ENDPOINT and not os.getenv('GOOGLE_APPLICATION_CREDENTIALS'):
             print("Warning: GOOGLE_APPLICATION_CREDENTIALS not found in environment variables")
             return "Error: Cloud Vision API credentials not configured"
         
-        # Initialize Vision client
-        client = vision.ImageAnnotatorClient()
+        # Downscale the image and look its text up by content
+        image = prepare_image(_image_bytes(image_data))
         
-        # Decode base64 image data
-        if image_data.startswith('data:image'):
-            # Handle data URI format
-            image_data = image_data.split(',')[1]
+        def detect_text():
+            # Perform text detection in the next batch
+            return _batcher.submit(image.content)
         
-        image_content = base64.b64decode(image_data)
-        image = vision.Image(content=image_content)
+        if not CACHE_ENABLED:
+            return detect_text()
+        return result_cache.get_or_fetch('ocr', _cache_key(image), detect_text)
+    
+    except Exception as e:
+        print(f"Error extracting text from image: {e}")
+        record_error('ocr')
+        return f"Error processing image: {str(e)}"
+
+@timed('ocr')
+async def extract_text_from_image_async(image_data):
+    """
+    Extract text from an image using Google Cloud Vision API without blocking a thread
+    
+    Args:
+        image_data (bytes): Raw image bytes, or base64 encoded image data as a str
+        
+    Returns:
+        str: Extracted text from the image
+    """
+    try:
+        # Check if GOOGLE_APPLICATION_CREDENTIALS is set
+        if not VISION_API_ENDPOINT and not os.getenv('GOOGLE_APPLICATION_CREDENTIALS'):
+            print("Warning: GOOGLE_APPLICATION_CREDENTIALS not found in environment variables")
+            return "Error: Cloud Vision API credentials not configured"
         
-        # Perform text detection
-        response = client.text_detection(image=image)
-        texts = response.text_annotations
+        # Decoding and resizing are CPU-bound, so keep them off the event loop
+        image = await asyncio.to_thread(prepare_image, _image_bytes(image_data))
         
-        # Extract full text from the response
-        if texts:
-            return texts[0].description
-        else:
-            return ""
-            
+        async def detect_text():
+            # Perform text detection in the next batch, shared with sync callers
+            return await _batcher.submit_async(image.content)
+        
+        if not CACHE_ENABLED:
+            return await detect_text()
+        return await result_cache.get_or_fetch_async('ocr', _cache_key(image), detect_text)
+    
     except Exception as e:
         print(f"Error extracting text from image: {e}")
-        return f"Error processing image: {str(e)}"
\ No newline at end of file
+        record_error('ocr')
+        return f"Error processing image: {str(e)}"
+
+def _image_bytes(image_data):
+    """
+    Get the raw bytes of an image
+    
+    Args:
+        image_data (bytes): Raw image bytes, or base64 encoded image data as a
+            str, optionally as a data URI
+            
+    Returns:
+        bytes: The image
+    """
+    # Uploaded bytes are passed through as they are
+    if isinstance(image_data, str):
+        # Skip a data URI prefix by offset rather than splitting off a copy
+        start = image_data.find(',') + 1 if image_data.startswith('data:') else 0
+        image_data = binascii.a2b_base64(memoryview(image_data.encode('ascii'))[start:])
+    
+    return image_data
+
+def _cache_key(image):
+    """
+    Get the OCR cache key for a prepared image
+    
+    Args:
+        image (PreparedImage): The image being read
+        
+    Returns:
+        str: The key, from the hash of the image's exact content
+    """
+    return f"ocr:{image.content_hash}"
+
+def _first_text(response):
+    """
+    Get the full text annotation from a text detection response
+    
+    Args:
+        response: A Vision AnnotateImageResponse
+        
+    Returns:
+        str: Extracted text from the image
+        
+    Raises:
+        Exception: If Cloud Vision could not read the image, so the error is not cached
+    """
+    if response.error.message:
+        raise Exception(response.error.message)
+    
+    texts = response.text_annotations
+    
+    # Extract full text from the response
+    if texts:
+        return texts[0].description
+    else:
+        return ""
+
+def get_batching_stats():
+    """
+    Report how many images went to Cloud Vision in how many batch requests
+    
+    Returns:
+        dict: Batch and image counts
+    """
+    return _batcher.stats()
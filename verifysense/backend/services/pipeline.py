@@ -0,0 +1,252 @@
+import asyncio
+import contextvars
+import os
+import time
+import weakref
+from concurrent.futures import ThreadPoolExecutor, wait, FIRST_COMPLETED
+from services.cache import cached_result
+from services.models import ClaimResult
+from services.config import load_env
+from services.metrics import observe
+
+# Load environment variables
+load_env()
+
+# Maximum number of upstream calls (fact check, evidence, explanation) in flight
+# across all requests handled by this process
+MAX_UPSTREAM_CALLS = int(os.getenv('MAX_UPSTREAM_CALLS', '16'))
+
+# Shared executor - its worker count is the global cap on in-flight upstream calls
+_upstream_executor = ThreadPoolExecutor(
+    max_workers=MAX_UPSTREAM_CALLS,
+    thread_name_prefix='upstream'
+)
+
+# Maximum number of async upstream calls in flight per event loop - these cost
+# sockets rather than threads, so the cap can be much higher
+ASYNC_MAX_UPSTREAM_CALLS = int(os.getenv('ASYNC_MAX_UPSTREAM_CALLS', '64'))
+
+# One semaphore per event loop - asyncio primitives cannot be shared across loops
+_async_limits = weakref.WeakKeyDictionary()
+
+# Pipeline stages, in the order each claim passes through them
+FACT_CHECK = 'fact_checks'
+EVIDENCE = 'evidence'
+SCORE = 'score'
+EXPLANATION = 'explanation'
+
+# Metrics stage for each claim's whole pass through the pipeline
+CLAIM = 'claim'
+
+def _submit(func, *args):
+    # Run in a copy of the caller's context, so its rate limit priority and deadline carry over
+    return _upstream_executor.submit(contextvars.copy_context().run, func, *args)
+
+def iter_verification_events(claims, check_facts, get_evidence, calculate_score, generate_explanation, claim_index=None):
+    """
+    Run the verification pipeline for all claims concurrently, yielding each
+    stage's output as soon as it is available
+    
+    Fact checks and evidence for every claim are requested at once. As soon as
+    both are available for a claim it is scored and its explanation is started,
+    without waiting for the other claims.
+    
+    Args:
+        claims (list): The claims to verify
+        check_facts (callable): Returns fact checks for a claim
+        get_evidence (callable): Returns evidence items for a claim
+        calculate_score (callable): Scores a claim from its fact checks and evidence
+        generate_explanation (callable): Explains a scored claim
+        claim_index (SemanticIndex): Optional index of previously verified claims
+            whose cached fact checks and evidence are reused for near-duplicates
+            
+    Yields:
+        tuple: (claim_index, stage, value) where stage is one of FACT_CHECK,
+        EVIDENCE, SCORE or EXPLANATION
+    """
+    results = [{'claim': claim} for claim in claims]
+    pending = {}
+    started = time.perf_counter()
+    
+    def start_explanation(index):
+        result = results[index]
+        result[SCORE] = calculate_score(result['claim'], result[FACT_CHECK], result[EVIDENCE])
+        explanation_future = _submit(
+            generate_explanation,
+            result['claim'],
+            result[FACT_CHECK],
+            result[EVIDENCE],
+            result[SCORE]
+        )
+        pending[explanation_future] = (index, EXPLANATION)
+        return result[SCORE]
+    
+    # Fan out the independent upstream calls for every claim
+    looked_up = []
+    for index, claim in enumerate(claims):
+        if _reuse_near_duplicate(claim_index, results[index], check_facts, get_evidence):
+            yield index, FACT_CHECK, results[index][FACT_CHECK]
+            yield index, EVIDENCE, results[index][EVIDENCE]
+            yield index, SCORE, start_explanation(index)
+            continue
+        looked_up.append(index)
+        pending[_submit(check_facts, claim)] = (index, FACT_CHECK)
+        pending[_submit(get_evidence, claim)] = (index, EVIDENCE)
+    
+    while pending:
+        done, _ = wait(pending, return_when=FIRST_COMPLETED)
+        for future in done:
+            index, stage = pending.pop(future)
+            result = results[index]
+            result[stage] = future.result()
+            yield index, stage, result[stage]
+            if stage == EXPLANATION:
+                observe(CLAIM, time.perf_counter() - started)
+            
+            # Score and start the explanation once both lookups have finished
+            if stage != EXPLANATION and FACT_CHECK in result and EVIDENCE in result:
+                yield index, SCORE, start_explanation(index)
+    
+    _index_claims(claim_index, [results[index] for index in looked_up], check_facts, get_evidence)
+
+def verify_claims(claims, check_facts, get_evidence, calculate_score, generate_explanation, claim_index=None):
+    """
+    Run the verification pipeline for all claims concurrently
+    
+    Args:
+        claims (list): The claims to verify
+        check_facts (callable): Returns fact checks for a claim
+        get_evidence (callable): Returns evidence items for a claim
+        calculate_score (callable): Scores a claim from its fact checks and evidence
+        generate_explanation (callable): Explains a scored claim
+        claim_index (SemanticIndex): Optional index of previously verified claims
+            whose cached fact checks and evidence are reused for near-duplicates
+            
+    Returns:
+        list: One ClaimResult per claim, in the original claim order
+    """
+    results = [{'claim': claim} for claim in claims]
+    events = iter_verification_events(
+        claims,
+        check_facts,
+        get_evidence,
+        calculate_score,
+        generate_explanation,
+        claim_index=claim_index
+    )
+    for index, stage, value in events:
+        results[index][stage] = value
+    
+    return [
+        ClaimResult(result['claim'], result[FACT_CHECK], result[EVIDENCE], result[SCORE], result[EXPLANATION])
+        for result in results
+    ]
+
+async def verify_claims_async(claims, check_facts, get_evidence, calculate_score, generate_explanation, claim_index=None):
+    """
+    Run the verification pipeline for all claims concurrently on the event loop
+    
+    Same contract as verify_claims, but the upstream stages are coroutine
+    functions and in-flight calls are capped by ASYNC_MAX_UPSTREAM_CALLS.
+    
+    Args:
+        claims (list): The claims to verify
+        check_facts (callable): Coroutine function returning fact checks for a claim
+        get_evidence (callable): Coroutine function returning evidence items for a claim
+        calculate_score (callable): Scores a claim from its fact checks and evidence
+        generate_explanation (callable): Coroutine function explaining a scored claim
+        claim_index (SemanticIndex): Optional index of previously verified claims
+            whose cached fact checks and evidence are reused for near-duplicates
+            
+    Returns:
+        list: One ClaimResult per claim, in the original claim order
+    """
+    looked_up = []
+    
+    async def verify_claim(claim):
+        started = time.perf_counter()
+        result = {'claim': claim}
+        if _reuse_near_duplicate(claim_index, result, check_facts, get_evidence):
+            fact_checks, evidence = result[FACT_CHECK], result[EVIDENCE]
+        else:
+            fact_checks, evidence = await asyncio.gather(
+                _limited(check_facts, claim),
+                _limited(get_evidence, claim)
+            )
+            looked_up.append({'claim': claim, FACT_CHECK: fact_checks, EVIDENCE: evidence})
+        
+        score = calculate_score(claim, fact_checks, evidence)
+        explanation = await _limited(generate_explanation, claim, fact_checks, evidence, score)
+        observe(CLAIM, time.perf_counter() - started)
+        
+        return ClaimResult(claim, fact_checks, evidence, score, explanation)
+    
+    results = list(await asyncio.gather(*(verify_claim(claim) for claim in claims)))
+    _index_claims(claim_index, looked_up, check_facts, get_evidence)
+    return results
+
+async def _limited(stage, *args):
+    """
+    Await an upstream stage while holding a slot of the per-loop call limit
+    """
+    loop = asyncio.get_running_loop()
+    limit = _async_limits.get(loop)
+    if limit is None:
+        limit = asyncio.Semaphore(ASYNC_MAX_UPSTREAM_CALLS)
+        _async_limits[loop] = limit
+    
+    async with limit:
+        return await stage(*args)
+
+def _cache_keys(claim, check_facts, get_evidence):
+    """
+    Get the result cache entries a claim's fact checks and evidence are kept under
+    
+    Returns:
+        tuple: ((source, key) for the fact checks, (source, key) for the
+        evidence), or None when the stages are not cached
+    """
+    if not hasattr(check_facts, 'cache_key') or not hasattr(get_evidence, 'cache_key'):
+        return None
+    return (
+        (check_facts.cache_source, check_facts.cache_key(claim)),
+        (get_evidence.cache_source, get_evidence.cache_key(claim))
+    )
+
+def _reuse_near_duplicate(claim_index, result, check_facts, get_evidence):
+    """
+    Fill in a result's fact checks and evidence from a near-duplicate claim
+    
+    The index holds the cache keys of each claim's results rather than the
+    results, so a match is only reused while its results are fresh in the
+    result cache, under each source's TTL.
+    
+    Returns:
+        bool: True if a previously verified claim was similar enough to reuse
+    """
+    # Without cache keys nothing is indexed, so skip embedding the claim
+    if claim_index is None or _cache_keys(result['claim'], check_facts, get_evidence) is None:
+        return False
+    match = claim_index.search(result['claim'])
+    if match is None:
+        return False
+    _, (fact_check_entry, evidence_entry), _ = match
+    fact_checks = cached_result(*fact_check_entry)
+    evidence = cached_result(*evidence_entry)
+    if not fact_checks or not evidence:
+        return False
+    result[FACT_CHECK], result[EVIDENCE] = fact_checks, evidence
+    return True
+
+def _index_claims(claim_index, results, check_facts, get_evidence):
+    # Make freshly looked-up claims available for reuse in one batched insert.
+    # Empty results, including lookups skipped during an outage, are left out
+    if claim_index is None:
+        return
+    found = [result for result in results if result[FACT_CHECK] and result[EVIDENCE]]
+    if not found or _cache_keys(found[0]['claim'], check_facts, get_evidence) is None:
+        return
+    claim_index.add_many(
+        [result['claim'] for result in found],
+        [_cache_keys(result['claim'], check_facts, get_evidence) for result in found]
+    )
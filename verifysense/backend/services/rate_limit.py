@@ -0,0 +1,292 @@
+import asyncio
+import contextlib
+import contextvars
+import os
+import sqlite3
+import threading
+import time
+from services.config import load_env
+
+# Load environment variables
+load_env()
+
+# Priority classes. Interactive requests go first and bulk jobs yield to them
+INTERACTIVE = 0
+BATCH = 1
+
+# Set RATE_LIMIT_ENABLED=false to call the upstream APIs without limits
+RATE_LIMIT_ENABLED = os.getenv('RATE_LIMIT_ENABLED', 'true').lower() == 'true'
+
+def _upstream_limits(prefix, rate, burst):
+    return {
+        # Sustained requests per second, and how many may be sent at once
+        'rate': float(os.getenv(f'{prefix}_RATE_LIMIT', str(rate))),
+        'burst': float(os.getenv(f'{prefix}_BURST', str(burst))),
+        # Requests per UTC day, 0 for no daily quota
+        'daily_quota': int(os.getenv(f'{prefix}_DAILY_QUOTA', '0'))
+    }
+
+# Token bucket settings per upstream API. Vision counts one token per image
+RATE_LIMITS = {
+    'fact_check': _upstream_limits('FACT_CHECK', 10, 20),
+    'custom_search': _upstream_limits('CUSTOM_SEARCH', 5, 10),
+    'gemini': _upstream_limits('GEMINI', 5, 10),
+    'vision': _upstream_limits('VISION', 30, 60)
+}
+
+# Share of each bucket and daily quota that batch callers leave to interactive ones
+RATE_LIMIT_BATCH_RESERVE = float(os.getenv('RATE_LIMIT_BATCH_RESERVE', '0.2'))
+
+# Longest time (seconds) each priority waits for a token before giving up
+RATE_LIMIT_MAX_WAIT = {
+    INTERACTIVE: float(os.getenv('RATE_LIMIT_INTERACTIVE_MAX_WAIT', '2')),
+    BATCH: float(os.getenv('RATE_LIMIT_BATCH_MAX_WAIT', '60'))
+}
+
+# How long (seconds) an upstream is paused after answering 429 without a Retry-After
+RATE_LIMIT_BACKOFF = float(os.getenv('RATE_LIMIT_BACKOFF', '5'))
+
+# 'memory' limits each process on its own, 'sqlite' shares the buckets between
+# all worker processes on the host
+RATE_LIMIT_STORE = os.getenv('RATE_LIMIT_STORE', 'memory').lower()
+RATE_LIMIT_SQLITE_PATH = os.getenv('RATE_LIMIT_SQLITE_PATH', 'verifysense_rate_limits.db')
+
+# Priority of the work running in the current context
+_priority = contextvars.ContextVar('rate_limit_priority', default=INTERACTIVE)
+
+class QuotaExceeded(Exception):
+    """
+    Raised when an upstream call cannot be made within its rate limit or daily quota
+    """
+
+def current_priority():
+    return _priority.get()
+
+@contextlib.contextmanager
+def priority(level):
+    """
+    Run the enclosed calls, and anything they start through the pipeline,
+    at the given priority
+    
+    Args:
+        level (int): INTERACTIVE or BATCH
+    """
+    token = _priority.set(level)
+    try:
+        yield
+    finally:
+        _priority.reset(token)
+
+def _take(state, limits, cost, reserve, now):
+    """
+    Try to take tokens from a bucket
+    
+    Args:
+        state (tuple): (tokens, updated, day, used), or None for a full bucket
+        limits (dict): The upstream's rate, burst and daily_quota
+        cost (int): The number of tokens needed
+        reserve (float): Share of the bucket and daily quota that must be left over
+        now (float): The current time
+        
+    Returns:
+        tuple: (state, wait) where wait is 0 if the tokens were taken, the
+        seconds until they can be, or None if the daily quota is used up
+    """
+    day = int(now // 86400)
+    tokens, updated, state_day, used = state or (limits['burst'], now, day, 0)
+    if state_day != day:
+        used = 0
+    tokens = min(limits['burst'], tokens + (now - updated) * limits['rate'])
+    
+    quota = limits['daily_quota']
+    if quota and used + cost > quota * (1 - reserve):
+        return (tokens, now, day, used), None
+    
+    # A call costing more than the reserve allows may still use the whole bucket
+    floor = max(min(limits['burst'] * reserve, limits['burst'] - cost), 0)
+    if tokens - cost >= floor:
+        return (tokens - cost, now, day, used + cost), 0
+    return (tokens, now, day, used), (floor + cost - tokens) / limits['rate']
+
+def _drain(state, limits, seconds, now):
+    # Empty the bucket and go into debt, so no tokens are available for the given time
+    day = int(now // 86400)
+    tokens, updated, state_day, used = state or (limits['burst'], now, day, 0)
+    tokens = min(limits['burst'], tokens + (now - updated) * limits['rate'])
+    return (min(tokens, 0) - seconds * limits['rate'], now, state_day, used), None
+
+class MemoryStore:
+    """
+    Token buckets shared by the threads of one process
+    """
+    def __init__(self):
+        self._buckets = {}
+        self._lock = threading.Lock()
+    
+    def update(self, name, change):
+        """
+        Atomically replace a bucket's state with change(state)[0]
+        
+        Returns:
+            The second item returned by change
+        """
+        with self._lock:
+            self._buckets[name], result = change(self._buckets.get(name))
+        return result
+
+class SQLiteStore:
+    """
+    Token buckets in an SQLite file, shared by every worker process on the host
+    """
+    def __init__(self, path=RATE_LIMIT_SQLITE_PATH):
+        self._lock = threading.Lock()
+        self._conn = sqlite3.connect(path, check_same_thread=False, isolation_level=None)
+        self._conn.execute('PRAGMA journal_mode=WAL')
+        self._conn.execute(
+            'CREATE TABLE IF NOT EXISTS rate_limits ('
+            'name TEXT PRIMARY KEY, tokens REAL NOT NULL, updated REAL NOT NULL, '
+            'day INTEGER NOT NULL, used INTEGER NOT NULL)'
+        )
+    
+    def update(self, name, change):
+        """
+        Atomically replace a bucket's state with change(state)[0]
+        
+        Returns:
+            The second item returned by change
+        """
+        with self._lock:
+            # Take the write lock before reading, so workers update one at a time
+            self._conn.execute('BEGIN IMMEDIATE')
+            try:
+                row = self._conn.execute(
+                    'SELECT tokens, updated, day, used FROM rate_limits WHERE name = ?',
+                    (name,)
+                ).fetchone()
+                state, result = change(row)
+                self._conn.execute(
+                    'INSERT OR REPLACE INTO rate_limits (name, tokens, updated, day, used) VALUES (?, ?, ?, ?, ?)',
+                    (name, *state)
+                )
+                self._conn.execute('COMMIT')
+            except Exception:
+                self._conn.execute('ROLLBACK')
+                raise
+        return result
+
+class RateLimiter:
+    """
+    Token bucket rate limiter with a bucket and optional daily quota per upstream
+    
+    Batch callers may not take the last RATE_LIMIT_BATCH_RESERVE of a bucket
+    or quota, so bulk jobs slow down before user traffic is affected. A call
+    that cannot get a token within its priority's maximum wait raises
+    QuotaExceeded, and callers degrade to cached or fallback results.
+    """
+    def __init__(self, store, limits=None):
+        self.store = store
+        self.limits = RATE_LIMITS if limits is None else limits
+        self._stats = {}
+        self._stats_lock = threading.Lock()
+    
+    def acquire(self, upstream, cost=1):
+        """
+        Wait until a call to an upstream may be made
+        
+        Args:
+            upstream (str): The upstream name, e.g. 'fact_check' or 'gemini'
+            cost (int): The number of tokens the call uses, at most the upstream's burst
+            
+        Raises:
+            QuotaExceeded: If no token is available in time
+            ValueError: If the cost is more than the bucket can ever hold
+        """
+        for wait in self._waits(upstream, cost):
+            time.sleep(wait)
+    
+    async def acquire_async(self, upstream, cost=1):
+        """
+        Async counterpart of acquire that waits without blocking the event loop
+        """
+        for wait in self._waits(upstream, cost):
+            await asyncio.sleep(wait)
+    
+    def backoff(self, upstream, seconds=None):
+        """
+        Pause an upstream that answered 429, for every caller sharing the store
+        
+        Args:
+            upstream (str): The upstream name
+            seconds (float): How long to pause, RATE_LIMIT_BACKOFF by default
+        """
+        limits = self.limits.get(upstream)
+        if limits is None:
+            return
+        seconds = RATE_LIMIT_BACKOFF if seconds is None else seconds
+        now = time.time()
+        self.store.update(upstream, lambda state: _drain(state, limits, seconds, now))
+        self._count(upstream, 'backoffs')
+    
+    def check_error(self, upstream, error):
+        """
+        Back off if an SDK error is a 429 response
+        """
+        if getattr(error, 'code', None) == 429:
+            self.backoff(upstream)
+    
+    def stats(self):
+        with self._stats_lock:
+            return {upstream: dict(counts) for upstream, counts in self._stats.items()}
+    
+    def _waits(self, upstream, cost):
+        # Yields how long to sleep before each retry, and returns once the tokens are taken
+        limits = self.limits.get(upstream)
+        if limits is None:
+            return
+        # The bucket never holds more than burst tokens, so the call would wait forever
+        if cost > limits['burst']:
+            raise ValueError(f"A {upstream} call costing {cost} tokens exceeds its burst of {limits['burst']:g}")
+        level = current_priority()
+        reserve = RATE_LIMIT_BATCH_RESERVE if level == BATCH else 0
+        deadline = time.monotonic() + RATE_LIMIT_MAX_WAIT[level]
+        while True:
+            now = time.time()
+            wait = self.store.update(upstream, lambda state: _take(state, limits, cost, reserve, now))
+            if wait == 0:
+                self._count(upstream, 'allowed')
+                return
+            if wait is None:
+                self._count(upstream, 'over_quota')
+                raise QuotaExceeded(f"Daily {upstream} quota used up")
+            if time.monotonic() + wait > deadline:
+                self._count(upstream, 'rejected')
+                raise QuotaExceeded(f"{upstream} rate limit reached")
+            self._count(upstream, 'throttled')
+            yield wait
+    
+    def _count(self, upstream, counter):
+        with self._stats_lock:
+            counts = self._stats.setdefault(upstream, {
+                'allowed': 0, 'throttled': 0, 'rejected': 0, 'over_quota': 0, 'backoffs': 0
+            })
+            counts[counter] += 1
+
+def _build_store():
+    if RATE_LIMIT_STORE == 'sqlite':
+        try:
+            return SQLiteStore()
+        except Exception as e:
+            print(f"Error opening rate limit store, limiting each process on its own: {e}")
+    return MemoryStore()
+
+# Rate limiter shared by every service that calls a Google API
+rate_limiter = RateLimiter(_build_store(), RATE_LIMITS if RATE_LIMIT_ENABLED else {})
+
+def get_rate_limit_stats():
+    """
+    Report allowed, throttled and rejected calls per upstream
+    
+    Returns:
+        dict: Counters keyed by upstream
+    """
+    return rate_limiter.stats()
@@ -0,0 +1,60 @@
+import functools
+import os
+import re
+from enum import IntEnum
+from services.config import load_env
+
+# Load environment variables
+load_env()
+
+# Number of distinct rating strings remembered by normalize_rating
+RATING_CACHE_SIZE = int(os.getenv('RATING_CACHE_SIZE', '4096'))
+
+class Rating(IntEnum):
+    """
+    Canonical fact check verdicts, usable as indexes into per-rating arrays
+    """
+    UNRATED = 0
+    FALSE = 1
+    MOSTLY_FALSE = 2
+    MIXED = 3
+    MOSTLY_TRUE = 4
+    TRUE = 5
+
+# Phrases for each verdict. Longer phrases come first in the combined pattern,
+# so "mostly false" and "not accurate" are matched as a whole before "false"
+# or "accurate" can match inside them
+_PHRASES = {
+    Rating.FALSE: ['pants on fire', 'not true', 'not accurate', 'not correct', 'untrue', 'false', 'fake',
+                   'incorrect', 'inaccurate', 'wrong', 'baseless', 'hoax'],
+    Rating.MOSTLY_FALSE: ['mostly false', 'partly false', 'partially false', 'largely false', 'misleading',
+                          'missing context', 'lacks context', 'exaggerated', 'distorted', 'unsupported'],
+    Rating.MIXED: ['half true', 'half-true', 'partly true', 'partially true', 'mixture', 'mixed'],
+    Rating.MOSTLY_TRUE: ['mostly true', 'mostly correct', 'mostly accurate', 'largely true', 'largely accurate'],
+    Rating.TRUE: ['true', 'correct', 'accurate', 'correct attribution']
+}
+
+_VERDICTS = {phrase: rating for rating, phrases in _PHRASES.items() for phrase in phrases}
+_RATING_PATTERN = re.compile(
+    r'\b(?:' + '|'.join(re.escape(phrase) for phrase in sorted(_VERDICTS, key=len, reverse=True)) + r')\b'
+)
+
+@functools.lru_cache(maxsize=RATING_CACHE_SIZE)
+def normalize_rating(rating):
+    """
+    Map a free-text fact check rating to a canonical verdict
+    
+    When a rating names several verdicts, the one named by the longest, most
+    specific phrase is used, and between phrases of the same length the least
+    favourable ("True, but misleading" is mostly false).
+    
+    Args:
+        rating (str): The textual rating from the Fact Check API
+        
+    Returns:
+        Rating: The canonical verdict, or Rating.UNRATED if none is recognised
+    """
+    phrases = [match.group(0) for match in _RATING_PATTERN.finditer((rating or '').lower())]
+    if not phrases:
+        return Rating.UNRATED
+    return min(_VERDICTS[phrase] for phrase in phrases if len(phrase) == max(map(len, phrases)))
@@ -0,0 +1,408 @@
+import asyncio
+import contextlib
+import contextvars
+import functools
+import os
+import threading
+import time
+from collections import deque
+from concurrent.futures import ThreadPoolExecutor, wait, FIRST_COMPLETED
+from services.config import load_env
+from services.metrics import record_upstream
+from services.rate_limit import QuotaExceeded, rate_limiter
+
+# Load environment variables
+load_env()
+
+# Set CIRCUIT_BREAKER_ENABLED=false to always call the upstream APIs
+CIRCUIT_BREAKER_ENABLED = os.getenv('CIRCUIT_BREAKER_ENABLED', 'true').lower() == 'true'
+
+# Consecutive failures that open an upstream's circuit, and how long (seconds)
+# it stays open before a single probe call is let through
+CIRCUIT_FAILURE_THRESHOLD = int(os.getenv('CIRCUIT_FAILURE_THRESHOLD', '5'))
+CIRCUIT_RESET_SECONDS = float(os.getenv('CIRCUIT_RESET_SECONDS', '30'))
+
+# Upstreams whose slow calls are hedged with a second request (comma-separated,
+# e.g. custom_search,gemini). Each hedge costs a rate limit token
+HEDGE_UPSTREAMS = {name.strip() for name in os.getenv('HEDGE_UPSTREAMS', '').split(',') if name.strip()}
+
+# A hedge is sent once a call has taken longer than this percentile of the
+# upstream's recent latencies, and only after HEDGE_MIN_SAMPLES calls were timed
+HEDGE_PERCENTILE = float(os.getenv('HEDGE_PERCENTILE', '95'))
+HEDGE_MIN_SAMPLES = int(os.getenv('HEDGE_MIN_SAMPLES', '20'))
+HEDGE_MIN_DELAY_MS = int(os.getenv('HEDGE_MIN_DELAY_MS', '50'))
+HEDGE_WINDOW_SIZE = int(os.getenv('HEDGE_WINDOW_SIZE', '200'))
+
+# Time budget (seconds) for one verification request, 0 for none
+VERIFY_DEADLINE_SECONDS = float(os.getenv('VERIFY_DEADLINE_SECONDS', '10'))
+
+# Explanations are skipped, and the default one used, when less than this is left
+EXPLANATION_MIN_BUDGET_SECONDS = float(os.getenv('EXPLANATION_MIN_BUDGET_SECONDS', '2'))
+
+# Threads that run sync calls which are hedged or bounded by a deadline
+RESILIENCE_MAX_WORKERS = int(os.getenv('RESILIENCE_MAX_WORKERS', '32'))
+
+_executor = ThreadPoolExecutor(max_workers=RESILIENCE_MAX_WORKERS, thread_name_prefix='guarded')
+
+# Monotonic time by which the work in the current context must finish
+_deadline = contextvars.ContextVar('deadline', default=None)
+
+class CircuitOpen(Exception):
+    """
+    Raised instead of calling an upstream whose circuit breaker is open
+    """
+
+class DeadlineExceeded(TimeoutError):
+    """
+    Raised when an upstream call does not finish before the request's deadline
+    """
+
+# Errors that mean an upstream was skipped rather than that it failed. Callers
+# degrade to cached or fallback results and do not cache them
+UPSTREAM_UNAVAILABLE = (QuotaExceeded, CircuitOpen, DeadlineExceeded)
+
+@contextlib.contextmanager
+def deadline(seconds=VERIFY_DEADLINE_SECONDS):
+    """
+    Give the enclosed calls, and anything they start through the pipeline,
+    a time budget. An enclosing, earlier deadline is kept.
+    
+    Args:
+        seconds (float): The budget, or 0 for none
+    """
+    expires = time.monotonic() + seconds if seconds else None
+    current = _deadline.get()
+    if current is not None and (expires is None or current < expires):
+        expires = current
+    token = _deadline.set(expires)
+    try:
+        yield
+    finally:
+        _deadline.reset(token)
+
+def time_left():
+    """
+    Seconds left before the current context's deadline
+    
+    Returns:
+        float: The remaining budget (at least 0), or None without a deadline
+    """
+    expires = _deadline.get()
+    if expires is None:
+        return None
+    return max(expires - time.monotonic(), 0)
+
+def has_budget(seconds):
+    """
+    Check whether at least the given time is left before the deadline
+    """
+    remaining = time_left()
+    return remaining is None or remaining >= seconds
+
+class CircuitBreaker:
+    """
+    Fail fast after an upstream keeps failing
+    
+    After CIRCUIT_FAILURE_THRESHOLD consecutive failures the circuit opens and
+    calls raise CircuitOpen for CIRCUIT_RESET_SECONDS. Then one probe call is
+    let through at a time: a success closes the circuit, a failure reopens it.
+    """
+    CLOSED = 'closed'
+    OPEN = 'open'
+    HALF_OPEN = 'half_open'
+    
+    def __init__(self, name, failure_threshold=CIRCUIT_FAILURE_THRESHOLD, reset_seconds=CIRCUIT_RESET_SECONDS):
+        self.name = name
+        self.failure_threshold = failure_threshold
+        self.reset_seconds = reset_seconds
+        self.state = self.CLOSED
+        self._failures = 0
+        self._opened_at = 0
+        self._probe_started = None
+        self._lock = threading.Lock()
+        self._stats = {'failures': 0, 'opened': 0, 'short_circuited': 0}
+    
+    def check(self):
+        """
+        Raise CircuitOpen unless a call may be made now
+        """
+        with self._lock:
+            if self.state == self.CLOSED:
+                return
+            now = time.monotonic()
+            if self.state == self.OPEN and now - self._opened_at >= self.reset_seconds:
+                self.state = self.HALF_OPEN
+                self._probe_started = None
+            # A probe that never reported back is replaced after the reset time
+            if self.state == self.HALF_OPEN and (
+                    self._probe_started is None or now - self._probe_started >= self.reset_seconds):
+                self._probe_started = now
+                return
+            self._stats['short_circuited'] += 1
+        raise CircuitOpen(f"{self.name} circuit is open")
+    
+    def record_success(self):
+        with self._lock:
+            self.state = self.CLOSED
+            self._failures = 0
+    
+    def record_failure(self):
+        with self._lock:
+            self._failures += 1
+            self._stats['failures'] += 1
+            if self.state == self.HALF_OPEN or (
+                    self.state == self.CLOSED and self._failures >= self.failure_threshold):
+                self.state = self.OPEN
+                self._opened_at = time.monotonic()
+                self._stats['opened'] += 1
+    
+    def stats(self):
+        with self._lock:
+            return {'state': self.state, **self._stats}
+
+class LatencyWindow:
+    """
+    Latencies of an upstream's most recent successful calls
+    """
+    def __init__(self, size=HEDGE_WINDOW_SIZE):
+        self._samples = deque(maxlen=size)
+        self._lock = threading.Lock()
+    
+    def record(self, seconds):
+        with self._lock:
+            self._samples.append(seconds)
+    
+    def percentile(self, percent, min_samples=HEDGE_MIN_SAMPLES):
+        """
+        Returns:
+            float: The latency below which the given percent of calls finished,
+            or None if fewer than min_samples calls were timed
+        """
+        with self._lock:
+            samples = sorted(self._samples)
+        if not samples or len(samples) < min_samples:
+            return None
+        return samples[min(int(len(samples) * percent / 100), len(samples) - 1)]
+
+class _Upstream:
+    def __init__(self, name):
+        self.breaker = CircuitBreaker(name)
+        self.latency = LatencyWindow()
+        self.hedges = 0
+        self.hedge_wins = 0
+        self.deadline_exceeded = 0
+
+_upstreams = {}
+_upstreams_lock = threading.Lock()
+
+def _get_upstream(name):
+    upstream = _upstreams.get(name)
+    if upstream is None:
+        with _upstreams_lock:
+            upstream = _upstreams.setdefault(name, _Upstream(name))
+    return upstream
+
+def hedge_delay(name):
+    """
+    How long to wait for a call to an upstream before hedging it
+    
+    Returns:
+        float: Seconds, or None if the upstream's calls are not hedged (yet)
+    """
+    if name not in HEDGE_UPSTREAMS:
+        return None
+    delay = _get_upstream(name).latency.percentile(HEDGE_PERCENTILE)
+    if delay is None:
+        return None
+    return max(delay, HEDGE_MIN_DELAY_MS / 1000)
+
+def call_guarded(name, func, *args, is_failure=None, **kwargs):
+    """
+    Call an upstream behind its circuit breaker and rate limit, hedging slow
+    calls and giving up at the current deadline
+    
+    Args:
+        name (str): The upstream name, e.g. 'custom_search' or 'gemini'
+        func (callable): Makes the call, with the remaining arguments
+        is_failure (callable): Tells whether a returned result is a failure,
+            e.g. a 5xx response
+            
+    Returns:
+        The result of the first call to succeed
+        
+    Raises:
+        CircuitOpen: If the upstream's circuit is open
+        DeadlineExceeded: If no call finished before the deadline
+        QuotaExceeded: If the upstream's rate limit leaves no room for the call
+    """
+    upstream = _get_upstream(name)
+    _check_available(name, upstream)
+    delay = hedge_delay(name)
+    timeout = time_left()
+    if delay is None and timeout is None:
+        return _attempt(name, upstream, func, args, kwargs, is_failure)
+    
+    # Set once the result is no longer wanted, so attempts still queued or
+    # waiting for a rate limit token give up before calling the upstream
+    abandoned = threading.Event()
+    attempt = functools.partial(_attempt, name, upstream, func, args, kwargs, is_failure, abandoned)
+    started = time.monotonic()
+    expires = None if timeout is None else started + timeout
+    pending = {_executor.submit(contextvars.copy_context().run, attempt)}
+    primary = next(iter(pending))
+    error = None
+    try:
+        while pending:
+            wait_for = _remaining(expires, delay)
+            done, pending = wait(pending, timeout=wait_for, return_when=FIRST_COMPLETED)
+            for future in done:
+                if future.exception() is None:
+                    if future is not primary:
+                        upstream.hedge_wins += 1
+                    return future.result()
+                error = error or future.exception()
+            if not done:
+                if delay is not None and not _expired(expires):
+                    # The call is slower than usual - race a second one against it
+                    upstream.hedges += 1
+                    pending.add(_executor.submit(contextvars.copy_context().run, attempt))
+                    delay = None
+                else:
+                    _record_timeout(name, upstream, time.monotonic() - started)
+                    raise DeadlineExceeded(f"{name} call did not finish before the deadline")
+        raise error
+    finally:
+        abandoned.set()
+        for future in pending:
+            future.cancel()
+
+async def call_guarded_async(name, func, *args, is_failure=None, **kwargs):
+    """
+    Async counterpart of call_guarded where func is a coroutine function.
+    Calls that lose a hedge race or pass the deadline are cancelled.
+    """
+    upstream = _get_upstream(name)
+    _check_available(name, upstream)
+    delay = hedge_delay(name)
+    timeout = time_left()
+    if delay is None and timeout is None:
+        return await _attempt_async(name, upstream, func, args, kwargs, is_failure)
+    
+    started = time.monotonic()
+    expires = None if timeout is None else started + timeout
+    primary = asyncio.ensure_future(_attempt_async(name, upstream, func, args, kwargs, is_failure))
+    pending = {primary}
+    error = None
+    try:
+        while pending:
+            done, pending = await asyncio.wait(
+                pending,
+                timeout=_remaining(expires, delay),
+                return_when=asyncio.FIRST_COMPLETED
+            )
+            for task in done:
+                if task.exception() is None:
+                    if task is not primary:
+                        upstream.hedge_wins += 1
+                    return task.result()
+                error = error or task.exception()
+            if not done:
+                if delay is not None and not _expired(expires):
+                    upstream.hedges += 1
+                    pending.add(asyncio.ensure_future(_attempt_async(name, upstream, func, args, kwargs, is_failure)))
+                    delay = None
+                else:
+                    _record_timeout(name, upstream, time.monotonic() - started)
+                    raise DeadlineExceeded(f"{name} call did not finish before the deadline")
+        raise error
+    finally:
+        for task in pending:
+            task.cancel()
+
+def _check_available(name, upstream):
+    if CIRCUIT_BREAKER_ENABLED:
+        upstream.breaker.check()
+    if time_left() == 0:
+        upstream.deadline_exceeded += 1
+        raise DeadlineExceeded(f"No time left to call {name}")
+
+def _remaining(expires, delay):
+    # Wait until the hedge is due or the deadline passes, whichever is first
+    remaining = None if expires is None else max(expires - time.monotonic(), 0)
+    if delay is None:
+        return remaining
+    return delay if remaining is None else min(delay, remaining)
+
+def _expired(expires):
+    return expires is not None and time.monotonic() >= expires
+
+def _check_wanted(name, abandoned=None):
+    # Attempts that start after the deadline, or after the caller moved on,
+    # use no rate limit tokens and make no call
+    if time_left() == 0 or (abandoned is not None and abandoned.is_set()):
+        raise DeadlineExceeded(f"{name} call was no longer needed")
+
+def _attempt(name, upstream, func, args, kwargs, is_failure, abandoned=None):
+    _check_wanted(name, abandoned)
+    rate_limiter.acquire(name)
+    _check_wanted(name, abandoned)
+    started = time.monotonic()
+    try:
+        result = func(*args, **kwargs)
+    except Exception:
+        _record_failure(name, upstream, time.monotonic() - started)
+        raise
+    _record(name, upstream, result, is_failure, time.monotonic() - started)
+    return result
+
+async def _attempt_async(name, upstream, func, args, kwargs, is_failure):
+    _check_wanted(name)
+    await rate_limiter.acquire_async(name)
+    _check_wanted(name)
+    started = time.monotonic()
+    try:
+        result = await func(*args, **kwargs)
+    except asyncio.CancelledError:
+        raise
+    except Exception:
+        _record_failure(name, upstream, time.monotonic() - started)
+        raise
+    _record(name, upstream, result, is_failure, time.monotonic() - started)
+    return result
+
+def _record(name, upstream, result, is_failure, seconds):
+    if is_failure is not None and is_failure(result):
+        _record_failure(name, upstream, seconds)
+    else:
+        upstream.breaker.record_success()
+        upstream.latency.record(seconds)
+        record_upstream(name, seconds)
+
+def _record_timeout(name, upstream, seconds):
+    # A call still running at the deadline counts against the circuit, so an
+    # upstream that hangs rather than erroring still trips its breaker
+    upstream.deadline_exceeded += 1
+    upstream.breaker.record_failure()
+    record_upstream(name, seconds, failed=True)
+
+def _record_failure(name, upstream, seconds):
+    upstream.breaker.record_failure()
+    record_upstream(name, seconds, failed=True)
+
+def get_resilience_stats():
+    """
+    Report circuit state, hedges and deadline misses per upstream
+    
+    Returns:
+        dict: Counters keyed by upstream
+    """
+    stats = {}
+    for name, upstream in list(_upstreams.items()):
+        stats[name] = {
+            'circuit': upstream.breaker.stats(),
+            'hedge_delay': hedge_delay(name),
+            'hedges': upstream.hedges,
+            'hedge_wins': upstream.hedge_wins,
+            'deadline_exceeded': upstream.deadline_exceeded
+        }
+    return stats
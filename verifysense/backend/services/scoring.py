@@ -1,3 +1,26 @@
+import numpy as np
+from services.ratings import Rating, normalize_rating
+from services.domain_reliability import TIER_SCORES
+from services.metrics import timed
+from services.models import Score
+
+# Claim match score for each canonical fact check verdict
+CLAIM_MATCH_SCORES = {
+    Rating.FALSE: 20,
+    Rating.MOSTLY_FALSE: 30,
+    Rating.MIXED: 50,
+    Rating.MOSTLY_TRUE: 70,
+    Rating.TRUE: 90
+}
+_CLAIM_MATCH_BY_RATING = np.array([CLAIM_MATCH_SCORES.get(rating, 0) for rating in Rating])
+
+# Reliability codes for batch scoring and the score each tier contributes
+RELIABILITY_LOW, RELIABILITY_MEDIUM, RELIABILITY_HIGH = range(3)
+RELIABILITY_SCORES = np.array([TIER_SCORES['low'], TIER_SCORES['medium'], TIER_SCORES['high']])
+
+CONFIDENCE_LABELS = np.array(['Likely True', 'Likely False', 'Mixed / Needs Verification'])
+
+@timed('score')
 def calculate_score(claim, fact_checks, evidence):
     """
     Calculate a credibility score for a claim based on fact checks and evidence
@@ -8,7 +31,7 @@ def calculate_score(claim, fact_checks, evidence):
         evidence (list): List of evidence items from web search
         
     Returns:
-        dict: Score information including numerical score and confidence label
+        Score: Score information including numerical score and confidence label
     """
     # Initialize score components
     claim_match_score = 0
@@ -21,21 +44,14 @@ def calculate_score(claim, fact_checks, evidence):
         # If we have fact checks, they're direct matches, so high score
         claim_match_score = 80
         
-        # Adjust based on ratings if available
-        for check in fact_checks:
-            rating = check.get('rating', '').lower()
-            
-            # Adjust score based on fact check rating
-            if 'false' in rating or 'pants on fire' in rating:
-                claim_match_score = 20  # Likely false
-            elif 'mostly false' in rating or 'misleading' in rating:
-                claim_match_score = 30
-            elif 'half true' in rating or 'mixture' in rating or 'mixed' in rating:
-                claim_match_score = 50
-            elif 'mostly true' in rating:
-                claim_match_score = 70
-            elif 'true' in rating:
-                claim_match_score = 90
+        # Adjust based on the average of the recognised ratings
+        rated_scores = [
+            CLAIM_MATCH_SCORES[rating]
+            for rating in (normalize_rating(check.get('rating', '')) for check in fact_checks)
+            if rating != Rating.UNRATED
+        ]
+        if rated_scores:
+            claim_match_score = sum(rated_scores) / len(rated_scores)
     else:
         # No fact checks found, neutral score
         claim_match_score = 50
@@ -44,12 +60,7 @@ def calculate_score(claim, fact_checks, evidence):
     if evidence:
         reliability_sum = 0
         for item in evidence:
-            if item.get('reliability') == 'high':
-                reliability_sum += 80
-            elif item.get('reliability') == 'medium':
-                reliability_sum += 50
-            else:
-                reliability_sum += 30
+            reliability_sum += reliability_score(item)
         
         source_reliability_avg = reliability_sum / len(evidence)
     else:
@@ -97,13 +108,134 @@ def calculate_score(claim, fact_checks, evidence):
     else:
         confidence_label = 'Mixed / Needs Verification'
     
+    return Score(
+        final_score,
+        confidence_label,
+        claim_match_score,
+        source_reliability_avg,
+        cross_source_consistency,
+        temporal_relevance
+    )
+
+def reliability_score(item):
+    """
+    Get the graded reliability of an evidence item's source
+    
+    Args:
+        item (dict): An evidence item
+        
+    Returns:
+        int: The domain's score, or its tier's score for items without one
+    """
+    score = item.get('reliability_score')
+    if score is None:
+        score = TIER_SCORES.get(item.get('reliability'), TIER_SCORES['low'])
+    return score
+
+def encode_records(records):
+    """
+    Convert (fact_checks, evidence) records into the columnar arrays used by
+    calculate_scores
+    
+    Args:
+        records (iterable): (fact_checks, evidence) pairs as passed to calculate_score
+        
+    Returns:
+        dict: rating_codes (Rating values) for every fact check, reliability_codes
+        and reliability_scores for every evidence item, and fact_check_counts and
+        evidence_counts per record
+    """
+    reliability_codes = {'high': RELIABILITY_HIGH, 'medium': RELIABILITY_MEDIUM}
+    ratings = []
+    reliabilities = []
+    scores = []
+    fact_check_counts = []
+    evidence_counts = []
+    for fact_checks, evidence in records:
+        ratings.extend(normalize_rating(check.get('rating', '')) for check in fact_checks)
+        reliabilities.extend(reliability_codes.get(item.get('reliability'), RELIABILITY_LOW) for item in evidence)
+        scores.extend(reliability_score(item) for item in evidence)
+        fact_check_counts.append(len(fact_checks))
+        evidence_counts.append(len(evidence))
+    
+    return {
+        'rating_codes': np.array(ratings, dtype=np.int8),
+        'fact_check_counts': np.array(fact_check_counts, dtype=np.int64),
+        'reliability_codes': np.array(reliabilities, dtype=np.int8),
+        'reliability_scores': np.array(scores, dtype=np.int64),
+        'evidence_counts': np.array(evidence_counts, dtype=np.int64)
+    }
+
+def calculate_scores(rating_codes, fact_check_counts, reliability_codes, evidence_counts, reliability_scores=None):
+    """
+    Score many claims at once from columnar arrays
+    
+    Gives exactly the scores, labels and components calculate_score gives for
+    each record.
+    
+    Args:
+        rating_codes (numpy.ndarray): Rating of every fact check, grouped by record
+        fact_check_counts (numpy.ndarray): Number of fact checks in each record
+        reliability_codes (numpy.ndarray): RELIABILITY_* code of every evidence item, grouped by record
+        evidence_counts (numpy.ndarray): Number of evidence items in each record
+        reliability_scores (numpy.ndarray): Integer score of every evidence item,
+            defaulting to the score of its tier
+            
+    Returns:
+        dict: Arrays of score, confidence_label and each score component
+    """
+    fact_check_counts = np.asarray(fact_check_counts)
+    evidence_counts = np.asarray(evidence_counts)
+    records = len(fact_check_counts)
+    
+    # ClaimMatchScore: the average over recognised ratings, otherwise 80 for
+    # any fact check and 50 for none
+    rating_codes = np.asarray(rating_codes)
+    check_ends = np.cumsum(fact_check_counts)
+    check_starts = check_ends - fact_check_counts
+    rated_totals = np.concatenate([[0], np.cumsum(_CLAIM_MATCH_BY_RATING[rating_codes])])
+    rated_counts = np.concatenate([[0], np.cumsum(rating_codes != Rating.UNRATED)])
+    rated_sum = rated_totals[check_ends] - rated_totals[check_starts]
+    rated_count = rated_counts[check_ends] - rated_counts[check_starts]
+    claim_match_score = np.where(
+        rated_count > 0,
+        rated_sum / np.maximum(rated_count, 1),
+        np.where(fact_check_counts > 0, 80, 50)
+    )
+    
+    # SourceReliabilityAvg and CrossSourceConsistency, also from running totals
+    reliability_codes = np.asarray(reliability_codes)
+    if reliability_scores is None:
+        reliability_scores = RELIABILITY_SCORES[reliability_codes]
+    item_ends = np.cumsum(evidence_counts)
+    item_starts = item_ends - evidence_counts
+    reliability_totals = np.concatenate([[0], np.cumsum(reliability_scores)])
+    reliability_sum = reliability_totals[item_ends] - reliability_totals[item_starts]
+    source_reliability_avg = np.where(evidence_counts > 0, reliability_sum / np.maximum(evidence_counts, 1), 50.0)
+    high_totals = np.concatenate([[0], np.cumsum(reliability_codes == RELIABILITY_HIGH)])
+    high_reliability_count = high_totals[item_ends] - high_totals[item_starts]
+    cross_source_consistency = 50 + 10 * np.minimum(high_reliability_count, 3)
+    
+    temporal_relevance = np.full(records, 70)
+    
+    # Per-record sums are differences of integer running totals, and the
+    # operation order matches calculate_score, so the floats round identically
+    final_score = np.round(
+        claim_match_score * 0.4 +
+        source_reliability_avg * 0.3 +
+        cross_source_consistency * 0.2 +
+        temporal_relevance * 0.1
+    ).astype(np.int64)
+    
+    label_codes = np.where(final_score >= 70, 0, np.where(final_score <= 40, 1, 2))
+    
     return {
         'score': final_score,
-        'confidence_label': confidence_label,
+        'confidence_label': CONFIDENCE_LABELS[label_codes],
         'components': {
             'claim_match_score': claim_match_score,
             'source_reliability_avg': source_reliability_avg,
             'cross_source_consistency': cross_source_consistency,
             'temporal_relevance': temporal_relevance
         }
-    }
\ No newline at end of file
+    }
@@ -0,0 +1,284 @@
+import os
+import threading
+import zlib
+import numpy as np
+from services.cache import normalize_claim
+from services.config import load_env
+
+# Load environment variables
+load_env()
+
+# Set SEMANTIC_CACHE_ENABLED=true to reuse cached results for near-duplicate claims
+SEMANTIC_CACHE_ENABLED = os.getenv('SEMANTIC_CACHE_ENABLED', 'false').lower() == 'true'
+
+# Minimum cosine similarity for two claims to count as the same claim
+SEMANTIC_CACHE_THRESHOLD = float(os.getenv('SEMANTIC_CACHE_THRESHOLD', '0.85'))
+
+# Maximum number of claims kept in the index. A full index is emptied and
+# refilled with newly verified claims
+SEMANTIC_CACHE_MAX_CLAIMS = int(os.getenv('SEMANTIC_CACHE_MAX_CLAIMS', '1000000'))
+
+# Embedding dimensions (a power of two) and the byte n-gram sizes hashed into them
+EMBEDDING_BITS = 8
+EMBEDDING_DIM = 1 << EMBEDDING_BITS
+NGRAM_SIZES = (3, 4, 5)
+
+# Below this many claims a brute-force scan is faster than the LSH tables,
+# which are built once the index grows past it
+BRUTE_FORCE_LIMIT = 20000
+
+# Random-hyperplane LSH: each table hashes a vector to LSH_BITS sign bits.
+# Every table has a directory entry per bucket, LSH_TABLES << LSH_BITS in all
+LSH_TABLES = int(os.getenv('SEMANTIC_CACHE_LSH_TABLES', '40'))
+LSH_BITS = int(os.getenv('SEMANTIC_CACHE_LSH_BITS', '16'))
+
+# Newly added claims are merged into the sorted LSH tables in batches of this size
+LSH_MERGE_BATCH = 4096
+
+# Upper bound on candidates scored exactly per search
+MAX_CANDIDATES = 256
+
+# Buckets larger than this hold claims made of very common words and are skipped
+MAX_BUCKET_SIZE = 2048
+
+# Rolling hash multiplier and the Fibonacci-hashing constant used to mix hashes
+_NGRAM_PRIME = np.uint64(1099511628211)
+_MIX = np.uint64(0x9E3779B97F4A7C15)
+
+def embed(texts):
+    """
+    Embed claims as hashed n-gram vectors
+    
+    Every word and byte n-gram of the normalized claim is hashed to a signed
+    bucket, and the resulting vectors are L2-normalized so a dot product is
+    cosine similarity. The n-grams of the whole batch are hashed at once.
+    
+    Args:
+        texts (list): The claims to embed
+        
+    Returns:
+        numpy.ndarray: A (len(texts), EMBEDDING_DIM) float32 array
+    """
+    encoded = [f" {normalize_claim(text)} ".encode('utf-8') for text in texts]
+    lengths = np.fromiter(map(len, encoded), dtype=np.int64, count=len(encoded))
+    data = np.frombuffer(b''.join(encoded), dtype=np.uint8).astype(np.uint64)
+    row_of = np.repeat(np.arange(len(encoded)), lengths)
+    
+    rows = []
+    hashes = []
+    for n in NGRAM_SIZES:
+        count = len(data) - n + 1
+        if count <= 0:
+            continue
+        ngram_hashes = np.zeros(count, dtype=np.uint64)
+        for k in range(n):
+            ngram_hashes = ngram_hashes * _NGRAM_PRIME + data[k:k + count]
+        # Drop n-grams that span two claims
+        valid = row_of[:count] == row_of[n - 1:]
+        rows.append(row_of[:count][valid])
+        hashes.append(ngram_hashes[valid])
+    
+    word_rows = []
+    word_hashes = []
+    for row, text in enumerate(encoded):
+        words = text.split()
+        word_rows.extend([row] * len(words))
+        word_hashes.extend(map(zlib.crc32, words))
+    rows.append(np.array(word_rows, dtype=np.int64))
+    hashes.append(np.array(word_hashes, dtype=np.uint64))
+    
+    rows = np.concatenate(rows)
+    hashes = np.concatenate(hashes) * _MIX
+    
+    # Top bits pick the bucket, the next bit picks the sign
+    buckets = rows * EMBEDDING_DIM + (hashes >> np.uint64(64 - EMBEDDING_BITS)).astype(np.int64)
+    signs = np.where((hashes >> np.uint64(63 - EMBEDDING_BITS)) & np.uint64(1), -1.0, 1.0)
+    vectors = np.bincount(buckets, weights=signs, minlength=len(encoded) * EMBEDDING_DIM)
+    vectors = vectors.reshape(len(encoded), EMBEDDING_DIM).astype(np.float32)
+    
+    norms = np.linalg.norm(vectors, axis=1, keepdims=True)
+    norms[norms == 0] = 1.0
+    return vectors / norms
+
+class SemanticIndex:
+    """
+    Similarity index over previously verified claims
+    
+    Vectors are stored as int8 rows with a float32 scale per row, which keeps
+    1M claims in about 260MB, plus 160MB for the LSH tables. Small indexes are scanned brute force. Larger
+    ones are searched through random-hyperplane LSH tables, kept as claim IDs
+    sorted by bucket with a directory of where each bucket starts, plus a
+    small unsorted tail of recent inserts. Only the candidates are scored
+    exactly.
+    
+    The hyperplanes are centered on the mean of the claims indexed when the
+    tables are built. Claims share many common words, so uncentered
+    hyperplanes put most of them on the same side and into a few huge buckets.
+    """
+    def __init__(self, threshold=SEMANTIC_CACHE_THRESHOLD, max_claims=SEMANTIC_CACHE_MAX_CLAIMS, seed=0):
+        self.threshold = threshold
+        self.max_claims = max_claims
+        self._vectors = np.zeros((1024, EMBEDDING_DIM), dtype=np.int8)
+        self._scales = np.zeros(1024, dtype=np.float32)
+        self._claims = []
+        self._payloads = []
+        self._planes = np.random.default_rng(seed).standard_normal(
+            (EMBEDDING_DIM, LSH_TABLES * LSH_BITS)
+        ).astype(np.float32)
+        self._bit_weights = (1 << np.arange(LSH_BITS, dtype=np.int64))
+        self._table_offsets = np.arange(LSH_TABLES, dtype=np.int64) << LSH_BITS
+        self._clear()
+        self._lock = threading.Lock()
+    
+    def __len__(self):
+        return len(self._claims)
+    
+    def _keys(self, vectors):
+        # One key per LSH table for each vector, unique across the tables
+        bits = ((vectors - self._center) @ self._planes > 0).reshape(len(vectors), LSH_TABLES, LSH_BITS)
+        return bits.astype(np.int64) @ self._bit_weights + self._table_offsets
+    
+    def add_many(self, claims, payloads):
+        """
+        Add a batch of verified claims to the index
+        
+        Args:
+            claims (list): The claim texts
+            payloads (list): What to reuse for each claim, such as the cache
+                keys of its results
+        """
+        with self._lock:
+            claims, payloads = list(claims)[-self.max_claims:], list(payloads)[-self.max_claims:]
+            if not claims:
+                return
+            if len(self._claims) + len(claims) > self.max_claims:
+                # Start over when full. Older entries point at cached results
+                # that have mostly expired by then, and newly verified claims
+                # are the likeliest to be seen again
+                self._clear()
+            
+            vectors = embed(claims)
+            start = len(self._claims)
+            end = start + len(claims)
+            if end > len(self._vectors):
+                capacity = min(max(end, len(self._vectors) * 2), self.max_claims)
+                grown = np.zeros((capacity, EMBEDDING_DIM), dtype=np.int8)
+                grown[:start] = self._vectors[:start]
+                self._vectors = grown
+                grown_scales = np.zeros(capacity, dtype=np.float32)
+                grown_scales[:start] = self._scales[:start]
+                self._scales = grown_scales
+            
+            # Quantize each row to int8 against its largest component
+            scales = np.abs(vectors).max(axis=1) / 127
+            scales[scales == 0] = 1.0
+            self._vectors[start:end] = np.round(vectors / scales[:, np.newaxis])
+            self._scales[start:end] = scales
+            self._claims.extend(claims)
+            self._payloads.extend(payloads)
+            
+            if self._center is not None:
+                # Hash the stored rows, like _build_tables, so a claim gets the
+                # same keys whichever way it was added
+                stored = self._vectors[start:end] * self._scales[start:end, np.newaxis]
+                self._tail = np.concatenate([self._tail, self._keys(stored)])
+                if len(self._tail) >= LSH_MERGE_BATCH:
+                    self._merge_tail()
+            elif end > BRUTE_FORCE_LIMIT:
+                self._build_tables()
+    
+    def _clear(self):
+        # Callers hold _lock, apart from __init__
+        self._claims = []
+        self._payloads = []
+        self._center = None
+        self._bucket_starts = None
+        self._table_ids = np.empty(0, dtype=np.int32)
+        self._tail = np.empty((0, LSH_TABLES), dtype=np.int64)
+    
+    def _build_tables(self):
+        # Center the hyperplanes on the claims indexed so far and hash them all
+        size = len(self._claims)
+        chunks = range(0, size, 65536)
+        self._center = sum(
+            self._scales[low:low + 65536] @ self._vectors[low:low + 65536] for low in chunks
+        ).astype(np.float32) / size
+        keys = np.concatenate([
+            self._keys(self._vectors[low:low + 65536] * self._scales[low:low + 65536, np.newaxis])
+            for low in chunks
+        ]).ravel()
+        self._bucket_starts = np.zeros((LSH_TABLES << LSH_BITS) + 1, dtype=np.int64)
+        np.cumsum(np.bincount(keys, minlength=LSH_TABLES << LSH_BITS), out=self._bucket_starts[1:])
+        self._table_ids = (np.argsort(keys, kind='stable') // LSH_TABLES).astype(np.int32)
+    
+    def _merge_tail(self):
+        # Append the tail claims to the end of their buckets in one linear pass
+        first_id = len(self._claims) - len(self._tail)
+        new_keys = self._tail.ravel()
+        order = np.argsort(new_keys, kind='stable')
+        positions = self._bucket_starts[new_keys[order] + 1]
+        self._table_ids = np.insert(self._table_ids, positions, (order // LSH_TABLES + first_id).astype(np.int32))
+        self._bucket_starts[1:] += np.cumsum(np.bincount(new_keys, minlength=LSH_TABLES << LSH_BITS))
+        self._tail = np.empty((0, LSH_TABLES), dtype=np.int64)
+    
+    def _candidates(self, query):
+        keys = self._keys(query[np.newaxis])[0]
+        lows = self._bucket_starts[keys].tolist()
+        highs = self._bucket_starts[keys + 1].tolist()
+        matches = [
+            self._table_ids[low:high]
+            for low, high in zip(lows, highs)
+            if 0 < high - low <= MAX_BUCKET_SIZE
+        ]
+        
+        tail_hits = np.flatnonzero((self._tail == keys).any(axis=1))
+        if len(tail_hits):
+            first_id = len(self._claims) - len(self._tail)
+            matches.append((tail_hits + first_id).astype(np.int32))
+        
+        if not matches:
+            return np.empty(0, dtype=np.int32)
+        
+        candidates, collisions = np.unique(np.concatenate(matches), return_counts=True)
+        if len(candidates) > MAX_CANDIDATES:
+            # Keep the claims that collide with the query in the most tables
+            keep = np.argpartition(-collisions, MAX_CANDIDATES)[:MAX_CANDIDATES]
+            candidates = candidates[keep]
+        return candidates
+    
+    def search(self, claim):
+        """
+        Find the most similar previously verified claim
+        
+        Args:
+            claim (str): The claim to look up
+            
+        Returns:
+            tuple: (matched_claim, payload, similarity), or None if nothing is
+            above the threshold
+        """
+        query = embed([claim])[0]
+        with self._lock:
+            size = len(self._claims)
+            if size == 0:
+                return None
+            
+            if self._center is None:
+                candidates = None
+                similarities = (self._vectors[:size] @ query) * self._scales[:size]
+            else:
+                candidates = self._candidates(query)
+                if not len(candidates):
+                    return None
+                similarities = (self._vectors[candidates] @ query) * self._scales[candidates]
+            
+            best = int(np.argmax(similarities))
+            similarity = float(similarities[best])
+            if similarity < self.threshold:
+                return None
+            
+            index = best if candidates is None else int(candidates[best])
+            return self._claims[index], self._payloads[index], similarity
+
+# Index shared by all requests handled by this process
+claim_index = SemanticIndex() if SEMANTIC_CACHE_ENABLED else None
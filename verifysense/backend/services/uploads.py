@@ -0,0 +1,113 @@
+import os
+import tempfile
+from services.config import load_env
+
+# Load environment variables
+load_env()
+
+# Largest image accepted by /api/verify, in bytes
+MAX_IMAGE_BYTES = int(os.getenv('MAX_IMAGE_BYTES', str(10 * 1024 * 1024)))
+
+# Largest request body of any kind, including JSON with base64 images and batches
+MAX_REQUEST_BYTES = int(os.getenv('MAX_REQUEST_BYTES', str(32 * 1024 * 1024)))
+
+# Uploads are kept in memory up to this size and spill to a temporary file beyond it
+UPLOAD_SPOOL_BYTES = int(os.getenv('UPLOAD_SPOOL_BYTES', str(1024 * 1024)))
+
+# Size of each read from a request stream
+UPLOAD_CHUNK_BYTES = 64 * 1024
+
+class UploadTooLarge(ValueError):
+    """
+    Raised when an upload is bigger than its configured limit
+    """
+
+def is_image_body(mimetype):
+    """
+    Check whether a request body is a raw image rather than JSON or a form
+    
+    Args:
+        mimetype (str): The request content type without parameters
+        
+    Returns:
+        bool: True for image/* and application/octet-stream bodies
+    """
+    return mimetype.startswith('image/') or mimetype == 'application/octet-stream'
+
+def check_size(size, limit=None):
+    """
+    Reject an upload whose size, declared or read so far, is over the limit
+    
+    Args:
+        size (int): The size in bytes, or None if it is not known
+        limit (int): The limit in bytes, MAX_IMAGE_BYTES by default
+        
+    Raises:
+        UploadTooLarge: If the size is over the limit
+    """
+    limit = MAX_IMAGE_BYTES if limit is None else limit
+    if size is not None and size > limit:
+        raise UploadTooLarge(f"Uploads are limited to {limit} bytes")
+
+class UploadBuffer:
+    """
+    Spooled buffer that an upload is streamed into chunk by chunk
+    
+    The size limit is enforced as chunks arrive, so a body without a
+    Content-Length is cut off as soon as it goes over instead of after it
+    has been read in full.
+    """
+    def __init__(self, limit=None):
+        self.limit = limit
+        self.size = 0
+        self.file = tempfile.SpooledTemporaryFile(max_size=UPLOAD_SPOOL_BYTES)
+    
+    def write(self, chunk):
+        self.size += len(chunk)
+        check_size(self.size, self.limit)
+        self.file.write(chunk)
+    
+    def read(self):
+        """
+        Returns:
+            bytes: Everything written to the buffer
+        """
+        return read_upload(self.file, self.limit)
+    
+    def close(self):
+        self.file.close()
+
+def read_stream(stream, limit=None):
+    """
+    Stream a request body into a spooled buffer and return its bytes
+    
+    Args:
+        stream: A file-like request stream
+        limit (int): The size limit in bytes, MAX_IMAGE_BYTES by default
+        
+    Returns:
+        bytes: The body
+    """
+    buffer = UploadBuffer(limit)
+    try:
+        for chunk in iter(lambda: stream.read(UPLOAD_CHUNK_BYTES), b''):
+            buffer.write(chunk)
+        return buffer.read()
+    finally:
+        buffer.close()
+
+def read_upload(file, limit=None):
+    """
+    Read an uploaded file into the bytes handed to OCR
+    
+    Args:
+        file: A seekable file, such as a spooled multipart upload
+        limit (int): The size limit in bytes, MAX_IMAGE_BYTES by default
+        
+    Returns:
+        bytes: The file contents
+    """
+    file.seek(0, os.SEEK_END)
+    check_size(file.tell(), limit)
+    file.seek(0)
+    return file.read()
@@ -0,0 +1,213 @@
+import unittest
+import os
+import sys
+import io
+import json
+from unittest.mock import patch
+
+# Add the parent directory to the path so we can import the app
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from app import app, generate_explanation
+from services.cache import TTLCache, TieredCache
+from services.explainability import FallbackExplanation
+from services.resilience import VERIFY_DEADLINE_SECONDS, time_left
+
+class TestVerifyStream(unittest.TestCase):
+    def setUp(self):
+        self.client = app.test_client()
+
+    def test_streams_ndjson_events(self):
+        response = self.client.post('/api/verify/stream', json={'input_type': 'text', 'content': 'Vaccines contain microchips'})
+
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response.mimetype, 'application/x-ndjson')
+        events = [json.loads(line) for line in response.get_data(as_text=True).splitlines()]
+        names = [event['event'] for event in events]
+        self.assertEqual(names[0], 'claims')
+        self.assertEqual(names[-1], 'done')
+        self.assertEqual(set(names[1:-1]), {'fact_checks', 'evidence', 'score', 'explanation'})
+        score = next(event for event in events if event['event'] == 'score')
+        self.assertEqual(score['index'], 0)
+        self.assertEqual(score['claim'], 'Vaccines contain microchips')
+
+    def test_stream_has_a_deadline(self):
+        budgets = []
+
+        def check_facts(claim):
+            budgets.append(time_left())
+            return []
+
+        with patch('app.check_facts', check_facts):
+            response = self.client.post('/api/verify/stream', json={'content': 'Vaccines contain microchips'})
+            response.get_data()
+
+        self.assertEqual(len(budgets), 1)
+        self.assertIsNotNone(budgets[0])
+        self.assertLessEqual(budgets[0], VERIFY_DEADLINE_SECONDS)
+
+    def test_streams_server_sent_events(self):
+        response = self.client.post(
+            '/api/verify/stream',
+            json={'content': 'Vaccines contain microchips'},
+            headers={'Accept': 'text/event-stream'}
+        )
+
+        self.assertEqual(response.mimetype, 'text/event-stream')
+        self.assertTrue(response.get_data(as_text=True).startswith('event: claims\ndata: '))
+
+    def test_rejects_empty_content(self):
+        response = self.client.post('/api/verify/stream', json={'content': '  '})
+
+        self.assertEqual(response.status_code, 400)
+
+class TestVerifyBatch(unittest.TestCase):
+    def setUp(self):
+        self.client = app.test_client()
+
+    def test_verifies_jsonl_items(self):
+        body = '\n'.join([
+            json.dumps({'id': 'a', 'content': 'Vaccines contain microchips'}),
+            json.dumps({'id': 'b', 'content': '  '}),
+            'not json'
+        ])
+        response = self.client.post('/api/verify/batch', data=body, content_type='application/x-ndjson')
+
+        self.assertEqual(response.mimetype, 'application/x-ndjson')
+        results = {r['id']: r for r in map(json.loads, response.get_data(as_text=True).splitlines())}
+        self.assertEqual(set(results), {'a', 'b', 3})
+        self.assertEqual(results['a']['status'], 'success')
+        self.assertEqual(results['a']['results'][0]['score']['confidence_label'], 'Likely False')
+        self.assertEqual(results['b']['status'], 'error')
+        self.assertEqual(results[3]['status'], 'error')
+
+    def test_verifies_json_items(self):
+        response = self.client.post('/api/verify/batch', json={'items': [{'content': 'The sky is blue'}]})
+
+        results = [json.loads(line) for line in response.get_data(as_text=True).splitlines()]
+        self.assertEqual(results[0]['id'], 1)
+        self.assertEqual(results[0]['status'], 'success')
+
+class TestVerifyUpload(unittest.TestCase):
+    def setUp(self):
+        self.client = app.test_client()
+
+    def test_accepts_multipart_image(self):
+        with patch('app.extract_text_from_image', return_value='Vaccines contain microchips') as ocr:
+            response = self.client.post(
+                '/api/verify',
+                data={'image': (io.BytesIO(b'\x89PNG image'), 'post.png')},
+                content_type='multipart/form-data'
+            )
+
+        self.assertEqual(response.status_code, 200)
+        ocr.assert_called_once_with(b'\x89PNG image')
+        self.assertEqual(response.json['results'][0]['claim'], 'Vaccines contain microchips')
+
+    def test_accepts_raw_image_body(self):
+        with patch('app.extract_text_from_image', return_value='Vaccines contain microchips') as ocr:
+            response = self.client.post('/api/verify', data=b'\xff\xd8 image', content_type='image/jpeg')
+
+        self.assertEqual(response.status_code, 200)
+        ocr.assert_called_once_with(b'\xff\xd8 image')
+
+    @patch('services.uploads.MAX_IMAGE_BYTES', 8)
+    def test_rejects_oversized_images(self):
+        with patch('app.extract_text_from_image') as ocr:
+            raw = self.client.post('/api/verify', data=b'0123456789', content_type='image/png')
+            form = self.client.post(
+                '/api/verify',
+                data={'image': (io.BytesIO(b'0123456789'), 'post.png')},
+                content_type='multipart/form-data'
+            )
+
+        self.assertEqual(raw.status_code, 413)
+        self.assertEqual(raw.json['status'], 'error')
+        self.assertEqual(form.status_code, 413)
+        ocr.assert_not_called()
+
+class TestMetrics(unittest.TestCase):
+    def setUp(self):
+        self.client = app.test_client()
+
+    def test_timing_header_only_when_requested(self):
+        plain = self.client.post('/api/verify', json={'content': 'Vaccines contain microchips'})
+        debug = self.client.post(
+            '/api/verify',
+            json={'content': 'Vaccines contain microchips'},
+            headers={'X-Debug-Timing': '1'}
+        )
+
+        self.assertNotIn('Server-Timing', plain.headers)
+        stages = [entry.split(';')[0] for entry in debug.headers['Server-Timing'].split(', ')]
+        self.assertEqual(set(stages), {'extract_claims', 'fact_check', 'evidence', 'score', 'explanation', 'claim', 'total'})
+
+    def test_metrics_endpoint(self):
+        self.client.post('/api/verify', json={'content': 'Vaccines contain microchips'})
+        response = self.client.get('/metrics')
+
+        self.assertEqual(response.status_code, 200)
+        self.assertTrue(response.content_type.startswith('text/plain; version=0.0.4'))
+        self.assertIn('verifysense_stage_duration_seconds_count{stage="fact_check"}', response.get_data(as_text=True))
+
+class TestDeferredExplanations(unittest.TestCase):
+    def setUp(self):
+        self.client = app.test_client()
+        # Handles are only given out with a shared cache tier
+        patcher = patch('services.cache.result_cache', TieredCache(TTLCache(), TTLCache()))
+        patcher.start()
+        self.addCleanup(patcher.stop)
+
+    @patch('services.deferred_explanations.EXPLANATION_PREFETCH', False)
+    def test_verify_returns_handles_to_explain_later(self):
+        with patch('app.generate_explanation', wraps=generate_explanation) as explain:
+            response = self.client.post('/api/verify', json={'content': 'Vaccines contain microchips', 'defer_explanations': True})
+            handle = response.json['results'][0]['explanation']
+            explain.assert_not_called()
+
+            first = self.client.get(handle['url'])
+            second = self.client.get(handle['url'])
+
+        self.assertEqual(handle['status'], 'deferred')
+        self.assertEqual(first.status_code, 200)
+        self.assertEqual(first.json['explanation'], second.json['explanation'])
+        self.assertIn('summary', first.json['explanation'])
+        self.assertEqual(explain.call_count, 1)
+
+    def test_prefetched_explanation_is_shared_with_the_request(self):
+        with patch('app.generate_explanation', wraps=generate_explanation) as explain:
+            response = self.client.post('/api/verify', json={'content': 'Prefetched claim', 'defer_explanations': 'true'})
+            explained = self.client.get(response.json['results'][0]['explanation']['url'])
+
+        self.assertEqual(explained.status_code, 200)
+        self.assertEqual(explain.call_count, 1)
+
+    @patch('services.deferred_explanations.EXPLANATION_PREFETCH', False)
+    def test_fallback_explanations_are_not_cached(self):
+        fallback = FallbackExplanation({'summary': 'Generic summary', 'steps': []})
+        with patch('app.generate_explanation', return_value=fallback) as explain:
+            response = self.client.post('/api/verify', json={'content': 'Unexplained claim', 'defer_explanations': True})
+            url = response.json['results'][0]['explanation']['url']
+            first = self.client.get(url)
+            second = self.client.get(url)
+
+        self.assertEqual(first.json['explanation'], {'summary': 'Generic summary', 'steps': []})
+        self.assertEqual(second.status_code, 200)
+        self.assertEqual(explain.call_count, 2)
+
+    def test_explanations_are_inline_without_a_shared_cache(self):
+        with patch('services.cache.result_cache', TieredCache(TTLCache())):
+            response = self.client.post('/api/verify', json={'content': 'Vaccines contain microchips', 'defer_explanations': True})
+
+        explanation = response.json['results'][0]['explanation']
+        self.assertIn('summary', explanation)
+        self.assertNotIn('status', explanation)
+
+    def test_unknown_explanation_id(self):
+        response = self.client.get('/api/explain/unknown')
+
+        self.assertEqual(response.status_code, 404)
+        self.assertEqual(response.json['status'], 'error')
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,103 @@
+import unittest
+import os
+import sys
+from unittest.mock import patch
+
+import httpx
+
+# Add the parent directory to the path so we can import the app
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import asgi
+from services.cache import TTLCache, TieredCache
+
+async def fake_extract_claims(content):
+    return [content] if content else []
+
+async def fake_check_facts(claim):
+    return [{"rating": "False", "publisher": {"name": "Test publisher"}}]
+
+async def fake_get_evidence(claim):
+    return [{"title": "Test title", "reliability": "high"}]
+
+async def fake_generate_explanation(claim, fact_checks, evidence, score):
+    return {"summary": "Test summary", "steps": []}
+
+@patch('asgi.extract_claims_async', fake_extract_claims)
+@patch('asgi.check_facts_async', fake_check_facts)
+@patch('asgi.get_evidence_async', fake_get_evidence)
+@patch('asgi.generate_explanation_async', fake_generate_explanation)
+class TestAsgiVerify(unittest.IsolatedAsyncioTestCase):
+    def client(self):
+        return httpx.AsyncClient(transport=httpx.ASGITransport(app=asgi.app), base_url="http://test")
+
+    async def test_verify_runs_on_event_loop(self):
+        async with self.client() as client:
+            response = await client.post("/api/verify", json={"input_type": "text", "content": "Test claim"})
+
+        self.assertEqual(response.status_code, 200)
+        result = response.json()["results"][0]
+        self.assertEqual(result["claim"], "Test claim")
+        self.assertEqual(result["explanation"]["summary"], "Test summary")
+        self.assertIn("score", result["score"])
+
+    async def test_verify_without_claims(self):
+        async with self.client() as client:
+            response = await client.post("/api/verify", json={"content": ""})
+
+        self.assertEqual(response.status_code, 400)
+        self.assertEqual(response.json()["status"], "error")
+
+    async def test_verify_rejects_bodies_that_are_not_objects(self):
+        async with self.client() as client:
+            for body in ([], "x", 3):
+                response = await client.post("/api/verify", json=body)
+
+                self.assertEqual(response.status_code, 400)
+                self.assertEqual(response.json()["status"], "error")
+
+    async def test_verify_errors_get_a_json_response(self):
+        with patch('asgi.verify_claims_async', side_effect=RuntimeError('pipeline failed')):
+            async with self.client() as client:
+                response = await client.post("/api/verify", json={"content": "Test claim"})
+
+        self.assertEqual(response.status_code, 500)
+        self.assertEqual(response.json()["status"], "error")
+
+    async def test_verify_raw_image_body(self):
+        with patch('asgi.extract_text_from_image_async', return_value='Text from image') as ocr:
+            async with self.client() as client:
+                response = await client.post("/api/verify", content=b"\x89PNG image", headers={"Content-Type": "image/png"})
+
+        self.assertEqual(response.status_code, 200)
+        ocr.assert_awaited_once_with(b"\x89PNG image")
+        self.assertEqual(response.json()["results"][0]["claim"], "Text from image")
+
+    @patch('asgi.MAX_IMAGE_BYTES', 8)
+    async def test_verify_rejects_oversized_image(self):
+        async with self.client() as client:
+            response = await client.post("/api/verify", content=b"0123456789", headers={"Content-Type": "image/png"})
+
+        self.assertEqual(response.status_code, 413)
+
+    @patch('services.deferred_explanations.EXPLANATION_PREFETCH', False)
+    @patch('services.cache.result_cache', TieredCache(TTLCache(), TTLCache()))
+    async def test_deferred_explanation_is_generated_on_request(self):
+        async with self.client() as client:
+            response = await client.post("/api/verify", json={"content": "Deferred claim", "defer_explanations": True})
+            handle = response.json()["results"][0]["explanation"]
+            explained = await client.get(handle["url"])
+
+        self.assertEqual(handle["status"], "deferred")
+        self.assertEqual(explained.status_code, 200)
+        self.assertEqual(explained.json()["explanation"]["summary"], "Test summary")
+
+    async def test_other_routes_use_flask(self):
+        async with self.client() as client:
+            response = await client.get("/api/health")
+
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response.json()["status"], "healthy")
+
+if __name__ == "__main__":
+    unittest.main()
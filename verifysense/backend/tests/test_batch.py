@@ -0,0 +1,114 @@
+import unittest
+import os
+import sys
+import json
+import tempfile
+import threading
+import time
+
+# Add the parent directory to the path so we can import the services
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from services.batch import ClaimMemo, load_checkpoint, parse_jsonl, verify_items
+
+def extract_claims(content):
+    if content == 'explode':
+        raise RuntimeError('extraction failed')
+    return [content] if content.strip() else []
+
+def calculate_score(claim, fact_checks, evidence):
+    return {'score': 50, 'confidence_label': 'Uncertain'}
+
+def generate_explanation(claim, fact_checks, evidence, score):
+    return {'summary': claim, 'steps': []}
+
+class TestVerifyItems(unittest.TestCase):
+    def test_deduplicates_claims_across_items(self):
+        lookups = []
+        lock = threading.Lock()
+
+        def check_facts(claim):
+            with lock:
+                lookups.append(claim)
+            time.sleep(0.05)
+            return []
+
+        items = [{'id': i, 'content': 'Same claim' if i % 2 else 'same claim!'} for i in range(10)]
+        outputs = list(verify_items(items, extract_claims, check_facts, lambda claim: [],
+                                    calculate_score, generate_explanation, concurrency=4))
+
+        self.assertEqual(sorted(output['id'] for output in outputs), list(range(10)))
+        self.assertTrue(all(output['status'] == 'success' for output in outputs))
+        self.assertEqual(len(lookups), 1)
+
+    def test_isolates_failures(self):
+        items = [{'id': 'ok', 'content': 'A claim'}, {'id': 'bad', 'content': 'explode'}, {'id': 'empty', 'content': ''}]
+        outputs = {o['id']: o for o in verify_items(items, extract_claims, lambda claim: [], lambda claim: [],
+                                                     calculate_score, generate_explanation)}
+
+        self.assertEqual(outputs['ok']['status'], 'success')
+        self.assertEqual(outputs['bad'], {'id': 'bad', 'status': 'error', 'message': 'extraction failed'})
+        self.assertEqual(outputs['empty']['status'], 'error')
+
+    def test_memo_retries_failed_calls(self):
+        memo = ClaimMemo()
+        attempts = []
+
+        def flaky(claim):
+            attempts.append(claim)
+            if len(attempts) == 1:
+                raise RuntimeError('upstream down')
+            return ['ok']
+
+        with self.assertRaises(RuntimeError):
+            memo.call('fact_check', 'A claim', flaky)
+        self.assertEqual(memo.call('fact_check', 'A claim', flaky), ['ok'])
+        self.assertEqual(memo.call('fact_check', 'a claim.', flaky), ['ok'])
+        self.assertEqual(len(attempts), 2)
+
+class TestJsonl(unittest.TestCase):
+    def test_parse_assigns_ids_and_flags_invalid_lines(self):
+        items = list(parse_jsonl(['{"content": "x"}', '', '{"id": "b", "content": "y"}', '[1]']))
+
+        self.assertEqual(items[0], {'content': 'x', 'id': 1})
+        self.assertEqual(items[1]['id'], 'b')
+        self.assertEqual(items[2]['id'], 4)
+        self.assertIn('error', items[2])
+
+    def test_checkpoint_truncates_partial_line(self):
+        with tempfile.TemporaryDirectory() as directory:
+            path = os.path.join(directory, 'out.jsonl')
+            with open(path, 'w') as output:
+                output.write(json.dumps({'id': 1, 'status': 'success'}) + '\n' + json.dumps({'id': 'two', 'status': 'success'}) + '\n{"id": 3, "sta')
+
+            self.assertEqual(load_checkpoint(path), {1, 'two'})
+            with open(path) as output:
+                self.assertTrue(output.read().endswith('"success"}\n'))
+            self.assertEqual(load_checkpoint(os.path.join(directory, 'missing.jsonl')), set())
+
+    def test_checkpoint_skips_corrupt_lines_and_keeps_the_rest(self):
+        with tempfile.TemporaryDirectory() as directory:
+            path = os.path.join(directory, 'out.jsonl')
+            contents = (json.dumps({'id': 1, 'status': 'success'}) + '\n{"id": 2, "sta\n[3]\n'
+                        + json.dumps({'id': 4, 'status': 'success'}) + '\n')
+            with open(path, 'w') as output:
+                output.write(contents)
+
+            self.assertEqual(load_checkpoint(path), {1, 4})
+            with open(path) as output:
+                self.assertEqual(output.read(), contents)
+
+    def test_checkpoint_retries_failed_items(self):
+        with tempfile.TemporaryDirectory() as directory:
+            path = os.path.join(directory, 'out.jsonl')
+            with open(path, 'w') as output:
+                for result in ({'id': 1, 'status': 'error', 'message': 'upstream down'},
+                               {'id': 2, 'status': 'success'},
+                               {'id': 1, 'status': 'success'},
+                               {'id': 3, 'status': 'error', 'message': 'upstream down'}):
+                    output.write(json.dumps(result) + '\n')
+
+            self.assertEqual(load_checkpoint(path), {1, 2})
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,133 @@
+import unittest
+import os
+import sys
+import asyncio
+import time
+import tempfile
+import threading
+from unittest.mock import patch
+
+# Add the parent directory to the path so we can import the services
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from services import cache
+from services.cache import normalize_claim, TTLCache, SQLiteCache, TieredCache
+
+class TestNormalizeClaim(unittest.TestCase):
+    def test_normalize_claim(self):
+        self.assertEqual(
+            normalize_claim("  Vaccines   CONTAIN microchips!! "),
+            normalize_claim("vaccines contain microchips")
+        )
+        self.assertEqual(normalize_claim("The Earth is flat."), "the earth is flat")
+
+class TestTTLCache(unittest.TestCase):
+    def test_evicts_least_recently_used(self):
+        lru = TTLCache(max_size=2)
+        expires = time.time() + 60
+        lru.set("a", 1, expires, expires)
+        lru.set("b", 2, expires, expires)
+        lru.get("a")
+        lru.set("c", 3, expires, expires)
+
+        self.assertIsNotNone(lru.get("a"))
+        self.assertIsNone(lru.get("b"))
+
+    def test_drops_expired_entries(self):
+        lru = TTLCache(max_size=2)
+        lru.set("a", 1, time.time() - 2, time.time() - 1)
+
+        self.assertIsNone(lru.get("a"))
+
+class TestTieredCache(unittest.TestCase):
+    def test_fetches_once_then_hits(self):
+        tiered = TieredCache(TTLCache())
+        calls = []
+
+        def fetch():
+            calls.append(1)
+            return [{"rating": "False"}]
+
+        first = tiered.get_or_fetch("fact_check", "key", fetch)
+        second = tiered.get_or_fetch("fact_check", "key", fetch)
+
+        self.assertEqual(first, second)
+        self.assertEqual(len(calls), 1)
+        self.assertEqual(tiered.stats()["fact_check"], {"hits": 1, "stale_hits": 0, "misses": 1})
+
+    def test_serves_stale_while_refreshing(self):
+        tiered = TieredCache(TTLCache())
+        tiered.local.set("key", ["old"], time.time() - 1, time.time() + 60)
+        refreshed = threading.Event()
+
+        def fetch():
+            refreshed.set()
+            return ["new"]
+
+        self.assertEqual(tiered.get_or_fetch("fact_check", "key", fetch), ["old"])
+        self.assertTrue(refreshed.wait(2))
+        tiered._refresh_executor.shutdown(wait=True)
+        self.assertEqual(tiered.local.get("key")[0], ["new"])
+
+    def test_empty_refresh_keeps_the_stale_entry(self):
+        tiered = TieredCache(TTLCache())
+        tiered.local.set("key", ["old"], time.time() - 1, time.time() + 60)
+
+        self.assertEqual(tiered.get_or_fetch("fact_check", "key", lambda: []), ["old"])
+        tiered._refresh_executor.shutdown(wait=True)
+        self.assertEqual(tiered.local.get("key")[0], ["old"])
+        self.assertNotIn("key", tiered._refreshing)
+
+    def test_async_refresh_tasks_are_kept_until_done(self):
+        tiered = TieredCache(TTLCache())
+        tiered.local.set("key", ["old"], time.time() - 1, time.time() + 60)
+
+        async def fetch():
+            return ["new"]
+
+        async def serve_stale():
+            value = await tiered.get_or_fetch_async("fact_check", "key", fetch)
+            self.assertEqual(len(tiered._refresh_tasks), 1)
+            await asyncio.gather(*tiered._refresh_tasks)
+            return value
+
+        self.assertEqual(asyncio.run(serve_stale()), ["old"])
+        self.assertEqual(tiered._refresh_tasks, set())
+        self.assertEqual(tiered.local.get("key")[0], ["new"])
+
+    def test_empty_results_are_not_served_stale(self):
+        tiered = TieredCache(TTLCache())
+        with patch.object(cache, "EMPTY_RESULT_TTL", 0):
+            tiered.store("fact_check", "key", [])
+
+        self.assertIsNone(tiered.lookup("fact_check", "key"))
+
+    def test_shared_tier_populates_local_tier(self):
+        with tempfile.TemporaryDirectory() as tmp:
+            shared = SQLiteCache(os.path.join(tmp, "cache.db"))
+            TieredCache(TTLCache(), shared).store("custom_search", "key", [{"title": "Test title"}])
+
+            # A fresh process only sees the shared tier
+            other = TieredCache(TTLCache(), shared)
+            self.assertEqual(other.lookup("custom_search", "key"), ([{"title": "Test title"}], False))
+            self.assertIsNotNone(other.local.get("key"))
+
+class TestCachedDecorator(unittest.TestCase):
+    def setUp(self):
+        cache.result_cache.local.clear()
+
+    def test_normalized_claims_share_an_entry(self):
+        calls = []
+
+        @cache.cached("fact_check")
+        def check(claim):
+            calls.append(claim)
+            return [{"claim": claim}]
+
+        check("Vaccines contain microchips.")
+        check("vaccines   contain MICROCHIPS")
+
+        self.assertEqual(len(calls), 1)
+
+if __name__ == "__main__":
+    unittest.main()
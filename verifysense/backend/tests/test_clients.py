@@ -0,0 +1,78 @@
+import unittest
+import os
+import subprocess
+import sys
+from concurrent.futures import ThreadPoolExecutor
+from unittest import mock
+
+# Add the parent directory to the path so we can import the services
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from services import clients
+
+BACKEND_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+# Cold start budget for `import app`, in milliseconds
+APP_IMPORT_BUDGET_MS = float(os.getenv('APP_IMPORT_BUDGET_MS', '2000'))
+
+# SDKs that must only be imported once a request needs them
+LAZY_MODULES = ('google.generativeai', 'google.cloud.vision', 'google.cloud.firestore', 'httpx', 'PIL')
+
+def import_times(module):
+    # Cumulative import time in microseconds per module, from a fresh interpreter
+    result = subprocess.run(
+        [sys.executable, '-X', 'importtime', '-c', f"import {module}"],
+        cwd=BACKEND_DIR, capture_output=True, text=True, check=True
+    )
+    times = {}
+    for line in result.stderr.splitlines():
+        fields = line.removeprefix('import time:').split('|')
+        if len(fields) == 3 and fields[1].strip().isdigit():
+            times[fields[2].strip()] = int(fields[1])
+    return times
+
+class TestClientRegistry(unittest.TestCase):
+    def setUp(self):
+        patcher = mock.patch.multiple(clients, _factories={}, _clients={}, _build_seconds={})
+        patcher.start()
+        self.addCleanup(patcher.stop)
+
+    def test_builds_each_client_once(self):
+        factory = mock.Mock(side_effect=lambda: object())
+        clients.register('test', factory)
+
+        with ThreadPoolExecutor(max_workers=8) as executor:
+            built = list(executor.map(lambda _: clients.get_client('test'), range(8)))
+
+        self.assertEqual(factory.call_count, 1)
+        self.assertTrue(all(client is built[0] for client in built))
+
+    def test_warm_up_reports_failures(self):
+        clients.register('good', object)
+        clients.register('bad', mock.Mock(side_effect=RuntimeError('no credentials')))
+
+        results = clients.warm_up(['good', 'bad'])
+
+        self.assertIsInstance(results['good'], float)
+        self.assertEqual(results['bad'], 'error: no credentials')
+        self.assertEqual(list(clients.get_client_stats()['built']), ['good'])
+
+    @mock.patch.object(clients, 'WARM_UP_CLIENTS', '')
+    def test_warm_up_does_nothing_by_default(self):
+        clients.register('test', mock.Mock())
+
+        self.assertEqual(clients.warm_up(), {})
+
+class TestColdStart(unittest.TestCase):
+    @classmethod
+    def setUpClass(cls):
+        cls.times = import_times('app')
+
+    def test_app_does_not_import_sdks(self):
+        self.assertEqual([module for module in LAZY_MODULES if module in self.times], [])
+
+    def test_app_imports_within_budget(self):
+        self.assertLessEqual(self.times['app'] / 1000, APP_IMPORT_BUDGET_MS)
+
+if __name__ == "__main__":
+    unittest.main()
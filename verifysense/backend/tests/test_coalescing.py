@@ -0,0 +1,73 @@
+import unittest
+import os
+import sys
+import time
+import asyncio
+from concurrent.futures import ThreadPoolExecutor
+
+# Add the parent directory to the path so we can import the services
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from services.coalescing import SingleFlight, coalesced, get_coalescing_stats
+
+class TestSingleFlight(unittest.TestCase):
+    def test_concurrent_callers_share_one_call(self):
+        group = SingleFlight()
+        calls = []
+
+        def slow_lookup(claim):
+            calls.append(claim)
+            time.sleep(0.2)
+            return [{"claim": claim}]
+
+        with ThreadPoolExecutor(max_workers=5) as executor:
+            futures = [executor.submit(group.do, "key", slow_lookup, "Test claim") for _ in range(5)]
+            results = [future.result() for future in futures]
+
+        self.assertEqual(len(calls), 1)
+        self.assertTrue(all(result == [{"claim": "Test claim"}] for result in results))
+        self.assertEqual(group.stats(), {"calls": 1, "deduplicated": 4})
+
+    def test_errors_reach_every_caller(self):
+        group = SingleFlight()
+
+        def failing_lookup():
+            time.sleep(0.1)
+            raise RuntimeError("upstream down")
+
+        with ThreadPoolExecutor(max_workers=3) as executor:
+            futures = [executor.submit(group.do, "key", failing_lookup) for _ in range(3)]
+            for future in futures:
+                with self.assertRaises(RuntimeError):
+                    future.result()
+
+    def test_sequential_calls_are_not_shared(self):
+        group = SingleFlight()
+
+        group.do("key", lambda: 1)
+        group.do("key", lambda: 2)
+
+        self.assertEqual(group.stats(), {"calls": 2, "deduplicated": 0})
+
+class TestCoalescedDecorator(unittest.IsolatedAsyncioTestCase):
+    async def test_async_calls_with_same_normalized_claim_are_shared(self):
+        calls = []
+
+        @coalesced("test_async")
+        async def lookup(claim):
+            calls.append(claim)
+            await asyncio.sleep(0.1)
+            return [claim]
+
+        results = await asyncio.gather(
+            lookup("Vaccines contain microchips"),
+            lookup("vaccines contain microchips!"),
+            lookup("The Earth is flat")
+        )
+
+        self.assertEqual(len(calls), 2)
+        self.assertEqual(results[0], results[1])
+        self.assertEqual(get_coalescing_stats()["test_async"], {"calls": 2, "deduplicated": 1})
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,77 @@
+import unittest
+import os
+import sys
+import tempfile
+import importlib
+from unittest.mock import patch
+
+# Add the parent directory to the path so we can import the services
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from services import domain_reliability
+from services.domain_reliability import ReliabilityIndex, Reliability, UNRATED, extract_domain, reliability_index
+from services.evidence_retrieval import parse_evidence
+
+class TestExtractDomain(unittest.TestCase):
+    def test_extracts_host(self):
+        self.assertEqual(extract_domain('https://www.BBC.co.uk/news/world-123'), 'bbc.co.uk')
+        self.assertEqual(extract_domain('http://edition.cnn.com:8080/2024/01/01/story.html?x=1'), 'edition.cnn.com')
+        self.assertEqual(extract_domain('reuters.com/world'), 'reuters.com')
+        self.assertEqual(extract_domain(''), '')
+
+class TestReliabilityFile(unittest.TestCase):
+    def test_relative_path_is_relative_to_the_backend(self):
+        cwd = os.getcwd()
+        self.addCleanup(importlib.reload, domain_reliability)
+        self.addCleanup(os.chdir, cwd)
+        with tempfile.TemporaryDirectory() as directory, \
+                patch.dict(os.environ, {'DOMAIN_RELIABILITY_FILE': 'data/domain_reliability.csv'}):
+            os.chdir(directory)
+            importlib.reload(domain_reliability)
+            os.chdir(cwd)
+
+        self.assertTrue(os.path.isabs(domain_reliability.DOMAIN_RELIABILITY_FILE))
+        self.assertGreater(len(domain_reliability.ReliabilityIndex()), 0)
+
+class TestReliabilityIndex(unittest.TestCase):
+    def setUp(self):
+        self.directory = tempfile.TemporaryDirectory()
+        self.path = os.path.join(self.directory.name, 'domains.csv')
+        self.write("# comment\nexample.com,high\nblogs.example.com,low\ngov,75\nbad line\n")
+        self.index = ReliabilityIndex(self.path, reload_seconds=0)
+
+    def tearDown(self):
+        self.directory.cleanup()
+
+    def write(self, text):
+        with open(self.path, 'w') as ratings_file:
+            ratings_file.write(text)
+
+    def test_most_specific_suffix_wins(self):
+        self.assertEqual(self.index.lookup('news.example.com'), Reliability('high', 80))
+        self.assertEqual(self.index.lookup('a.blogs.example.com'), Reliability('low', 30))
+        self.assertEqual(self.index.lookup('cdc.gov'), Reliability('high', 75))
+        self.assertEqual(self.index.lookup('notexample.com'), UNRATED)
+        self.assertEqual(len(self.index), 3)
+
+    def test_reloads_changed_file(self):
+        self.write("example.com,40\n")
+        os.utime(self.path, ns=(0, os.stat(self.path).st_mtime_ns + 1))
+
+        self.assertEqual(self.index.lookup('example.com'), Reliability('low', 40))
+        self.assertEqual(self.index.lookup('cdc.gov'), UNRATED)
+
+class TestEvidenceReliability(unittest.TestCase):
+    def test_subdomains_of_trusted_sources_are_high(self):
+        evidence = parse_evidence({'items': [
+            {'link': 'https://edition.cnn.com/story'},
+            {'link': 'https://news.bbc.co.uk/story'},
+            {'link': 'https://example.org/story'}
+        ]})
+
+        self.assertEqual([item['reliability'] for item in evidence], ['high', 'high', 'medium'])
+        self.assertEqual(evidence[0]['reliability_score'], 80)
+        self.assertGreater(len(reliability_index), 0)
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,76 @@
+import unittest
+import os
+import sys
+import threading
+from unittest.mock import patch
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+# Add the parent directory to the path so we can import the services
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from services import http_client
+
+class FakeUpstreamHandler(BaseHTTPRequestHandler):
+    protocol_version = 'HTTP/1.1'
+    # Status codes to return before answering 200
+    failures = []
+
+    def do_GET(self):
+        status = self.failures.pop(0) if self.failures else 200
+        body = b'{"ok": true}'
+        self.send_response(status)
+        self.send_header('Content-Type', 'application/json')
+        self.send_header('Content-Length', str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def log_message(self, format, *args):
+        pass
+
+class TestHttpClient(unittest.TestCase):
+    def setUp(self):
+        self.server = ThreadingHTTPServer(('127.0.0.1', 0), FakeUpstreamHandler)
+        threading.Thread(target=self.server.serve_forever, daemon=True).start()
+        self.url = f'http://127.0.0.1:{self.server.server_port}/search'
+        FakeUpstreamHandler.failures = []
+        http_client._sessions.pop('test', None)
+
+        # Keep retry backoff out of the test run time
+        for name in ('HTTP_BACKOFF_FACTOR', 'HTTP_BACKOFF_JITTER'):
+            patcher = patch.object(http_client, name, 0)
+            patcher.start()
+            self.addCleanup(patcher.stop)
+
+    def tearDown(self):
+        self.server.shutdown()
+        self.server.server_close()
+        http_client._sessions.pop('test', None)
+
+    def test_connections_are_reused(self):
+        for _ in range(3):
+            response = http_client.http_get('test', self.url, params={'q': 'claim'})
+            self.assertEqual(response.status_code, 200)
+
+        stats = http_client.get_pool_stats()['test']
+        self.assertEqual(stats['requests'], 3)
+        self.assertEqual(stats['new_connections'], 1)
+        self.assertEqual(stats['pool_hits'], 2)
+        self.assertEqual(stats['reconnects'], 0)
+
+    def test_retries_throttled_requests(self):
+        FakeUpstreamHandler.failures = [429, 503]
+
+        response = http_client.http_get('test', self.url)
+
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(http_client.get_pool_stats()['test']['requests'], 3)
+
+    def test_gives_up_after_retries(self):
+        FakeUpstreamHandler.failures = [503] * (http_client.HTTP_RETRIES + 1)
+
+        response = http_client.http_get('test', self.url)
+
+        self.assertEqual(response.status_code, 503)
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,68 @@
+import unittest
+import os
+import sys
+import importlib.util
+import json
+import tempfile
+from unittest import mock
+
+# Add the parent directory to the path so we can import the services
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from services import json_codec
+from services.json_codec import EncodedList, dumps, loads
+from services.cache import SQLiteCache, TieredCache, TTLCache
+from services.models import ClaimResult, FactCheck
+
+def load_codec(name):
+    # A separate copy of the module, built under a different JSON_CODEC setting
+    spec = importlib.util.find_spec('services.json_codec')
+    module = importlib.util.module_from_spec(spec)
+    with mock.patch.dict(os.environ, {'JSON_CODEC': name}):
+        spec.loader.exec_module(module)
+    return module
+
+class TestJsonCodec(unittest.TestCase):
+    def test_round_trips_models(self):
+        result = ClaimResult('claim', [FactCheck(rating='False')], [], {'score': 10}, None)
+
+        decoded = loads(dumps({'results': [result]}))
+        self.assertEqual(decoded['results'][0]['fact_checks'][0]['rating'], 'False')
+        self.assertEqual(decoded['results'][0]['fact_checks'][0]['publisher'], {'name': '', 'site': ''})
+
+    def test_splices_pre_encoded_lists(self):
+        cached = EncodedList([{'title': 'x'}], b'[{"title":"pre-encoded"}]')
+        payload = {'results': [{'claim': 'a "\\u0000" claim', 'evidence': cached}, {'evidence': cached}]}
+
+        decoded = loads(dumps(payload))
+        self.assertEqual(decoded['results'][0]['evidence'], [{'title': 'pre-encoded'}])
+        self.assertEqual(decoded['results'][1]['evidence'], [{'title': 'pre-encoded'}])
+        self.assertEqual(decoded['results'][0]['claim'], 'a "\\u0000" claim')
+
+    def test_encoded_list_encodes_once(self):
+        items = EncodedList([FactCheck(rating='True')])
+        with mock.patch.object(json_codec, '_encode', wraps=json_codec._encode) as encode:
+            dumps([items])
+            dumps([items])
+        self.assertEqual(encode.call_count, 3)
+
+    def test_stdlib_fallback_matches(self):
+        stdlib = load_codec('json')
+        payload = {'results': [ClaimResult('claim', stdlib.EncodedList([FactCheck()]), [], None, {'steps': ['é']})]}
+
+        self.assertEqual(stdlib.BACKEND, 'json')
+        self.assertEqual(json.loads(stdlib.dumps(payload)), loads(dumps(payload)))
+
+class TestPreEncodedCache(unittest.TestCase):
+    def test_shared_tier_reuses_stored_json(self):
+        with tempfile.TemporaryDirectory() as directory:
+            shared = SQLiteCache(os.path.join(directory, 'cache.db'))
+            TieredCache(TTLCache(), shared).get_or_fetch('fact_check', 'key', lambda: [FactCheck(rating='False')])
+
+            value = TieredCache(TTLCache(), shared).get_or_fetch('fact_check', 'key', lambda: self.fail('fetched'))
+            self.assertIsInstance(value, EncodedList)
+            self.assertEqual(value[0]['rating'], 'False')
+            self.assertEqual(loads(value.json())[0]['rating'], 'False')
+
+if __name__ == "__main__":
+    unittest.main()
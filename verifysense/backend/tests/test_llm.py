@@ -0,0 +1,83 @@
+import unittest
+import os
+import sys
+import asyncio
+from unittest import mock
+
+# Add the parent directory to the path so we can import the services
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from services import cache, llm, resilience
+from services.cache import TTLCache, TieredCache
+from services.explainability import generate_explanation
+
+def model_returning(text, token_count=7):
+    model = mock.Mock()
+    model.generate_content.return_value = mock.Mock(
+        text=text,
+        usage_metadata=None,
+        candidates=[mock.Mock(token_count=token_count)]
+    )
+    return model
+
+class TestGateway(unittest.TestCase):
+    def setUp(self):
+        llm._stats.clear()
+        resilience._upstreams.clear()
+        self.addCleanup(llm._stats.clear)
+        self.addCleanup(resilience._upstreams.clear)
+        patcher = mock.patch.object(cache, 'result_cache', TieredCache(TTLCache()))
+        patcher.start()
+        self.addCleanup(patcher.stop)
+
+    def test_repeated_explanations_are_served_from_the_cache(self):
+        model = model_returning('{"summary": "Checked.", "steps": ["Read the sources"]}')
+        score = {'score': 80, 'confidence_label': 'likely true'}
+        with mock.patch.object(llm, '_get_model', return_value=model):
+            first = generate_explanation('The sky is blue', [], [], score)
+            second = generate_explanation('The sky is blue', [], [], score)
+            generate_explanation('The sky is blue', [], [], {'score': 20, 'confidence_label': 'likely false'})
+
+        self.assertEqual(first, second)
+        self.assertEqual(model.generate_content.call_count, 2)
+        stats = llm.get_llm_stats()['explanation']
+        self.assertEqual((stats['requests'], stats['calls'], stats['cache_hits']), (3, 2, 1))
+        self.assertEqual(stats['output_tokens'], 14)
+
+    def test_cache_key_depends_on_the_task_model(self):
+        with mock.patch.dict(llm.LLM_TASKS, {
+            'claim_extraction': {'model': 'gemini-1.5-flash', 'max_output_tokens': 512},
+            'explanation': {'model': 'gemini-1.5-pro', 'max_output_tokens': 768}
+        }):
+            self.assertNotEqual(llm.cache_key('claim_extraction', 'prompt'), llm.cache_key('explanation', 'prompt'))
+
+    def test_errors_are_counted_and_raised(self):
+        model = mock.Mock()
+        model.generate_content.side_effect = ConnectionError('upstream down')
+        with mock.patch.object(llm, '_get_model', return_value=model):
+            with self.assertRaises(ConnectionError):
+                llm.generate('claim_extraction', 'Extract claims')
+
+        self.assertEqual(llm.get_llm_stats()['claim_extraction']['errors'], 1)
+
+    def test_async_generation_shares_the_cache(self):
+        model = model_returning('1. Claim one')
+        with mock.patch.object(llm, '_get_model', return_value=model):
+            first = llm.generate('claim_extraction', 'Extract claims')
+            second = asyncio.run(llm.generate_async('claim_extraction', 'Extract claims'))
+
+        self.assertEqual(first, second)
+        self.assertEqual(model.generate_content.call_count, 1)
+
+    def test_models_are_built_with_their_output_token_cap(self):
+        genai = mock.Mock()
+        with mock.patch.object(llm, 'get_client', return_value=genai):
+            llm._build_model('claim_extraction')
+
+        genai.GenerativeModel.assert_called_once_with(
+            llm.LLM_TASKS['claim_extraction']['model'],
+            generation_config={'max_output_tokens': llm.LLM_TASKS['claim_extraction']['max_output_tokens']}
+        )
+
+if __name__ == '__main__':
+    unittest.main()
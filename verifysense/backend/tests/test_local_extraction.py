@@ -0,0 +1,65 @@
+import unittest
+import os
+import sys
+from unittest import mock
+
+# Add the parent directory to the path so we can import the services
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from services import local_extraction, claim_extraction
+from services.local_extraction import extract_claims_local, split_sentences
+
+class TestLocalExtraction(unittest.TestCase):
+    def test_splits_sentences_around_abbreviations(self):
+        text = "Dr. Smith said it works. Sales rose 5% in the U.S. last year!\n- The sky is green"
+
+        self.assertEqual(split_sentences(text), [
+            "Dr. Smith said it works.",
+            "Sales rose 5% in the U.S. last year!",
+            "The sky is green"
+        ])
+
+    def test_single_checkable_claim_is_confident(self):
+        claims, confidence = extract_claims_local("COVID-19 vaccines contain microchips to track people")
+
+        self.assertEqual(claims, ["COVID-19 vaccines contain microchips to track people"])
+        self.assertGreaterEqual(confidence, local_extraction.CLAIM_LOCAL_CONFIDENCE)
+
+    def test_filters_opinions_and_questions(self):
+        claims, confidence = extract_claims_local("I think this is the best phone. Is it waterproof? It was released in 2020.")
+
+        self.assertEqual(claims, ["It was released in 2020."])
+        self.assertLess(confidence, local_extraction.CLAIM_LOCAL_CONFIDENCE)
+
+    def test_hedged_and_long_inputs_are_left_to_the_model(self):
+        _, hedged = extract_claims_local("Drinking coffee may reduce cancer risk")
+        _, long_input = extract_claims_local("Paris is in France. Rome is in Italy. Oslo is in Norway. Bern is in Switzerland.")
+
+        self.assertLess(hedged, local_extraction.CLAIM_LOCAL_CONFIDENCE)
+        self.assertLess(long_input, local_extraction.CLAIM_LOCAL_CONFIDENCE)
+
+@mock.patch('services.cache.CACHE_ENABLED', False)
+class TestFastPath(unittest.TestCase):
+    def test_auto_mode_skips_gemini_for_confident_inputs(self):
+        model = mock.Mock()
+        model.generate_content.return_value = mock.Mock(text="1. Claim one\n2. Claim two")
+        before = local_extraction.get_extraction_stats()
+        with mock.patch('services.llm._get_model', return_value=model):
+            local = claim_extraction.extract_claims("The Eiffel Tower was built in 1889")
+            llm = claim_extraction.extract_claims("Honestly who knows what they put in these things anymore")
+
+        self.assertEqual(local, ["The Eiffel Tower was built in 1889"])
+        self.assertEqual(llm, ["Claim one", "Claim two"])
+        self.assertEqual(model.generate_content.call_count, 1)
+        after = local_extraction.get_extraction_stats()
+        self.assertEqual(after['local'] - before['local'], 1)
+        self.assertEqual(after['llm'] - before['llm'], 1)
+
+    def test_modes(self):
+        with mock.patch.object(local_extraction, 'CLAIM_EXTRACTION_MODE', 'llm'):
+            self.assertIsNone(local_extraction.fast_path("The sky is blue"))
+        with mock.patch.object(local_extraction, 'CLAIM_EXTRACTION_MODE', 'local'):
+            self.assertEqual(local_extraction.fast_path("Who knows anymore"), ["Who knows anymore"])
+
+if __name__ == "__main__":
+    unittest.main()
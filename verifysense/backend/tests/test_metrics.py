@@ -0,0 +1,65 @@
+import unittest
+import os
+import sys
+import asyncio
+
+# Add the parent directory to the path so we can import the services
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from services import metrics
+from services.metrics import Histogram, render_prometheus, request_timings, timed
+
+class TestHistogram(unittest.TestCase):
+    def test_counts_are_cumulative(self):
+        histogram = Histogram(buckets=(0.1, 1))
+        for seconds in (0.05, 0.1, 0.5, 3):
+            histogram.observe('stage', seconds)
+
+        cumulative, total, count = histogram.snapshot()['stage']
+        self.assertEqual(cumulative, [2, 3, 4])
+        self.assertAlmostEqual(total, 3.65)
+        self.assertEqual(count, 4)
+
+class TestTimed(unittest.TestCase):
+    def test_counts_empty_results_and_errors(self):
+        @timed('test_lookup')
+        def lookup(claim):
+            if claim == 'bad':
+                raise ValueError(claim)
+            return []
+
+        lookup('claim')
+        with self.assertRaises(ValueError):
+            lookup('bad')
+
+        self.assertEqual(metrics.stage_empty_results.snapshot()[('test_lookup',)], 1)
+        self.assertEqual(metrics.stage_errors.snapshot()[('test_lookup',)], 1)
+        self.assertEqual(metrics.stage_latency.snapshot()['test_lookup'][2], 2)
+
+    def test_collects_request_timings(self):
+        @timed('test_async')
+        async def lookup(claim):
+            return [claim]
+
+        with request_timings() as timings:
+            asyncio.run(lookup('claim'))
+            asyncio.run(lookup('claim'))
+
+        header = timings.server_timing()
+        self.assertTrue(header.startswith('test_async;dur='))
+        self.assertIn('desc="2 calls / slowest ', header)
+        self.assertIn(', total;dur=', header)
+
+class TestRenderPrometheus(unittest.TestCase):
+    def test_renders_histograms_and_cache_hit_ratio(self):
+        metrics.stage_latency.observe('test_render', 0.2)
+        body = render_prometheus(cache_stats={'fact_check': {'hits': 2, 'stale_hits': 1, 'misses': 1}})
+
+        self.assertIn('# TYPE verifysense_stage_duration_seconds histogram', body)
+        self.assertIn('verifysense_stage_duration_seconds_bucket{stage="test_render",le="0.25"} 1', body)
+        self.assertIn('verifysense_stage_duration_seconds_bucket{stage="test_render",le="+Inf"} 1', body)
+        self.assertIn('verifysense_cache_lookups_total{source="fact_check",result="misses"} 1', body)
+        self.assertIn('verifysense_cache_hit_ratio{source="fact_check"} 0.75', body)
+
+if __name__ == '__main__':
+    unittest.main()
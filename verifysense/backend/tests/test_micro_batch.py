@@ -0,0 +1,112 @@
+import unittest
+import os
+import sys
+import asyncio
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from unittest import mock
+
+# Add the parent directory to the path so we can import the services
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from services.micro_batch import MicroBatcher
+from services import claim_extraction, llm
+
+class TestMicroBatcher(unittest.TestCase):
+    def test_batches_concurrent_submissions(self):
+        batches = []
+        batcher = MicroBatcher(lambda items: batches.append(items) or [item * 2 for item in items], max_size=8, max_wait=0.2)
+
+        with ThreadPoolExecutor(max_workers=8) as executor:
+            results = list(executor.map(batcher.submit, range(8)))
+
+        self.assertEqual(results, [item * 2 for item in range(8)])
+        self.assertEqual(len(batches), 1)
+        self.assertEqual(batcher.stats(), {'batches': 1, 'items': 8})
+
+    def test_sends_partial_batch_after_window(self):
+        batcher = MicroBatcher(lambda items: items, max_size=100, max_wait=0.01)
+
+        self.assertEqual(batcher.submit('only'), 'only')
+
+    def test_handler_errors_reach_every_caller(self):
+        barrier = threading.Barrier(2)
+
+        def handler(items):
+            raise RuntimeError('upstream down')
+
+        batcher = MicroBatcher(handler, max_size=2, max_wait=1)
+
+        def submit(item):
+            barrier.wait()
+            with self.assertRaises(RuntimeError):
+                batcher.submit(item)
+
+        with ThreadPoolExecutor(max_workers=2) as executor:
+            list(executor.map(submit, ['a', 'b']))
+
+    def test_exception_results_fail_only_their_item(self):
+        batcher = MicroBatcher(lambda items: [ValueError(item) if item < 0 else item for item in items], max_size=2, max_wait=1)
+
+        with ThreadPoolExecutor(max_workers=2) as executor:
+            good, bad = executor.submit(batcher.submit, 1), executor.submit(batcher.submit, -1)
+
+        self.assertEqual(good.result(), 1)
+        self.assertRaises(ValueError, bad.result)
+
+    def test_submit_async_shares_batches(self):
+        batches = []
+        batcher = MicroBatcher(lambda items: batches.append(items) or items, max_size=3, max_wait=1)
+
+        async def submit_all():
+            return await asyncio.gather(*(batcher.submit_async(item) for item in 'abc'))
+
+        self.assertEqual(asyncio.run(submit_all()), ['a', 'b', 'c'])
+        self.assertEqual(len(batches), 1)
+
+@mock.patch('services.cache.CACHE_ENABLED', False)
+class TestBatchedClaimExtraction(unittest.TestCase):
+    def model_returning(self, *texts):
+        model = mock.Mock()
+        model.generate_content.side_effect = [mock.Mock(text=text) for text in texts]
+        return mock.patch.object(llm, '_get_model', return_value=model), model
+
+    def test_demultiplexes_batch_response(self):
+        patch, model = self.model_returning('```json\n{"1": ["Claim A"], "2": ["Claim B1", "Claim B2"]}\n```')
+        with patch:
+            claims = claim_extraction.extract_claims_batch(['doc a', 'doc b', 'doc a', ' '])
+
+        self.assertEqual(claims, [['Claim A'], ['Claim B1', 'Claim B2'], ['Claim A'], []])
+        self.assertEqual(model.generate_content.call_count, 1)
+
+    def test_falls_back_to_single_calls_for_unparsed_documents(self):
+        patch, model = self.model_returning('{"1": ["Claim A"]}', '1. Claim B')
+        with patch:
+            claims = claim_extraction.extract_claims_batch(['doc a', 'doc b'])
+
+        self.assertEqual(claims, [['Claim A'], ['Claim B']])
+        self.assertEqual(model.generate_content.call_count, 2)
+
+    def test_falls_back_when_response_is_not_json(self):
+        patch, model = self.model_returning('Sorry, I cannot help', '1. Claim A', '1. Claim B')
+        with patch:
+            claims = claim_extraction.extract_claims_batch(['doc a', 'doc b'])
+
+        self.assertEqual(claims, [['Claim A'], ['Claim B']])
+
+    @mock.patch.object(claim_extraction, 'fast_path', return_value=None)
+    def test_async_extraction_shares_a_batch(self, fast_path):
+        patch, model = self.model_returning('{"1": ["Claim A"], "2": ["Claim B"]}')
+        batcher = claim_extraction.MicroBatcher(claim_extraction.extract_claims_batch, max_size=2, max_wait=1)
+
+        async def extract_all():
+            return await asyncio.gather(*(claim_extraction.extract_claims_batched_async(doc) for doc in ('doc a', 'doc b')))
+
+        with patch, mock.patch.object(claim_extraction, '_batcher', batcher):
+            claims = asyncio.run(extract_all())
+
+        self.assertEqual(claims, [['Claim A'], ['Claim B']])
+        self.assertEqual(model.generate_content.call_count, 1)
+
+if __name__ == "__main__":
+    unittest.main()
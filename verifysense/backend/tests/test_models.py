@@ -0,0 +1,88 @@
+import unittest
+import os
+import sys
+import json
+from unittest import mock
+
+# Add the parent directory to the path so we can import the services
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from services.models import ClaimResult, json_default
+from services.fact_check import parse_fact_checks
+from services.evidence_retrieval import parse_evidence
+from services.scoring import calculate_score
+
+FACT_CHECK_RESPONSE = {'claims': [{
+    'text': 'Vaccines contain microchips',
+    'claimant': 'Social media posts',
+    'claimDate': '2021-01-01T00:00:00Z',
+    'claimReview': [{
+        'publisher': {'name': 'PolitiFact', 'site': 'politifact.com'},
+        'url': 'https://www.politifact.com/example',
+        'title': 'No, vaccines do not contain microchips',
+        'textualRating': 'Pants on Fire'
+    }]
+}, {'text': 'A claim without reviews'}]}
+
+SEARCH_RESPONSE = {'items': [{
+    'title': 'CDC Article',
+    'snippet': 'Vaccines do not contain microchips.',
+    'link': 'https://www.apnews.com/article/1',
+    'pagemap': {'metatags': [{'article:published_time': '2021-01-02'}]}
+}]}
+
+class TestModels(unittest.TestCase):
+    def test_parses_api_responses_into_current_shape(self):
+        fact_checks = parse_fact_checks(FACT_CHECK_RESPONSE)
+        evidence = parse_evidence(SEARCH_RESPONSE)
+
+        self.assertEqual(fact_checks[0].to_dict(), {
+            'claim_date': '2021-01-01T00:00:00Z',
+            'claim_source': 'Social media posts',
+            'claim_reviewed': 'Vaccines contain microchips',
+            'publisher': {'name': 'PolitiFact', 'site': 'politifact.com'},
+            'rating': 'Pants on Fire',
+            'rating_explanation': 'No, vaccines do not contain microchips',
+            'url': 'https://www.politifact.com/example'
+        })
+        self.assertEqual(fact_checks[1]['publisher'], {'name': '', 'site': ''})
+        self.assertEqual(evidence[0].to_dict(), {
+            'title': 'CDC Article',
+            'snippet': 'Vaccines do not contain microchips.',
+            'link': 'https://www.apnews.com/article/1',
+            'source': 'apnews.com',
+            'reliability': 'high',
+            'reliability_score': 80,
+            'date': '2021-01-02'
+        })
+
+    def test_models_are_read_like_dicts(self):
+        fact_check = parse_fact_checks(FACT_CHECK_RESPONSE)[0]
+
+        self.assertEqual(fact_check['rating'], 'Pants on Fire')
+        self.assertEqual(fact_check.get('publisher', {}).get('name'), 'PolitiFact')
+        self.assertIsNone(fact_check.get('missing'))
+        self.assertIsNone(fact_check.get('publisher_name'))
+        self.assertFalse(hasattr(fact_check, '__dict__'))
+
+    def test_keys_are_read_without_building_the_dict(self):
+        score = calculate_score('claim', parse_fact_checks(FACT_CHECK_RESPONSE), [])
+
+        with mock.patch.object(type(score), 'to_dict', side_effect=AssertionError('to_dict called')):
+            self.assertEqual(score['components']['claim_match_score'], 20.0)
+            self.assertEqual(score['confidence_label'], score.confidence_label)
+
+    def test_serializes_claim_results(self):
+        fact_checks = parse_fact_checks(FACT_CHECK_RESPONSE)
+        evidence = parse_evidence(SEARCH_RESPONSE)
+        score = calculate_score('claim', fact_checks, evidence)
+        result = ClaimResult('claim', fact_checks, evidence, score, {'summary': 'x', 'steps': []})
+
+        decoded = json.loads(json.dumps([result], default=json_default))[0]
+        self.assertEqual(decoded['fact_checks'][0]['publisher']['name'], 'PolitiFact')
+        self.assertEqual(decoded['score']['components']['claim_match_score'], 20.0)
+        self.assertEqual(decoded['score']['confidence_label'], score['confidence_label'])
+        self.assertEqual(result, decoded)
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,120 @@
+import unittest
+import os
+import sys
+import io
+import asyncio
+from concurrent.futures import ThreadPoolExecutor
+from unittest.mock import patch
+
+# Add the parent directory to the path so we can import the services
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from fakes.vision_server import FakeVisionServer
+from services import clients, ocr
+from services.micro_batch import MicroBatcher
+from services.cache import TTLCache, TieredCache
+from services.image_preprocessing import Image, prepare_image
+
+def make_image(size, image_format):
+    image = Image.new('RGB', size, 'white')
+    for x in range(0, size[0], 7):
+        image.paste((x % 256, 0, 0), (x, 0, x + 3, size[1] // 2))
+    buffer = io.BytesIO()
+    image.save(buffer, image_format)
+    return buffer.getvalue()
+
+@unittest.skipIf(Image is None, 'Pillow is not installed')
+class TestPrepareImage(unittest.TestCase):
+    @patch('services.image_preprocessing.OCR_MAX_DIMENSION', 100)
+    def test_downscales_large_images(self):
+        prepared = prepare_image(make_image((400, 200), 'PNG'))
+
+        with Image.open(io.BytesIO(prepared.content)) as image:
+            self.assertEqual(image.format, 'JPEG')
+            self.assertEqual(image.size, (100, 50))
+
+    @patch('services.image_preprocessing.OCR_MAX_DIMENSION', 100)
+    def test_downscales_jpegs_at_exact_multiples_of_the_limit(self):
+        for size in ((200, 150), (400, 300), (800, 600), (201, 150)):
+            data = make_image(size, 'JPEG')
+            prepared = prepare_image(data)
+
+            self.assertNotEqual(prepared.content, data, size)
+            with Image.open(io.BytesIO(prepared.content)) as image:
+                self.assertEqual(max(image.size), 100, size)
+
+    @patch('services.image_preprocessing.OCR_MAX_DIMENSION', 100)
+    def test_sends_jpegs_at_the_limit_unchanged(self):
+        data = make_image((100, 75), 'JPEG')
+
+        self.assertEqual(prepare_image(data).content, data)
+
+    def test_sends_small_images_unchanged(self):
+        data = make_image((200, 100), 'PNG')
+
+        self.assertEqual(prepare_image(data).content, data)
+
+    def test_lossless_encodings_share_content_hash(self):
+        png = prepare_image(make_image((300, 200), 'PNG'))
+        bmp = prepare_image(make_image((300, 200), 'BMP'))
+
+        self.assertEqual(png.content_hash, bmp.content_hash)
+
+@patch('services.ocr.CACHE_ENABLED', True)
+class TestExtractTextFromImage(unittest.TestCase):
+    def setUp(self):
+        self.server = FakeVisionServer().__enter__()
+        self.addCleanup(self.server.__exit__, None, None, None)
+        patches = [
+            patch('services.ocr.VISION_API_ENDPOINT', self.server.url),
+            patch.dict(clients._clients, clear=True),
+            patch('services.ocr._batcher', MicroBatcher(ocr.detect_text_batch, 8, 0.2)),
+            patch('services.ocr.result_cache', TieredCache(TTLCache()))
+        ]
+        for p in patches:
+            p.start()
+            self.addCleanup(p.stop)
+
+    def test_caches_text_by_content(self):
+        first = ocr.extract_text_from_image(b'Vaccines contain microchips')
+        second = ocr.extract_text_from_image('data:image/png;base64,VmFjY2luZXMgY29udGFpbiBtaWNyb2NoaXBz')
+
+        self.assertEqual(first, 'Vaccines contain microchips')
+        self.assertEqual(second, first)
+        self.assertEqual(self.server.batch_sizes, [1])
+
+    def test_does_not_cache_errors(self):
+        self.assertTrue(ocr.extract_text_from_image(b'').startswith('Error'))
+        self.assertTrue(ocr.extract_text_from_image(b'').startswith('Error'))
+        self.assertEqual(self.server.batch_sizes, [1, 1])
+
+    def test_batches_concurrent_images(self):
+        images = [f"Claim number {i}".encode('utf-8') for i in range(8)]
+        with ThreadPoolExecutor(max_workers=8) as executor:
+            texts = list(executor.map(ocr.extract_text_from_image, images + [b'']))
+
+        self.assertEqual(texts[:8], [image.decode('utf-8') for image in images])
+        self.assertTrue(texts[8].startswith('Error'))
+        self.assertEqual(sum(self.server.batch_sizes), 9)
+        self.assertLess(len(self.server.batch_sizes), 9)
+
+    def test_async_callers_share_batches(self):
+        async def read_all():
+            return await asyncio.gather(*(ocr.extract_text_from_image_async(f"Text {i}".encode('utf-8')) for i in range(4)))
+
+        self.assertEqual(asyncio.run(read_all()), [f"Text {i}" for i in range(4)])
+        self.assertEqual(self.server.batch_sizes, [4])
+
+    @unittest.skipIf(Image is None, 'Pillow is not installed')
+    def test_similar_images_do_not_share_cached_text(self):
+        image = Image.open(io.BytesIO(make_image((300, 200), 'PNG')))
+        image.putpixel((299, 199), (0, 0, 0))
+        edited = io.BytesIO()
+        image.save(edited, 'PNG')
+        ocr.extract_text_from_image(make_image((300, 200), 'PNG'))
+        ocr.extract_text_from_image(edited.getvalue())
+
+        self.assertEqual(self.server.batch_sizes, [1, 1])
+
+if __name__ == "__main__":
+    unittest.main()
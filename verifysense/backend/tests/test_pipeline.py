@@ -0,0 +1,96 @@
+import unittest
+import os
+import sys
+import time
+import asyncio
+
+# Add the parent directory to the path so we can import the services
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from services.pipeline import verify_claims, verify_claims_async, iter_verification_events
+
+def slow_check_facts(claim):
+    time.sleep(0.2)
+    return [{"rating": "False", "claim": claim}]
+
+def slow_get_evidence(claim):
+    time.sleep(0.2)
+    return [{"title": claim, "reliability": "high"}]
+
+def simple_score(claim, fact_checks, evidence):
+    return {"score": len(fact_checks) + len(evidence), "confidence_label": "Uncertain"}
+
+def echo_explanation(claim, fact_checks, evidence, score):
+    # Later claims finish first so ordering is exercised
+    time.sleep(0.05 * (3 - int(claim[-1])))
+    return {"summary": claim, "steps": [str(score["score"])]}
+
+class TestVerifyClaims(unittest.TestCase):
+    def test_results_keep_claim_order(self):
+        claims = ["Claim 0", "Claim 1", "Claim 2"]
+
+        results = verify_claims(claims, slow_check_facts, slow_get_evidence, simple_score, echo_explanation)
+
+        self.assertEqual([r["claim"] for r in results], claims)
+        for claim, result in zip(claims, results):
+            self.assertEqual(result["fact_checks"][0]["claim"], claim)
+            self.assertEqual(result["evidence"][0]["title"], claim)
+            self.assertEqual(result["score"]["score"], 2)
+            self.assertEqual(result["explanation"]["summary"], claim)
+
+    def test_claims_run_concurrently(self):
+        claims = ["Claim 0", "Claim 1", "Claim 2"]
+
+        start = time.monotonic()
+        verify_claims(claims, slow_check_facts, slow_get_evidence, simple_score, echo_explanation)
+        elapsed = time.monotonic() - start
+
+        # Serially this would take over 1.2 seconds
+        self.assertLess(elapsed, 0.6)
+
+    def test_upstream_errors_propagate(self):
+        def failing_check_facts(claim):
+            raise RuntimeError("upstream down")
+
+        with self.assertRaises(RuntimeError):
+            verify_claims(["Claim 0"], failing_check_facts, slow_get_evidence, simple_score, echo_explanation)
+
+class TestVerificationEvents(unittest.TestCase):
+    def test_each_claim_passes_through_every_stage_in_order(self):
+        claims = ["Claim 0", "Claim 1"]
+
+        events = list(iter_verification_events(claims, slow_check_facts, slow_get_evidence, simple_score, echo_explanation))
+
+        self.assertEqual(len(events), 8)
+        for index in range(len(claims)):
+            stages = [stage for i, stage, _ in events if i == index]
+            self.assertEqual(sorted(stages[:2]), ["evidence", "fact_checks"])
+            self.assertEqual(stages[2:], ["score", "explanation"])
+
+class TestVerifyClaimsAsync(unittest.IsolatedAsyncioTestCase):
+    async def test_results_keep_claim_order_and_overlap(self):
+        async def check_facts(claim):
+            await asyncio.sleep(0.2)
+            return [{"rating": "False", "claim": claim}]
+
+        async def get_evidence(claim):
+            await asyncio.sleep(0.2)
+            return [{"title": claim, "reliability": "high"}]
+
+        async def explain(claim, fact_checks, evidence, score):
+            await asyncio.sleep(0.05 * (3 - int(claim[-1])))
+            return {"summary": claim, "steps": []}
+
+        claims = ["Claim 0", "Claim 1", "Claim 2"]
+
+        start = time.monotonic()
+        results = await verify_claims_async(claims, check_facts, get_evidence, simple_score, explain)
+        elapsed = time.monotonic() - start
+
+        self.assertEqual([r["claim"] for r in results], claims)
+        self.assertEqual([r["explanation"]["summary"] for r in results], claims)
+        self.assertEqual(results[0]["score"]["score"], 2)
+        self.assertLess(elapsed, 0.6)
+
+if __name__ == "__main__":
+    unittest.main()
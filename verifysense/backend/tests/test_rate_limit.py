@@ -0,0 +1,131 @@
+import unittest
+import os
+import sys
+import asyncio
+import tempfile
+from unittest import mock
+
+# Add the parent directory to the path so we can import the services
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from services import rate_limit
+from services.cache import cached
+from services.rate_limit import BATCH, MemoryStore, QuotaExceeded, RateLimiter, SQLiteStore, priority
+
+def limits(rate=1, burst=5, daily_quota=0):
+    return {'test': {'rate': rate, 'burst': burst, 'daily_quota': daily_quota}}
+
+class FakeClock:
+    def __init__(self):
+        self.now = 1000000.0
+
+    def time(self):
+        return self.now
+
+    monotonic = time
+
+    def sleep(self, seconds):
+        self.now += seconds
+
+@mock.patch.object(rate_limit, 'RATE_LIMIT_BATCH_RESERVE', 0.4)
+@mock.patch.object(rate_limit, 'RATE_LIMIT_MAX_WAIT', {rate_limit.INTERACTIVE: 2, BATCH: 10})
+class TestRateLimiter(unittest.TestCase):
+    def setUp(self):
+        self.clock = FakeClock()
+        patcher = mock.patch.object(rate_limit, 'time', self.clock)
+        patcher.start()
+        self.addCleanup(patcher.stop)
+
+    def test_waits_for_tokens_to_refill(self):
+        limiter = RateLimiter(MemoryStore(), limits(rate=2, burst=2))
+        for _ in range(3):
+            limiter.acquire('test')
+
+        self.assertAlmostEqual(self.clock.now, 1000000.5)
+        self.assertEqual(limiter.stats()['test']['throttled'], 1)
+
+    def test_rejects_when_wait_exceeds_limit(self):
+        limiter = RateLimiter(MemoryStore(), limits(rate=0.1, burst=1))
+        limiter.acquire('test')
+
+        self.assertRaises(QuotaExceeded, limiter.acquire, 'test')
+        self.assertEqual(limiter.stats()['test']['rejected'], 1)
+
+    def test_rejects_costs_above_the_burst(self):
+        limiter = RateLimiter(MemoryStore(), limits(rate=100, burst=5))
+        limiter.acquire('test', cost=5)
+
+        with self.assertRaises(ValueError):
+            limiter.acquire('test', cost=6)
+        with self.assertRaises(ValueError):
+            asyncio.run(limiter.acquire_async('test', cost=6))
+        self.assertEqual(self.clock.now, 1000000.0)
+
+    def test_batch_leaves_reserve_for_interactive(self):
+        limiter = RateLimiter(MemoryStore(), limits(rate=1, burst=5))
+        with priority(BATCH):
+            for _ in range(3):
+                limiter.acquire('test')
+            start = self.clock.now
+            limiter.acquire('test')
+            self.assertAlmostEqual(self.clock.now - start, 1)
+
+        # The reserved tokens are still there for interactive calls
+        start = self.clock.now
+        limiter.acquire('test')
+        limiter.acquire('test')
+        self.assertEqual(self.clock.now, start)
+
+    def test_daily_quota(self):
+        limiter = RateLimiter(MemoryStore(), limits(rate=100, burst=100, daily_quota=5))
+        with priority(BATCH):
+            for _ in range(3):
+                limiter.acquire('test')
+            self.assertRaises(QuotaExceeded, limiter.acquire, 'test')
+        limiter.acquire('test')
+        limiter.acquire('test')
+        self.assertRaises(QuotaExceeded, limiter.acquire, 'test')
+
+        self.clock.now += 86400
+        limiter.acquire('test')
+
+    def test_backoff_pauses_upstream(self):
+        limiter = RateLimiter(MemoryStore(), limits(rate=1, burst=5))
+        limiter.backoff('test', 0.5)
+
+        start = self.clock.now
+        limiter.acquire('test')
+        self.assertAlmostEqual(self.clock.now - start, 1.5)
+
+    def test_unlimited_upstreams_pass_through(self):
+        limiter = RateLimiter(MemoryStore(), {})
+        limiter.acquire('test', 1000)
+        asyncio.run(limiter.acquire_async('test'))
+
+    def test_sqlite_store_is_shared(self):
+        with tempfile.TemporaryDirectory() as directory:
+            path = os.path.join(directory, 'limits.db')
+            first = RateLimiter(SQLiteStore(path), limits(rate=0.1, burst=2))
+            second = RateLimiter(SQLiteStore(path), limits(rate=0.1, burst=2))
+            first.acquire('test')
+            second.acquire('test')
+
+            self.assertRaises(QuotaExceeded, first.acquire, 'test')
+
+class TestQuotaDegradation(unittest.TestCase):
+    @mock.patch('services.cache.CACHE_ENABLED', True)
+    def test_cached_service_returns_uncached_empty_result(self):
+        calls = []
+
+        @cached('rate_limit_test')
+        def lookup(claim):
+            calls.append(claim)
+            if len(calls) == 1:
+                raise QuotaExceeded('test rate limit reached')
+            return ['result']
+
+        self.assertEqual(lookup('A claim'), [])
+        self.assertEqual(lookup('A claim'), ['result'])
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,174 @@
+import unittest
+import os
+import sys
+import asyncio
+import threading
+import time
+from unittest import mock
+
+# Add the parent directory to the path so we can import the services
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from services import resilience
+from services.cache import cached
+from services.explainability import generate_explanation
+from services.resilience import CircuitBreaker, CircuitOpen, DeadlineExceeded, call_guarded, call_guarded_async, deadline
+
+def failing():
+    raise ConnectionError('upstream down')
+
+class TestCircuitBreaker(unittest.TestCase):
+    def test_opens_after_consecutive_failures(self):
+        breaker = CircuitBreaker('test', failure_threshold=2, reset_seconds=60)
+        breaker.record_failure()
+        breaker.record_success()
+        breaker.record_failure()
+        breaker.check()
+
+        breaker.record_failure()
+        with self.assertRaises(CircuitOpen):
+            breaker.check()
+        self.assertEqual(breaker.stats(), {'state': 'open', 'failures': 3, 'opened': 1, 'short_circuited': 1})
+
+    def test_lets_one_probe_through_after_reset_time(self):
+        breaker = CircuitBreaker('test', failure_threshold=1, reset_seconds=0.05)
+        breaker.record_failure()
+        time.sleep(0.06)
+
+        breaker.check()
+        with self.assertRaises(CircuitOpen):
+            breaker.check()
+
+        breaker.record_success()
+        breaker.check()
+        self.assertEqual(breaker.state, CircuitBreaker.CLOSED)
+
+class TestCallGuarded(unittest.TestCase):
+    def setUp(self):
+        resilience._upstreams.clear()
+        self.addCleanup(resilience._upstreams.clear)
+
+    def test_fails_fast_once_circuit_opens(self):
+        for _ in range(resilience.CIRCUIT_FAILURE_THRESHOLD):
+            with self.assertRaises(ConnectionError):
+                call_guarded('test', failing)
+
+        func = mock.Mock()
+        with self.assertRaises(CircuitOpen):
+            call_guarded('test', func)
+        func.assert_not_called()
+
+    def test_failed_results_count_against_the_circuit(self):
+        for _ in range(resilience.CIRCUIT_FAILURE_THRESHOLD):
+            call_guarded('test', lambda: 503, is_failure=lambda status: status >= 500)
+
+        self.assertEqual(resilience.get_resilience_stats()['test']['circuit']['state'], 'open')
+
+    def test_gives_up_at_the_deadline(self):
+        release = threading.Event()
+        self.addCleanup(release.set)
+
+        with deadline(0.05):
+            with self.assertRaises(DeadlineExceeded):
+                call_guarded('test', release.wait)
+
+        stats = resilience.get_resilience_stats()['test']
+        self.assertEqual(stats['deadline_exceeded'], 1)
+        self.assertEqual(stats['circuit']['failures'], 1)
+
+    def test_abandoned_attempts_take_no_rate_limit_tokens(self):
+        release = threading.Event()
+        self.addCleanup(release.set)
+        executor = resilience.ThreadPoolExecutor(max_workers=1)
+        self.addCleanup(executor.shutdown)
+        func = mock.Mock()
+
+        with mock.patch.object(resilience, '_executor', executor), \
+                mock.patch.object(resilience.rate_limiter, 'acquire') as acquire:
+            # The only worker is busy, so the attempt is still queued at the deadline
+            executor.submit(release.wait)
+            with deadline(0.05):
+                with self.assertRaises(DeadlineExceeded):
+                    call_guarded('test', func)
+            release.set()
+            executor.shutdown(wait=True)
+
+        acquire.assert_not_called()
+        func.assert_not_called()
+
+    @mock.patch.object(resilience, 'HEDGE_UPSTREAMS', {'test'})
+    @mock.patch.object(resilience, 'HEDGE_MIN_DELAY_MS', 10)
+    def test_hedges_calls_slower_than_usual(self):
+        for _ in range(resilience.HEDGE_MIN_SAMPLES):
+            call_guarded('test', lambda: 'fast')
+        release = threading.Event()
+        self.addCleanup(release.set)
+        calls = []
+
+        def slow_then_fast():
+            calls.append(1)
+            if len(calls) == 1:
+                release.wait()
+                return 'slow'
+            return 'hedged'
+
+        self.assertEqual(call_guarded('test', slow_then_fast), 'hedged')
+        stats = resilience.get_resilience_stats()['test']
+        self.assertEqual((stats['hedges'], stats['hedge_wins']), (1, 1))
+
+    @mock.patch.object(resilience, 'HEDGE_UPSTREAMS', {'test'})
+    @mock.patch.object(resilience, 'HEDGE_MIN_DELAY_MS', 10)
+    def test_async_hedge_cancels_the_slow_call(self):
+        async def fast():
+            return 'fast'
+
+        cancelled = []
+
+        async def slow_then_fast():
+            if not cancelled:
+                cancelled.append(False)
+                try:
+                    await asyncio.sleep(10)
+                except asyncio.CancelledError:
+                    cancelled[0] = True
+                    raise
+            return 'hedged'
+
+        async def run():
+            for _ in range(resilience.HEDGE_MIN_SAMPLES):
+                await call_guarded_async('test', fast)
+            result = await call_guarded_async('test', slow_then_fast)
+            await asyncio.sleep(0)
+            return result
+
+        self.assertEqual(asyncio.run(run()), 'hedged')
+        self.assertEqual(cancelled, [True])
+
+class TestDegradation(unittest.TestCase):
+    def setUp(self):
+        resilience._upstreams.clear()
+        self.addCleanup(resilience._upstreams.clear)
+
+    @mock.patch('services.cache.CACHE_ENABLED', False)
+    def test_cached_service_returns_empty_result_when_circuit_is_open(self):
+        @cached('test')
+        def lookup(claim):
+            return call_guarded('test', failing)
+
+        breaker = resilience._get_upstream('test').breaker
+        for _ in range(breaker.failure_threshold):
+            breaker.record_failure()
+
+        self.assertEqual(lookup('The sky is blue'), [])
+
+    def test_explanation_is_skipped_when_budget_is_nearly_spent(self):
+        score = {'score': 80, 'confidence_label': 'likely true'}
+        with mock.patch('services.llm.call_guarded') as call:
+            with deadline(resilience.EXPLANATION_MIN_BUDGET_SECONDS / 2):
+                explanation = generate_explanation('The sky is blue', [], [], score)
+
+        call.assert_not_called()
+        self.assertIn('likely true', explanation['summary'])
+
+if __name__ == '__main__':
+    unittest.main()
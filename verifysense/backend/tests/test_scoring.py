@@ -0,0 +1,89 @@
+import unittest
+import os
+import sys
+import random
+
+# Add the parent directory to the path so we can import the services
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from services.scoring import calculate_score, calculate_scores, encode_records
+from services.ratings import Rating, normalize_rating
+
+RATINGS = ['False', 'Pants on Fire', 'Mostly False', 'Misleading', 'Half True', 'Mixture',
+           'Mostly True', 'True', 'Unproven', 'Correct attribution', 'True, but misleading', '']
+RELIABILITIES = ['high', 'medium', 'low', None, 'High']
+
+def random_records(count, seed=0):
+    rng = random.Random(seed)
+    records = []
+    for _ in range(count):
+        fact_checks = [{'rating': rng.choice(RATINGS)} for _ in range(rng.randint(0, 4))]
+        evidence = [{'reliability': rng.choice(RELIABILITIES)} for _ in range(rng.randint(0, 6))]
+        # Graded scores from the domain reliability index on some items
+        for item in evidence:
+            if rng.random() < 0.3:
+                item['reliability_score'] = rng.randint(0, 100)
+        records.append((fact_checks, evidence))
+    return records
+
+class TestBatchScoring(unittest.TestCase):
+    def test_matches_scalar_scores(self):
+        records = random_records(5000)
+        batch = calculate_scores(**encode_records(records))
+
+        for index, (fact_checks, evidence) in enumerate(records):
+            expected = calculate_score('claim', fact_checks, evidence)
+            self.assertEqual(batch['score'][index], expected['score'])
+            self.assertEqual(batch['confidence_label'][index], expected['confidence_label'])
+            for name, value in expected['components'].items():
+                self.assertEqual(batch['components'][name][index], value, name)
+
+    def test_averages_recognised_ratings(self):
+        fact_checks = [{'rating': 'False'}, {'rating': 'Unproven'}, {'rating': 'Mostly True'}]
+        batch = calculate_scores(**encode_records([(fact_checks, [])]))
+
+        self.assertEqual(calculate_score('claim', fact_checks, [])['components']['claim_match_score'], 45)
+        self.assertEqual(batch['components']['claim_match_score'][0], 45)
+
+    def test_empty_batch(self):
+        batch = calculate_scores(**encode_records([]))
+
+        self.assertEqual(len(batch['score']), 0)
+
+class TestNormalizeRating(unittest.TestCase):
+    def test_maps_ratings_to_verdicts(self):
+        expected = {
+            'False': Rating.FALSE,
+            'Pants on Fire!': Rating.FALSE,
+            'Mostly False': Rating.MOSTLY_FALSE,
+            'Half True': Rating.MIXED,
+            'Mostly true': Rating.MOSTLY_TRUE,
+            'TRUE': Rating.TRUE,
+            'Unproven': Rating.UNRATED,
+            None: Rating.UNRATED
+        }
+        for rating, verdict in expected.items():
+            self.assertEqual(normalize_rating(rating), verdict, rating)
+
+    def test_least_favourable_verdict_wins(self):
+        self.assertEqual(normalize_rating('True, but misleading'), Rating.MOSTLY_FALSE)
+
+    def test_negated_ratings_are_false(self):
+        for rating in ('Not accurate', 'Not correct', 'Inaccurate'):
+            self.assertEqual(normalize_rating(rating), Rating.FALSE, rating)
+
+    def test_mostly_accurate_is_mostly_true(self):
+        self.assertEqual(normalize_rating('Mostly accurate'), Rating.MOSTLY_TRUE)
+
+    def test_longest_phrase_wins(self):
+        self.assertEqual(normalize_rating('Accurate, mostly accurate'), Rating.MOSTLY_TRUE)
+
+    def test_mostly_false_scores_above_false(self):
+        mostly_false = calculate_score('claim', [{'rating': 'Mostly False'}], [])
+        false = calculate_score('claim', [{'rating': 'False'}], [])
+
+        self.assertEqual(mostly_false['components']['claim_match_score'], 30)
+        self.assertEqual(false['components']['claim_match_score'], 20)
+
+if __name__ == "__main__":
+    unittest.main()
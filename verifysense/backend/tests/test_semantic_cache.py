@@ -0,0 +1,130 @@
+import unittest
+import os
+import sys
+from unittest.mock import patch
+
+# Add the parent directory to the path so we can import the services
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from services import semantic_cache
+from services.cache import TTLCache, TieredCache, cached
+from services.semantic_cache import SemanticIndex, embed
+from services.pipeline import verify_claims
+
+def payload(name):
+    return {"fact_checks": [{"rating": name}], "evidence": []}
+
+class TestEmbed(unittest.TestCase):
+    def test_near_duplicates_are_similar(self):
+        vectors = embed([
+            "Vaccines contain microchips",
+            "vaccines contain micro-chips!",
+            "The Earth is flat"
+        ])
+
+        self.assertGreater(float(vectors[0] @ vectors[1]), 0.8)
+        self.assertLess(float(vectors[0] @ vectors[2]), 0.3)
+
+    def test_empty_text_embeds_to_zero(self):
+        self.assertEqual(float(abs(embed([""])).sum()), 0.0)
+
+class TestSemanticIndex(unittest.TestCase):
+    def test_search_respects_threshold(self):
+        index = SemanticIndex(threshold=0.8)
+        index.add_many(["Vaccines contain microchips", "The Earth is flat"], [payload("False"), payload("Pants on fire")])
+
+        claim, result, similarity = index.search("vaccines contain micro-chips!")
+        self.assertEqual(claim, "Vaccines contain microchips")
+        self.assertEqual(result, payload("False"))
+        self.assertGreaterEqual(similarity, 0.8)
+        self.assertIsNone(index.search("The moon landing was staged"))
+
+    def test_lsh_search_finds_merged_and_recent_claims(self):
+        claims = [f"claim number {i} about topic {i * 7919 % 1000}" for i in range(300)]
+        with patch.object(semantic_cache, "BRUTE_FORCE_LIMIT", 0), \
+             patch.object(semantic_cache, "LSH_MERGE_BATCH", 100):
+            index = SemanticIndex(threshold=0.95)
+            index.add_many(claims[:250], list(range(250)))
+            index.add_many(claims[250:], list(range(250, 300)))
+
+            # Merged into the sorted tables
+            self.assertEqual(index.search(claims[10].upper())[1], 10)
+            # Still in the unsorted tail
+            self.assertEqual(index.search(claims[280])[1], 280)
+
+    def test_starts_over_at_capacity(self):
+        index = SemanticIndex(max_claims=2, threshold=0.95)
+        index.add_many(["one claim", "two claim"], [1, 2])
+        index.add_many(["three claim"], [3])
+
+        self.assertEqual(len(index), 1)
+        self.assertEqual(index.search("three claim")[1], 3)
+        self.assertIsNone(index.search("one claim"))
+
+@patch("services.cache.CACHE_ENABLED", True)
+class TestPipelineReuse(unittest.TestCase):
+    def setUp(self):
+        patcher = patch("services.cache.result_cache", TieredCache(TTLCache()))
+        patcher.start()
+        self.addCleanup(patcher.stop)
+        self.index = SemanticIndex(threshold=0.8)
+        self.calls = []
+
+    def verify(self, claim, fact_checks):
+        @cached("test_fact_check")
+        def check_facts(claim):
+            self.calls.append(claim)
+            return fact_checks
+
+        @cached("test_evidence")
+        def get_evidence(claim):
+            return [{"title": "Test title"}]
+
+        def score(claim, fact_checks, evidence):
+            return {"score": 20}
+
+        def explain(claim, fact_checks, evidence, score):
+            return {"summary": claim}
+
+        return verify_claims([claim], check_facts, get_evidence, score, explain, claim_index=self.index)
+
+    def test_near_duplicate_skips_lookups(self):
+        self.verify("Vaccines contain microchips", [{"rating": "False"}])
+        results = self.verify("vaccines contain micro-chips!", [{"rating": "False"}])
+
+        self.assertEqual(self.calls, ["Vaccines contain microchips"])
+        self.assertEqual(results[0]["claim"], "vaccines contain micro-chips!")
+        self.assertEqual(results[0]["fact_checks"], [{"rating": "False"}])
+        self.assertEqual(results[0]["evidence"], [{"title": "Test title"}])
+
+    def test_empty_results_are_not_reused(self):
+        self.verify("Vaccines contain microchips", [])
+        self.verify("vaccines contain micro-chips!", [])
+
+        self.assertEqual(len(self.index), 0)
+        self.assertEqual(len(self.calls), 2)
+
+    def test_uncached_stages_skip_the_index(self):
+        index = SemanticIndex(threshold=0.8)
+        with patch.object(index, "search") as search:
+            verify_claims(
+                ["Vaccines contain microchips"],
+                lambda claim: [{"rating": "False"}],
+                lambda claim: [{"title": "Test title"}],
+                lambda claim, fact_checks, evidence: {"score": 20},
+                lambda claim, fact_checks, evidence, score: {"summary": claim},
+                claim_index=index
+            )
+
+        search.assert_not_called()
+        self.assertEqual(len(index), 0)
+
+    def test_expired_results_are_not_reused(self):
+        self.verify("Vaccines contain microchips", [{"rating": "False"}])
+        with patch("time.time", return_value=2 ** 40):
+            self.verify("vaccines contain micro-chips!", [{"rating": "False"}])
+
+        self.assertEqual(len(self.calls), 2)
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,72 @@
+import unittest
+import os
+import sys
+from unittest.mock import patch
+
+# Add the parent directory to the path so we can import the services
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from fakes.upstreams import UPSTREAM_PATHS, FakeUpstreamServer, LatencyProfile, backend_env, gemini_text
+from services import claim_extraction, evidence_retrieval, explainability, fact_check, resilience
+
+class TestLatencyProfile(unittest.TestCase):
+    def test_parses_median_p99_and_error_rate(self):
+        profile = LatencyProfile.parse('80:400:0.05')
+
+        self.assertEqual(profile.to_dict(), {'median_ms': 80, 'p99_ms': 400, 'error_rate': 0.05})
+
+    def test_fixed_latency_without_p99(self):
+        profile = LatencyProfile.parse('20')
+
+        self.assertAlmostEqual(profile.sample(), 0.02)
+        self.assertFalse(profile.fails())
+
+@patch('services.cache.CACHE_ENABLED', False)
+@patch.dict(os.environ, {'FACT_CHECK_API_KEY': 'fake-key', 'CUSTOM_SEARCH_API_KEY': 'fake-key', 'SEARCH_ENGINE_ID': 'fake-engine'})
+class TestFakeUpstreams(unittest.TestCase):
+    def setUp(self):
+        resilience._upstreams.clear()
+        self.addCleanup(resilience._upstreams.clear)
+
+    def test_services_parse_fake_responses(self):
+        with FakeUpstreamServer('fact_check') as fact_checks, FakeUpstreamServer('custom_search') as search:
+            env = backend_env({'fact_check': fact_checks, 'custom_search': search})
+            with patch.object(fact_check, 'FACT_CHECK_API_URL', env['FACT_CHECK_API_URL']), \
+                    patch.object(evidence_retrieval, 'SEARCH_API_URL', env['CUSTOM_SEARCH_API_URL']):
+                checks = fact_check.check_facts('The moon is made of cheese')
+                evidence = evidence_retrieval.get_evidence('The moon is made of cheese', max_results=3)
+
+        self.assertEqual(checks[0].claim_reviewed, 'The moon is made of cheese')
+        self.assertEqual(checks[0].publisher_name, 'PolitiFact')
+        self.assertEqual([item.source for item in evidence], ['reuters.com', 'apnews.com', 'bbc.co.uk'])
+
+    def test_failing_upstream_answers_503(self):
+        with FakeUpstreamServer('fact_check', LatencyProfile(error_rate=1)) as server:
+            with patch.object(fact_check, 'FACT_CHECK_API_URL', server.url + UPSTREAM_PATHS['fact_check']):
+                self.assertEqual(fact_check.check_facts('The moon is made of cheese'), [])
+
+        self.assertEqual(server.failures, server.requests)
+        self.assertGreater(server.failures, 0)
+
+class TestFakeGemini(unittest.TestCase):
+    def test_answers_extraction_prompts(self):
+        content = 'The moon is made of cheese. It orbits the Earth every day.'
+
+        self.assertEqual(
+            claim_extraction._parse_claims(gemini_text(claim_extraction._build_prompt(content))),
+            ['The moon is made of cheese.', 'It orbits the Earth every day.']
+        )
+        batch = claim_extraction._build_batch_prompt([content, 'Water boils at 50 degrees.'])
+        self.assertEqual(
+            claim_extraction._parse_batch_claims(gemini_text(batch), [content, 'Water boils at 50 degrees.'])['Water boils at 50 degrees.'],
+            ['Water boils at 50 degrees.']
+        )
+
+    def test_answers_explanation_prompts(self):
+        prompt = explainability._build_prompt('The moon is made of cheese', [], [], {'score': 10})
+        explanation = explainability._parse_explanation(gemini_text(prompt))
+
+        self.assertEqual(len(explanation['steps']), 3)
+
+if __name__ == '__main__':
+    unittest.main()